@@ -21,8 +21,12 @@ from okxx.async_api.AsyncSubAccount import AsyncSubAccountAPI
 from okxx.async_api.AsyncTrade import AsyncTradeAPI
 from okxx.async_api.AsyncTradingData import AsyncTradingDataAPI
 
+from okxx.cache import ResponseCache
 from okxx.consts import API_URL
-from typing import Optional
+from okxx.limiter import AsyncRateLimiterManager
+from typing import Optional, Union
+
+import httpx
 
 
 class AsyncRestAPI:
@@ -42,13 +46,35 @@ class AsyncRestAPI:
         domain: str = API_URL,
         debug: bool = False,
         proxy: Optional[str] = None,
+        limiter_manager: Optional[AsyncRateLimiterManager] = None,
+        low_priority_concurrency: Optional[int] = None,
+        single_flight: bool = True,
+        cache: Optional[ResponseCache] = None,
+        limits: Optional[httpx.Limits] = None,
+        timeout: Union[float, httpx.Timeout, None] = None,
+        prewarm: bool = False,
+        keepalive_interval: Optional[float] = None,
     ):
         """
         初始化异步SDK客户端。
         参数与同步版本完全相同。
         """
         self._client = AsyncOkxClient(
-            api_key, api_secret_key, passphrase, flag, domain, debug, proxy
+            api_key,
+            api_secret_key,
+            passphrase,
+            flag,
+            domain,
+            debug,
+            proxy,
+            limiter_manager=limiter_manager,
+            low_priority_concurrency=low_priority_concurrency,
+            single_flight=single_flight,
+            cache=cache,
+            limits=limits,
+            timeout=timeout,
+            prewarm=prewarm,
+            keepalive_interval=keepalive_interval,
         )
 
         # 实例化所有异步功能模块
@@ -0,0 +1,292 @@
+# okx/backfill.py
+"""
+多产品历史数据回补调度器
+
+基于 AsyncMarketAPI，把 (产品, 周期, 时间区间) 形式的回补任务拆分为独立的分页请求，
+按接口分别排队，并为每个限速桶配置与其速率相同的并发数，使请求始终排在限速器上而不是
+空等网络往返，从而把吞吐量推到限速上限附近。
+
+- K线：按 limit * bar 把区间切成互不重叠的时间窗口，每个窗口一个请求，可完全并行；
+- 成交：按时间窗口切分，窗口内用 tradeId 游标向过去翻页，窗口之间并行；
+- 瞬时错误（网络错误、限速、服务端5xx）自动指数退避重试；
+- 所有请求以 PRIORITY_BACKFILL 优先级发出，令牌紧张时让位于交易和查询请求；
+- 每个任务的结果按时间升序、逐页交给 sink，即使各页乱序完成。
+
+使用示例:
+    async def sink(job, rows):
+        print(job.instId, len(rows), rows[0][0])
+
+    async with AsyncRestAPI() as api:
+        scheduler = BackfillScheduler(api.market_data, sink)
+        for inst_id in ['BTC-USDT', 'ETH-USDT']:
+            scheduler.add_candles(inst_id, '1m', start=..., end=...)
+        summary = await scheduler.run()
+"""
+
+import asyncio
+import inspect
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional
+
+from loguru import logger
+
+from okxx import consts as c
+from okxx.candles import CANDLE_ENDPOINTS, bar_to_ms
+from okxx.exceptions import OkxAPIException, OkxRequestException
+from okxx.limiter import (
+    PRIORITY_BACKFILL,
+    _RateLimiterConfig,
+    config_path,
+    request_priority,
+)
+
+# K线种类 -> 限速规则对应的接口路径
+_CANDLE_PATHS = {
+    "candles": c.MARKET_CANDLES,
+    "history": c.HISTORY_CANDLES,
+    "index": c.INDEX_CANDLES,
+    "mark": c.MARKPRICE_CANDLES,
+}
+
+# 可以重试的业务错误码：50011 请求过于频繁，50013 系统繁忙
+_RETRYABLE_CODES = ("50011", "50013")
+
+TRADES_PAGE_LIMIT = 100
+
+
+def _is_transient(e: Exception) -> bool:
+    if isinstance(e, OkxRequestException):
+        return True
+    if isinstance(e, OkxAPIException):
+        return e.code in _RETRYABLE_CODES or e.status_code in (429, 500, 502, 503, 504)
+    return False
+
+
+class BackfillJob:
+    """一个回补任务，页面按时间顺序编号，结果按编号顺序交给 sink。"""
+
+    def __init__(self, kind: str, instId: str, bar: Optional[str], start: int, end: int):
+        self.kind = kind
+        self.instId = instId
+        self.bar = bar
+        self.start = start
+        self.end = end
+        self.pages_total = 0
+        self.pages_delivered = 0
+        self.rows_delivered = 0
+        self.error: Optional[Exception] = None
+        self._completed: Dict[int, List] = {}
+
+    @property
+    def done(self) -> bool:
+        return self.error is not None or self.pages_delivered == self.pages_total
+
+    def __repr__(self) -> str:
+        return (
+            f"BackfillJob({self.kind}, {self.instId}, bar={self.bar}, "
+            f"pages={self.pages_delivered}/{self.pages_total})"
+        )
+
+
+class _Page:
+    __slots__ = ("job", "index", "start", "end")
+
+    def __init__(self, job: BackfillJob, index: int, start: int, end: int):
+        self.job = job
+        self.index = index
+        self.start = start
+        self.end = end
+
+
+class BackfillScheduler:
+    """
+    异步历史数据回补调度器。
+    """
+
+    def __init__(
+        self,
+        market_api,
+        sink: Callable[[BackfillJob, List], Any],
+        concurrency: Optional[Dict[str, int]] = None,
+        max_retries: int = 5,
+        retry_delay: float = 0.5,
+    ):
+        """
+        :param market_api: AsyncMarketAPI 实例（例如 AsyncRestAPI.market_data）。
+        :param sink: 接收结果的回调 sink(job, rows)，可以是普通函数或协程函数。
+                     rows 为按时间升序排列的原始数据行（K线为列表，成交为字典）。
+        :param concurrency: （可选）按接口路径覆盖并发数，默认等于该接口限速规则中的 rate。
+        :param max_retries: 瞬时错误的最大重试次数。
+        :param retry_delay: 首次重试前的等待时间（秒），之后指数增长。
+        """
+        self.market_api = market_api
+        self.sink = sink
+        self.concurrency = concurrency or {}
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+
+        self.jobs: List[BackfillJob] = []
+        self._pages: Dict[str, List[_Page]] = defaultdict(list)
+        self._sink_lock = asyncio.Lock()
+
+    def add_candles(
+        self, instId: str, bar: str, start: int, end: int, kind: str = "history"
+    ) -> BackfillJob:
+        """
+        添加K线回补任务，区间为 [start, end)（毫秒）。
+
+        :param kind: 'candles' / 'history' / 'index' / 'mark'。
+        """
+        if kind not in _CANDLE_PATHS:
+            raise ValueError(f"Unknown candle endpoint kind: {kind}")
+        limit = CANDLE_ENDPOINTS[kind][1]
+        window = bar_to_ms(bar) * limit
+        job = BackfillJob(kind, instId, bar, start, end)
+        self._split(job, _CANDLE_PATHS[kind], window)
+        return job
+
+    def add_trades(
+        self, instId: str, start: int, end: int, window_ms: int = 60_000
+    ) -> BackfillJob:
+        """
+        添加成交回补任务，区间为 [start, end)（毫秒）。
+
+        :param window_ms: 切分窗口的长度；成交越活跃，窗口越小越能并行。
+        """
+        job = BackfillJob("trades", instId, None, start, end)
+        self._split(job, c.HISTORY_TRADES, window_ms)
+        return job
+
+    def _split(self, job: BackfillJob, path: str, window: int):
+        index = 0
+        for w_start in range(job.start, job.end, window):
+            self._pages[path].append(
+                _Page(job, index, w_start, min(w_start + window, job.end))
+            )
+            index += 1
+        job.pages_total = index
+        self.jobs.append(job)
+
+    async def run(self) -> Dict[str, Any]:
+        """
+        执行所有已添加的任务，返回汇总信息。
+        单个任务失败不会影响其他任务，错误记录在 BackfillJob.error 中。
+        """
+        workers = []
+        for path, pages in self._pages.items():
+            queue: asyncio.Queue = asyncio.Queue()
+            for page in pages:
+                queue.put_nowait(page)
+            configs = _RateLimiterConfig.RATE_CONFIGS
+            rate = configs.get(config_path(c.GET, path), {}).get("rate", 10)
+            for _ in range(min(self.concurrency.get(path, rate), len(pages))):
+                workers.append(asyncio.create_task(self._worker(path, queue)))
+        self._pages = defaultdict(list)
+        try:
+            await asyncio.gather(*workers)
+        finally:
+            for worker in workers:
+                worker.cancel()
+
+        return {
+            "jobs": len(self.jobs),
+            "failed": [job for job in self.jobs if job.error is not None],
+            "pages": sum(job.pages_delivered for job in self.jobs),
+            "rows": sum(job.rows_delivered for job in self.jobs),
+        }
+
+    async def _worker(self, path: str, queue: asyncio.Queue):
+        # 回补请求使用最低优先级，不与同一进程中的交易、查询请求争抢令牌
+        with request_priority(PRIORITY_BACKFILL):
+            await self._drain(queue, path)
+
+    async def _drain(self, queue: asyncio.Queue, path: str):
+        while True:
+            try:
+                page = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            if page.job.error is not None:
+                continue
+            try:
+                rows = await self._fetch_with_retry(path, page)
+            except Exception as e:
+                logger.error(f"Backfill {page.job} failed: {e}")
+                page.job.error = e
+                continue
+            await self._complete(page, rows)
+
+    async def _fetch_with_retry(self, path: str, page: _Page) -> List:
+        delay = self.retry_delay
+        attempt = 0
+        while True:
+            try:
+                if path == c.HISTORY_TRADES:
+                    return await self._fetch_trades(page)
+                return await self._fetch_candles(page)
+            except Exception as e:
+                attempt += 1
+                if not _is_transient(e) or attempt > self.max_retries:
+                    raise
+                logger.warning(
+                    f"Transient error on {page.job.instId} page {page.index} "
+                    f"(attempt {attempt}/{self.max_retries}): {e}"
+                )
+                await asyncio.sleep(delay)
+                delay *= 2
+
+    async def _fetch_candles(self, page: _Page) -> List:
+        job = page.job
+        method = getattr(self.market_api, CANDLE_ENDPOINTS[job.kind][0])
+        rows = await method(
+            instId=job.instId,
+            bar=job.bar,
+            after=str(page.end),
+            before=str(page.start - 1),
+            limit=str(CANDLE_ENDPOINTS[job.kind][1]),
+        )
+        # 接口返回新 -> 旧，转换为时间升序
+        return [row for row in reversed(rows) if page.start <= int(row[0]) < page.end]
+
+    async def _fetch_trades(self, page: _Page) -> List:
+        job = page.job
+        collected: List[Dict] = []
+        # 第一页按时间戳定位窗口终点，之后按 tradeId 翻页，避免同一毫秒内的成交被跳过
+        params = {"type": "2", "after": str(page.end)}
+        while True:
+            rows = await self.market_api.get_history_trades(
+                instId=job.instId, limit=str(TRADES_PAGE_LIMIT), **params
+            )
+            if not rows:
+                break
+            reached_start = False
+            for row in rows:
+                if int(row["ts"]) < page.start:
+                    reached_start = True
+                    break
+                collected.append(row)
+            if reached_start or len(rows) < TRADES_PAGE_LIMIT:
+                break
+            params = {"type": "1", "after": rows[-1]["tradeId"]}
+        collected.reverse()
+        return collected
+
+    async def _complete(self, page: _Page, rows: List):
+        """记录完成的页面，并按编号顺序把已就绪的页面交给 sink。"""
+        job = page.job
+        job._completed[page.index] = rows
+        async with self._sink_lock:
+            while job.pages_delivered in job._completed and job.error is None:
+                ready = job._completed.pop(job.pages_delivered)
+                job.pages_delivered += 1
+                if not ready:
+                    continue
+                try:
+                    result = self.sink(job, ready)
+                    if inspect.isawaitable(result):
+                        await result
+                except Exception as e:
+                    logger.error(f"Backfill sink failed for {job}: {e}")
+                    job.error = e
+                    return
+                job.rows_delivered += len(ready)
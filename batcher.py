@@ -0,0 +1,368 @@
+# okx/batcher.py
+"""
+批量订单引擎
+
+把零散的 place_order / cancel_order / amend_order 调用在一个很短的时间窗口内
+收集起来，按 (操作类型, 产品类型) 分组并打包成最多20个订单的批量请求，
+再把批量响应中每个订单的结果分发回各自的 Future。
+
+批量请求按订单数量计入 BATCH_ORDERS 等接口的 300次/2s 限速
+（由客户端内置的限速管理器自动处理）。
+
+使用示例:
+    from okxx import RestAPI
+    from okxx.batcher import OrderBatcher
+
+    with RestAPI(api_key='...', ...) as api, OrderBatcher(api.trade) as batcher:
+        futures = [
+            batcher.place_order(instId='BTC-USDT', tdMode='cash', side='buy',
+                                ordType='limit', sz='0.01', px=str(30000 - i))
+            for i in range(100)
+        ]
+        results = [f.result() for f in futures]
+"""
+
+import asyncio
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from okxx import utils
+from okxx.exceptions import OkxAPIException, OkxBatchOrderException
+
+PLACE = "place"
+CANCEL = "cancel"
+AMEND = "amend"
+
+# OKX 批量接口单次最多支持20个订单
+MAX_BATCH_SIZE = 20
+
+_BATCH_METHODS = {
+    PLACE: "place_multiple_orders",
+    CANCEL: "cancel_multiple_orders",
+    AMEND: "amend_multiple_orders",
+}
+
+
+def _order_params(required: Dict[str, Any], optional: Dict[str, Any]) -> Dict[str, Any]:
+    """合并必填参数与非空的可选参数。"""
+    params = dict(required)
+    for key, value in optional.items():
+        if value is not None:
+            params[key] = value
+    return params
+
+
+def _partial_failure_data(e: OkxAPIException) -> Optional[List[Dict]]:
+    """
+    批量接口在全部失败(code='1')或部分成功(code='2')时仍会返回逐单结果，
+    此时提取 data 以便按订单分发；其他错误返回 None。
+    """
+    if e.code not in ("1", "2"):
+        return None
+    try:
+        data = e.response.json().get("data")
+    except ValueError:
+        return None
+    return data if isinstance(data, list) else None
+
+
+def _fail_all(futures: List, exc: BaseException):
+    for fut in futures:
+        if not fut.done():
+            fut.set_exception(exc)
+
+
+def _fan_out(futures: List, data: Any):
+    """把批量响应按顺序分发给每个订单的 Future。"""
+    if not isinstance(data, list) or len(data) != len(futures):
+        _fail_all(
+            futures,
+            OkxBatchOrderException("N/A", f"Unexpected batch response: {data}", data),
+        )
+        return
+    for fut, item in zip(futures, data):
+        if fut.done():
+            continue
+        if item.get("sCode", "0") == "0":
+            # 与单个下单接口的返回形式保持一致
+            fut.set_result([item])
+        else:
+            fut.set_exception(
+                OkxBatchOrderException(item.get("sCode"), item.get("sMsg", ""), item)
+            )
+
+
+def _chunk(
+    pending: Dict[Tuple[str, str], List[Tuple[Dict, Any]]], max_batch_size: int
+) -> List[Tuple[str, List[Dict], List[Any]]]:
+    """把各分组拆分成不超过 max_batch_size 的批次。"""
+    batches = []
+    for (op, _inst_type), entries in pending.items():
+        for i in range(0, len(entries), max_batch_size):
+            chunk = entries[i : i + max_batch_size]
+            batches.append((op, [p for p, _ in chunk], [f for _, f in chunk]))
+    return batches
+
+
+# ==============================================================================
+# 同步版本 (Sync Version)
+# ==============================================================================
+
+
+class OrderBatcher:
+    """
+    同步批量订单引擎。
+    所有提交方法立即返回 concurrent.futures.Future，调用 result() 获取该订单的结果。
+    """
+
+    def __init__(
+        self,
+        trade_api,
+        window: float = 0.005,
+        max_batch_size: int = MAX_BATCH_SIZE,
+        max_workers: int = 4,
+    ):
+        """
+        :param trade_api: TradeAPI 实例（例如 RestAPI.trade）。
+        :param window: 收集窗口（秒），从窗口内第一个订单到达时开始计时。
+        :param max_batch_size: 单个批量请求的最大订单数，不能超过20。
+        :param max_workers: 并发发送批量请求的线程数。
+        """
+        if not 0 < max_batch_size <= MAX_BATCH_SIZE:
+            raise ValueError(f"max_batch_size must be between 1 and {MAX_BATCH_SIZE}.")
+
+        self._trade_api = trade_api
+        self.window = window
+        self.max_batch_size = max_batch_size
+
+        self._pending: Dict[Tuple[str, str], List[Tuple[Dict, Future]]] = defaultdict(
+            list
+        )
+        self._window_start: Optional[float] = None
+        self._closed = False
+        self._cond = threading.Condition()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="okx-batcher"
+        )
+        self._thread = threading.Thread(
+            target=self._run, name="okx-order-batcher", daemon=True
+        )
+        self._thread.start()
+
+    def place_order(
+        self, instId: str, tdMode: str, side: str, ordType: str, sz: str, **kwargs
+    ) -> Future:
+        """提交下单意图，参数与 TradeAPI.place_order 相同。"""
+        required = {
+            "instId": instId,
+            "tdMode": tdMode,
+            "side": side,
+            "ordType": ordType,
+            "sz": sz,
+        }
+        return self._submit(PLACE, _order_params(required, kwargs))
+
+    def cancel_order(
+        self, instId: str, ordId: Optional[str] = None, clOrdId: Optional[str] = None
+    ) -> Future:
+        """提交撤单意图，参数与 TradeAPI.cancel_order 相同。"""
+        params = _order_params({"instId": instId}, {"ordId": ordId, "clOrdId": clOrdId})
+        return self._submit(CANCEL, params)
+
+    def amend_order(self, instId: str, **kwargs) -> Future:
+        """提交改单意图，参数与 TradeAPI.amend_order 相同。"""
+        return self._submit(AMEND, _order_params({"instId": instId}, kwargs))
+
+    def _submit(self, op: str, params: Dict) -> Future:
+        fut: Future = Future()
+        key = (op, utils.infer_inst_type(params["instId"]))
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("OrderBatcher is closed.")
+            self._pending[key].append((params, fut))
+            if self._window_start is None:
+                self._window_start = time.monotonic()
+            self._cond.notify()
+        return fut
+
+    def flush(self):
+        """立即发送所有已收集的订单，不再等待窗口结束。"""
+        with self._cond:
+            if self._window_start is not None:
+                self._window_start = time.monotonic() - self.window
+                self._cond.notify()
+
+    def _has_full_group(self) -> bool:
+        return any(
+            len(entries) >= self.max_batch_size for entries in self._pending.values()
+        )
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if not self._pending:
+                    return  # 已关闭且没有待发送的订单
+                # 在窗口内继续收集，任一分组攒满一个批次时提前发送
+                while not self._closed and not self._has_full_group():
+                    remaining = self._window_start + self.window - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batches = _chunk(self._pending, self.max_batch_size)
+                self._pending = defaultdict(list)
+                self._window_start = None
+
+            for op, orders, futures in batches:
+                self._executor.submit(self._send, op, orders, futures)
+
+    def _send(self, op: str, orders: List[Dict], futures: List[Future]):
+        try:
+            data = getattr(self._trade_api, _BATCH_METHODS[op])(orders)
+        except OkxAPIException as e:
+            data = _partial_failure_data(e)
+            if data is None:
+                _fail_all(futures, e)
+                return
+        except Exception as e:
+            logger.error(f"Batch {op} request with {len(orders)} orders failed: {e}")
+            _fail_all(futures, e)
+            return
+        _fan_out(futures, data)
+
+    def close(self):
+        """发送剩余订单并停止后台线程。"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join()
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self):
+        """上下文管理器支持"""
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """自动资源清理"""
+        self.close()
+
+
+# ==============================================================================
+# 异步版本 (Async Version)
+# ==============================================================================
+
+
+class AsyncOrderBatcher:
+    """
+    异步批量订单引擎。
+    提交方法是协程，await 后直接得到该订单的结果，多个并发调用会被合并发送。
+    """
+
+    def __init__(
+        self, trade_api, window: float = 0.005, max_batch_size: int = MAX_BATCH_SIZE
+    ):
+        """
+        :param trade_api: AsyncTradeAPI 实例（例如 AsyncRestAPI.trade）。
+        :param window: 收集窗口（秒），从窗口内第一个订单到达时开始计时。
+        :param max_batch_size: 单个批量请求的最大订单数，不能超过20。
+        """
+        if not 0 < max_batch_size <= MAX_BATCH_SIZE:
+            raise ValueError(f"max_batch_size must be between 1 and {MAX_BATCH_SIZE}.")
+
+        self._trade_api = trade_api
+        self.window = window
+        self.max_batch_size = max_batch_size
+
+        self._pending: Dict[
+            Tuple[str, str], List[Tuple[Dict, asyncio.Future]]
+        ] = defaultdict(list)
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._tasks: set = set()
+        self._closed = False
+
+    async def place_order(
+        self, instId: str, tdMode: str, side: str, ordType: str, sz: str, **kwargs
+    ) -> List[Dict[str, Any]]:
+        """下单，参数与 AsyncTradeAPI.place_order 相同。"""
+        required = {
+            "instId": instId,
+            "tdMode": tdMode,
+            "side": side,
+            "ordType": ordType,
+            "sz": sz,
+        }
+        return await self._submit(PLACE, _order_params(required, kwargs))
+
+    async def cancel_order(
+        self, instId: str, ordId: Optional[str] = None, clOrdId: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """撤单，参数与 AsyncTradeAPI.cancel_order 相同。"""
+        params = _order_params({"instId": instId}, {"ordId": ordId, "clOrdId": clOrdId})
+        return await self._submit(CANCEL, params)
+
+    async def amend_order(self, instId: str, **kwargs) -> List[Dict[str, Any]]:
+        """改单，参数与 AsyncTradeAPI.amend_order 相同。"""
+        return await self._submit(AMEND, _order_params({"instId": instId}, kwargs))
+
+    def _submit(self, op: str, params: Dict) -> asyncio.Future:
+        if self._closed:
+            raise RuntimeError("AsyncOrderBatcher is closed.")
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        entries = self._pending[(op, utils.infer_inst_type(params["instId"]))]
+        entries.append((params, fut))
+
+        if len(entries) >= self.max_batch_size:
+            self.flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.window, self.flush)
+        return fut
+
+    def flush(self):
+        """立即发送所有已收集的订单，不再等待窗口结束。"""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if not self._pending:
+            return
+        batches = _chunk(self._pending, self.max_batch_size)
+        self._pending = defaultdict(list)
+        for op, orders, futures in batches:
+            task = asyncio.create_task(self._send(op, orders, futures))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, op: str, orders: List[Dict], futures: List[asyncio.Future]):
+        try:
+            data = await getattr(self._trade_api, _BATCH_METHODS[op])(orders)
+        except OkxAPIException as e:
+            data = _partial_failure_data(e)
+            if data is None:
+                _fail_all(futures, e)
+                return
+        except Exception as e:
+            logger.error(f"Batch {op} request with {len(orders)} orders failed: {e}")
+            _fail_all(futures, e)
+            return
+        _fan_out(futures, data)
+
+    async def aclose(self):
+        """发送剩余订单并等待所有在途的批量请求完成。"""
+        self._closed = True
+        self.flush()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def __aenter__(self):
+        """异步上下文管理器支持"""
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """异步资源清理"""
+        await self.aclose()
@@ -0,0 +1,223 @@
+# okx/cache.py
+"""
+慢变化接口的响应缓存
+
+产品信息、仓位档位、标的指数、币种列表、汇率等接口的数据很少变化，但经常被反复调用。
+ResponseCache 挂在客户端的 _request 之前：
+- 按接口路径配置 TTL，未配置的接口不缓存；
+- 条目数量有上限，超出后按最近最少使用（LRU）淘汰；
+- 可选持久化到磁盘，进程重启后直接使用未过期的缓存；
+- 默认只缓存无需签名的请求和行情/公共数据接口的 GET 请求；
+- 统计命中/未命中次数，可以在单次调用中绕过缓存。
+
+使用示例:
+    from okxx.cache import ResponseCache, bypass_cache
+
+    cache = ResponseCache(persist_path='/var/tmp/okxx-cache.json')
+    api = RestAPI(cache=cache)
+    api.public_data.get_instruments(instType='SWAP')   # 请求服务器
+    api.public_data.get_instruments(instType='SWAP')   # 命中缓存
+
+    with bypass_cache():
+        api.public_data.get_instruments(instType='SWAP')   # 强制刷新
+"""
+
+import contextvars
+import functools
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from contextlib import contextmanager
+from typing import Any, Dict, Optional, Tuple
+
+from loguru import logger
+
+from okxx import codec
+from okxx import consts as c
+from okxx import utils
+
+# 接口路径 -> 缓存时间（秒）
+DEFAULT_TTLS: Dict[str, float] = {
+    c.INSTRUMENT_INFO: 300,
+    c.TIER: 3600,
+    c.UNDERLYING: 3600,
+    c.CURRENCY_INFO: 3600,
+    c.GET_CURRENCIES: 3600,
+    c.EXCHANGE_RATE: 300,
+    c.INDEX_COMPONENTS: 600,
+    c.DISCOUNT_INTEREST_INFO: 3600,
+}
+
+_bypass_var: contextvars.ContextVar = contextvars.ContextVar(
+    "okxx_bypass_cache", default=False
+)
+
+
+@contextmanager
+def bypass_cache():
+    """在当前上下文中跳过缓存读取（请求结果仍会写入缓存）。"""
+    token = _bypass_var.set(True)
+    try:
+        yield
+    finally:
+        _bypass_var.reset(token)
+
+
+@functools.lru_cache(maxsize=64)
+def _key_owner(api_key: str) -> str:
+    """
+    私有接口缓存键的前缀：API Key 的 SHA-256 摘要。缓存会持久化到磁盘，
+    不能把 API Key 本身写进去。
+    """
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()
+
+
+def _key_path(key: str) -> str:
+    """缓存键中的接口路径：去掉私有接口的 API Key 摘要前缀和查询字符串。"""
+    if not key.startswith("/"):
+        key = key.partition("|")[2]
+    return key.partition("?")[0]
+
+
+class ResponseCache:
+    """
+    线程安全的 TTL + LRU 响应缓存，同步和异步客户端均可使用。
+    """
+
+    def __init__(
+        self,
+        ttls: Optional[Dict[str, float]] = None,
+        max_entries: int = 1024,
+        persist_path: Optional[str] = None,
+        include_private: bool = False,
+    ):
+        """
+        :param ttls: 接口路径 -> TTL（秒），默认使用 DEFAULT_TTLS。
+        :param max_entries: 最多缓存的响应数量。
+        :param persist_path: （可选）持久化文件路径，创建时加载，save() / close() 时写入。
+        :param include_private: 是否缓存需要签名的私有接口（例如资金账户币种列表），
+                                缓存键中包含 API Key 的 SHA-256 摘要（不包含 API Key 本身）。
+        """
+        self.ttls = dict(DEFAULT_TTLS if ttls is None else ttls)
+        self.max_entries = max_entries
+        self.persist_path = persist_path
+        self.include_private = include_private
+
+        # 键 -> (过期时间（墙上时钟）, 数据)
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._path_stats: Dict[str, Dict[str, int]] = defaultdict(
+            lambda: {"hits": 0, "misses": 0}
+        )
+        if persist_path:
+            self.load()
+
+    def key_for(
+        self, method: str, request_path: str, params: Dict[str, Any], api_key: str
+    ) -> Optional[str]:
+        """返回请求的缓存键，不可缓存的请求返回 None。"""
+        if request_path not in self.ttls:
+            return None
+        key = utils.single_flight_key(method, request_path, params, api_key)
+        if key is not None:
+            return key
+        if self.include_private and method == c.GET:
+            return _key_owner(api_key) + "|" + request_path + utils.parse_params_to_str(params)
+        return None
+
+    def get(self, key: str, request_path: str) -> Tuple[bool, Any]:
+        """
+        查询缓存。
+        :return: (是否命中, 数据)
+        """
+        if _bypass_var.get():
+            return False, None
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                self._path_stats[request_path]["hits"] += 1
+                return True, entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            self._path_stats[request_path]["misses"] += 1
+            return False, None
+
+    def set(self, key: str, request_path: str, value: Any):
+        expires = time.time() + self.ttls[request_path]
+        with self._lock:
+            self._entries[key] = (expires, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, request_path: Optional[str] = None):
+        """清除缓存，指定 request_path 时只清除该接口的条目。"""
+        with self._lock:
+            if request_path is None:
+                self._entries.clear()
+                return
+            for key in [k for k in self._entries if _key_path(k) == request_path]:
+                del self._entries[key]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "paths": {p: dict(s) for p, s in self._path_stats.items()},
+            }
+
+    def load(self):
+        """从持久化文件加载未过期的条目。"""
+        try:
+            with open(self.persist_path, "rb") as f:
+                stored = codec.loads(f.read())
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable response cache {self.persist_path}: {e}")
+            return
+        now = time.time()
+        with self._lock:
+            for key, (expires, value) in stored.items():
+                if expires > now:
+                    self._entries[key] = (expires, value)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def save(self):
+        """把未过期的条目原子地写入持久化文件。"""
+        if not self.persist_path:
+            return
+        now = time.time()
+        with self._lock:
+            stored = {
+                key: [expires, value]
+                for key, (expires, value) in self._entries.items()
+                if expires > now
+            }
+        directory = os.path.dirname(os.path.abspath(self.persist_path))
+        fd, tmp = tempfile.mkstemp(dir=directory, prefix=".okxx-cache-")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(codec.dumps(stored))
+            os.replace(tmp, self.persist_path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def close(self):
+        self.save()
@@ -0,0 +1,276 @@
+# okx/candles.py
+"""
+列式K线获取器
+
+MarketAPI 的K线接口每次返回一页字符串列表。本模块自动使用 after 游标向过去翻页，
+把每一页整体转换为 NumPy 数组后写入预分配的列中，最终得到按时间升序排列的 CandleFrame：
+    ts: int64 (毫秒)，open/high/low/close/volume: float64
+
+需要安装 numpy（可选依赖）:
+    pip install numpy
+
+使用示例:
+    from okxx.candles import fetch_candles
+
+    frame = fetch_candles(api.market_data, 'BTC-USDT', bar='1m',
+                          start=1704067200000, end=1735689600000)
+    print(len(frame), frame.close[-1])
+"""
+
+import re
+from typing import Dict, List, Optional, Sequence
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - 可选依赖
+    np = None
+
+# kind -> (MarketAPI方法名, 单页最大条数, 是否包含成交量列)
+CANDLE_ENDPOINTS: Dict[str, tuple] = {
+    "candles": ("get_candlesticks", 300, True),
+    "history": ("get_history_candlesticks", 100, True),
+    "index": ("get_index_candlesticks", 100, False),
+    "mark": ("get_mark_price_candlesticks", 100, False),
+}
+
+_BAR_UNITS_MS = {
+    "s": 1_000,
+    "m": 60_000,
+    "H": 3_600_000,
+    "D": 86_400_000,
+    "W": 7 * 86_400_000,
+}
+_BAR_RE = re.compile(r"^(\d+)([smHDW])(utc)?$")
+
+
+def bar_to_ms(bar: str) -> int:
+    """
+    把K线周期转换为毫秒数，例如 '1m' -> 60000，'4H' -> 14400000，'1Dutc' -> 86400000。
+    月线/年线的长度不固定，不支持。
+    """
+    match = _BAR_RE.match(bar)
+    if not match:
+        raise ValueError(f"Unsupported bar: {bar}")
+    return int(match.group(1)) * _BAR_UNITS_MS[match.group(2)]
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError(
+            "CandleFrame requires numpy. Install it with 'pip install numpy'."
+        )
+
+
+class CandleFrame:
+    """按时间升序排列的列式K线数据。"""
+
+    __slots__ = ("ts", "open", "high", "low", "close", "volume")
+
+    def __init__(self, ts, open, high, low, close, volume):
+        self.ts = ts
+        self.open = open
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = volume
+
+    def __len__(self) -> int:
+        return len(self.ts)
+
+    def __repr__(self) -> str:
+        if not len(self):
+            return "CandleFrame(empty)"
+        return f"CandleFrame(rows={len(self)}, first_ts={self.ts[0]}, last_ts={self.ts[-1]})"
+
+    @classmethod
+    def from_rows(cls, rows: Sequence[Sequence[str]], has_volume: bool = True):
+        """把一页原始K线数据（任意顺序）转换为 CandleFrame。"""
+        builder = _CandleBuilder(has_volume=has_volume)
+        builder.add_page(rows)
+        return builder.build()
+
+
+class _CandleBuilder:
+    """
+    把逐页到达的K线（新 -> 旧）写入预分配的列。
+    每一页整体由 NumPy 完成字符串到数值的转换，不产生逐行的 Python 对象。
+    """
+
+    def __init__(
+        self,
+        has_volume: bool = True,
+        start: Optional[int] = None,
+        capacity: int = 1024,
+    ):
+        _require_numpy()
+        self.has_volume = has_volume
+        self.start = start
+        self._size = 0
+        self._oldest: Optional[int] = None
+        self._ts = np.empty(capacity, dtype=np.int64)
+        # 列顺序: open, high, low, close, volume
+        self._values = np.empty((capacity, 5), dtype=np.float64)
+
+    def _reserve(self, extra: int):
+        needed = self._size + extra
+        if needed <= len(self._ts):
+            return
+        capacity = max(needed, len(self._ts) * 2)
+        ts = np.empty(capacity, dtype=np.int64)
+        ts[: self._size] = self._ts[: self._size]
+        values = np.empty((capacity, 5), dtype=np.float64)
+        values[: self._size] = self._values[: self._size]
+        self._ts = ts
+        self._values = values
+
+    def add_page(self, rows: Sequence[Sequence[str]]) -> bool:
+        """
+        写入一页数据。
+        :return: 是否还需要继续向过去翻页。
+        """
+        if not rows:
+            return False
+        ncols = 6 if self.has_volume else 5
+        block = np.array(rows, dtype=np.str_)[:, :ncols]
+        ts = block[:, 0].astype(np.int64)
+        done = False
+        if self.start is not None:
+            keep = ts >= self.start
+            if not keep.all():
+                done = True
+                block = block[keep]
+                ts = ts[keep]
+        n = len(ts)
+        if n:
+            page_oldest = int(ts.min())
+            if self._oldest is None or page_oldest < self._oldest:
+                self._oldest = page_oldest
+        self._reserve(n)
+        self._ts[self._size : self._size + n] = ts
+        values = self._values[self._size : self._size + n]
+        values[:, :4] = block[:, 1:5].astype(np.float64)
+        if self.has_volume:
+            values[:, 4] = block[:, 5].astype(np.float64)
+        else:
+            values[:, 4] = np.nan
+        self._size += n
+        return not done
+
+    @property
+    def oldest_ts(self) -> Optional[int]:
+        return self._oldest
+
+    def build(self) -> CandleFrame:
+        size = self._size
+        order = np.argsort(self._ts[:size], kind="stable")
+        ts = self._ts[:size][order]
+        # 分页之间可能有重叠，按时间戳去重
+        if size:
+            unique = np.empty(size, dtype=bool)
+            unique[0] = True
+            np.not_equal(ts[1:], ts[:-1], out=unique[1:])
+            order = order[unique]
+            ts = ts[unique]
+        values = self._values[:size][order]
+        return CandleFrame(
+            ts,
+            np.ascontiguousarray(values[:, 0]),
+            np.ascontiguousarray(values[:, 1]),
+            np.ascontiguousarray(values[:, 2]),
+            np.ascontiguousarray(values[:, 3]),
+            np.ascontiguousarray(values[:, 4]),
+        )
+
+
+def _page_params(
+    inst_id: str, bar: str, after: Optional[int], limit: int
+) -> Dict[str, str]:
+    params = {"instId": inst_id, "bar": bar, "limit": str(limit)}
+    if after is not None:
+        params["after"] = str(after)
+    return params
+
+
+def _prepare(kind: str, bar: str, start: Optional[int], end: Optional[int]):
+    if kind not in CANDLE_ENDPOINTS:
+        raise ValueError(f"Unknown candle endpoint kind: {kind}")
+    method_name, limit, has_volume = CANDLE_ENDPOINTS[kind]
+    capacity = 1024
+    if start is not None and end is not None:
+        capacity = max((end - start) // bar_to_ms(bar) + 1, 1)
+    builder = _CandleBuilder(has_volume=has_volume, start=start, capacity=capacity)
+    return method_name, limit, builder
+
+
+def fetch_candles(
+    market_api,
+    instId: str,
+    bar: str = "1m",
+    start: Optional[int] = None,
+    end: Optional[int] = None,
+    kind: str = "history",
+    max_pages: Optional[int] = None,
+) -> CandleFrame:
+    """
+    自动向过去翻页获取 [start, end) 区间内的K线。
+
+    :param market_api: MarketAPI 实例（例如 RestAPI.market_data）。
+    :param instId: 产品ID（指数/标记价格K线为指数ID或产品ID）。
+    :param bar: K线周期。
+    :param start: 起始时间戳（毫秒，含），为 None 时一直翻到没有数据为止。
+    :param end: 结束时间戳（毫秒，不含），为 None 时从最新一根开始。
+    :param kind: 'candles' / 'history' / 'index' / 'mark'。
+    :param max_pages: （可选）最多请求的页数。
+    """
+    method_name, limit, builder = _prepare(kind, bar, start, end)
+    method = getattr(market_api, method_name)
+    after = end
+    pages = 0
+    while max_pages is None or pages < max_pages:
+        rows = method(**_page_params(instId, bar, after, limit))
+        pages += 1
+        if not builder.add_page(rows):
+            break
+        after = builder.oldest_ts
+    return builder.build()
+
+
+async def async_fetch_candles(
+    market_api,
+    instId: str,
+    bar: str = "1m",
+    start: Optional[int] = None,
+    end: Optional[int] = None,
+    kind: str = "history",
+    max_pages: Optional[int] = None,
+) -> CandleFrame:
+    """fetch_candles 的异步版本，market_api 为 AsyncMarketAPI 实例。"""
+    method_name, limit, builder = _prepare(kind, bar, start, end)
+    method = getattr(market_api, method_name)
+    after = end
+    pages = 0
+    while max_pages is None or pages < max_pages:
+        rows = await method(**_page_params(instId, bar, after, limit))
+        pages += 1
+        if not builder.add_page(rows):
+            break
+        after = builder.oldest_ts
+    return builder.build()
+
+
+def merge_frames(frames: List[CandleFrame]) -> CandleFrame:
+    """合并多个 CandleFrame，按时间排序并去重。"""
+    _require_numpy()
+    builder = _CandleBuilder(capacity=max(sum(len(f) for f in frames), 1))
+    for frame in frames:
+        n = len(frame)
+        builder._reserve(n)
+        builder._ts[builder._size : builder._size + n] = frame.ts
+        values = builder._values[builder._size : builder._size + n]
+        values[:, 0] = frame.open
+        values[:, 1] = frame.high
+        values[:, 2] = frame.low
+        values[:, 3] = frame.close
+        values[:, 4] = frame.volume
+        builder._size += n
+    return builder.build()
@@ -0,0 +1,191 @@
+# okx/clock.py
+"""
+服务器时钟同步
+
+OKX 要求签名请求的时间戳与服务器时间相差不超过30秒。与其在每次签名前都请求
+一次 /api/v5/public/time，不如在共享的HTTP客户端上周期性地采样服务器时间，
+用类似 NTP 的方式估计本地时钟相对服务器的偏移量，签名时直接在本地用
+time.time() + offset 生成时间戳。
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import Deque, Optional, Tuple
+
+import httpx
+from loguru import logger
+
+from okxx import consts as c
+from okxx import utils
+
+
+class ClockOffsetEstimator:
+    """
+    基于最小往返时延(min-RTT)样本的时钟偏移估计器。
+
+    每个样本记录请求发出时刻 t0、服务器时间 ts 和收到响应时刻 t1，
+    偏移量按 ts - (t0 + t1) / 2 计算。往返时延越小，服务器时间落在
+    [t0, t1] 中点的误差越小，因此只采信窗口内RTT最小的样本。
+    """
+
+    def __init__(self, window: int = 8, max_rtt: float = 2.0):
+        """
+        :param window: 保留的最近样本数量。
+        :param max_rtt: 往返时延超过该值(秒)的样本直接丢弃。
+        """
+        if window <= 0:
+            raise ValueError("Window must be positive.")
+
+        self.max_rtt = max_rtt
+        self._samples: Deque[Tuple[float, float]] = deque(maxlen=window)  # (rtt, offset)
+        self._offset = 0.0
+
+    def add_sample(self, t0: float, server_ts: float, t1: float) -> bool:
+        """
+        添加一个样本。
+
+        :param t0: 请求发出时的本地时间(秒)。
+        :param server_ts: 服务器返回的时间(秒)。
+        :param t1: 收到响应时的本地时间(秒)。
+        :return: 样本是否被采纳。
+        """
+        rtt = t1 - t0
+        if rtt < 0 or rtt > self.max_rtt:
+            logger.debug(f"Discarding clock sample with rtt={rtt:.4f}s")
+            return False
+        self._samples.append((rtt, server_ts - (t0 + t1) / 2))
+        self._offset = min(self._samples)[1]
+        return True
+
+    @property
+    def offset(self) -> float:
+        """当前估计的偏移量(秒)，服务器时间 = 本地时间 + offset。"""
+        return self._offset
+
+    @property
+    def rtt(self) -> Optional[float]:
+        """当前采信样本的往返时延(秒)，尚无样本时为 None。"""
+        if not self._samples:
+            return None
+        return min(self._samples)[0]
+
+    @property
+    def synced(self) -> bool:
+        """是否已经有可用的样本。"""
+        return bool(self._samples)
+
+
+class AsyncClockSync:
+    """
+    异步的服务器时钟同步器。
+
+    复用 AsyncOkxClient 的 httpx.AsyncClient 和限速管理器，在后台任务中
+    周期性地刷新偏移量；timestamp() 完全在本地计算，不产生网络请求。
+    """
+
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        limiter_manager,
+        api_key: str,
+        refresh_interval: float = 60.0,
+        samples_per_refresh: int = 3,
+    ):
+        """
+        :param client: 共享的 httpx.AsyncClient (base_url 已设置)。
+        :param limiter_manager: 共享的 AsyncRateLimiterManager，采样请求同样受 SYSTEM_TIME 限速。
+        :param api_key: 用于构建限速键。
+        :param refresh_interval: 后台刷新间隔(秒)。
+        :param samples_per_refresh: 每次刷新采集的样本数。
+        """
+        self.client = client
+        self.limiter_manager = limiter_manager
+        self.api_key = api_key
+        self.refresh_interval = refresh_interval
+        self.samples_per_refresh = samples_per_refresh
+
+        self.estimator = ClockOffsetEstimator()
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._start_lock: Optional[asyncio.Lock] = None
+
+    @property
+    def offset(self) -> float:
+        return self.estimator.offset
+
+    def now(self) -> float:
+        """估计的服务器当前时间(秒)。"""
+        return time.time() + self.estimator.offset
+
+    def timestamp(self) -> str:
+        """生成符合OKX API要求的ISO 8601时间戳，无网络开销。"""
+        return utils.format_timestamp(self.now())
+
+    async def _sample(self) -> bool:
+        """请求一次服务器时间并加入估计器。"""
+        await self.limiter_manager.acquire(c.SYSTEM_TIME, {}, self.api_key)
+        try:
+            t0 = time.time()
+            response = await self.client.get(c.SYSTEM_TIME, timeout=5)
+            t1 = time.time()
+            response.raise_for_status()
+            data = response.json()
+        except (httpx.HTTPError, ValueError) as e:
+            logger.warning(f"Failed to sample server time: {e}")
+            return False
+
+        if data.get("code") != "0":
+            logger.warning(f"Failed to sample server time, API response: {data}")
+            return False
+        server_ts = float(data["data"][0]["ts"]) / 1000.0
+        return self.estimator.add_sample(t0, server_ts, t1)
+
+    async def sync(self) -> bool:
+        """采集一轮样本，返回是否至少有一个样本被采纳。"""
+        accepted = False
+        for _ in range(self.samples_per_refresh):
+            if await self._sample():
+                accepted = True
+        if accepted:
+            logger.debug(
+                f"Server clock offset: {self.estimator.offset * 1000:.1f}ms "
+                f"(rtt={self.estimator.rtt * 1000:.1f}ms)"
+            )
+        return accepted
+
+    async def ensure_started(self):
+        """
+        确保已完成首次同步并启动后台刷新任务。
+        首次同步失败时偏移量保持为0（即回退到本地时间），由后台任务继续重试。
+        """
+        if self._refresh_task is not None:
+            return
+        if self._start_lock is None:
+            self._start_lock = asyncio.Lock()
+        async with self._start_lock:
+            if self._refresh_task is not None:
+                return
+            if not await self.sync():
+                logger.warning("无法获取服务器时间，暂时使用本地UTC时间生成时间戳。")
+            self._refresh_task = asyncio.create_task(self._refresh_loop())
+
+    async def _refresh_loop(self):
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                await self.sync()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.exception(f"Unexpected error while syncing server clock: {e}")
+
+    async def stop(self):
+        """停止后台刷新任务。"""
+        task = self._refresh_task
+        self._refresh_task = None
+        if task and not task.done():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
@@ -0,0 +1,100 @@
+# okx/codec.py
+"""
+JSON编解码层
+
+REST 请求体、响应以及 WebSocket 消息统一通过本模块编解码。
+安装了 orjson 或 msgspec 时自动使用（优先 orjson），否则回退到标准库 json。
+
+所有后端都输出语义等价的紧凑格式（无多余空格、非ASCII字符按UTF-8原样输出），
+但并不保证逐字节一致，已知差异：
+- 浮点数的文本形式可能不同，例如 1e-05 在 orjson 下编码为 0.00001；
+- NaN / Infinity：标准库输出 NaN / Infinity（并非合法JSON），orjson 输出 null，msgspec 抛出异常；
+- 非 str 类型的字典键：标准库会转换为字符串，orjson / msgspec 抛出 TypeError。
+请求签名使用的是编码后的请求体本身，因此不受后端影响；但若需要与其他程序逐字节比较，
+请求参数中的数值应使用字符串（OKX 接口本身也要求如此）。
+
+调用方应通过模块属性访问 codec.dumps / codec.loads（而不是 from okxx.codec import dumps），
+这样 set_backend() 可以在运行时生效。
+"""
+
+import json
+from typing import Any, Optional, Union
+
+from loguru import logger
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - 可选依赖
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:  # pragma: no cover - 可选依赖
+    msgspec = None
+
+
+def _std_dumps(obj: Any) -> str:
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False)
+
+
+def _std_loads(data: Union[bytes, str]) -> Any:
+    return json.loads(data)
+
+
+def _orjson_dumps(obj: Any) -> str:
+    return orjson.dumps(obj).decode("utf-8")
+
+
+def _orjson_loads(data: Union[bytes, str]) -> Any:
+    return orjson.loads(data)
+
+
+if msgspec is not None:
+    _msgspec_encoder = msgspec.json.Encoder()
+    _msgspec_decoder = msgspec.json.Decoder()
+
+    def _msgspec_dumps(obj: Any) -> str:
+        return _msgspec_encoder.encode(obj).decode("utf-8")
+
+    def _msgspec_loads(data: Union[bytes, str]) -> Any:
+        try:
+            return _msgspec_decoder.decode(data)
+        except msgspec.DecodeError as e:
+            # 统一抛出标准库的异常类型，调用方只需捕获 json.JSONDecodeError
+            doc = data if isinstance(data, str) else data.decode("utf-8", "replace")
+            raise json.JSONDecodeError(str(e), doc, 0) from e
+
+
+_BACKENDS = {"json": (_std_dumps, _std_loads)}
+if msgspec is not None:
+    _BACKENDS["msgspec"] = (_msgspec_dumps, _msgspec_loads)
+if orjson is not None:
+    _BACKENDS["orjson"] = (_orjson_dumps, _orjson_loads)
+
+_backend = "json"
+dumps = _std_dumps
+loads = _std_loads
+
+
+def set_backend(name: Optional[str] = None):
+    """
+    切换编解码后端。
+
+    :param name: 'orjson' / 'msgspec' / 'json'；为 None 时自动选择最快的可用后端。
+    """
+    global _backend, dumps, loads
+    if name is None:
+        name = next(n for n in ("orjson", "msgspec", "json") if n in _BACKENDS)
+    if name not in _BACKENDS:
+        raise ValueError(f"JSON backend '{name}' is not available.")
+    _backend = name
+    dumps, loads = _BACKENDS[name]
+    logger.debug(f"JSON codec backend: {name}")
+
+
+def get_backend() -> str:
+    """返回当前使用的后端名称。"""
+    return _backend
+
+
+set_backend()
@@ -0,0 +1,231 @@
+# okx/connection.py
+"""
+HTTP 连接配置与保活
+
+httpx 默认只保留空闲连接 5 秒，空闲一段时间后的第一笔订单需要重新完成 TCP + TLS 握手
+（HTTP/2 还要加上 SETTINGS 交换），往返多出数十到数百毫秒。本模块提供：
+- 默认的连接池上限（httpx.Limits）和分阶段超时（httpx.Timeout：connect / read / write / pool）；
+- 预热：客户端创建后立即在后台建立连接；
+- 保活：连接空闲超过 interval 秒时，以最低优先级请求一次 /api/v5/public/time，
+  保证连接池中始终有可用的连接。有正常请求时不会额外发送保活请求。
+预热和保活都会产生网络请求和后台线程 / 任务，默认关闭，需要时通过 prewarm=True /
+keepalive_interval 开启（推荐 DEFAULT_KEEPALIVE_INTERVAL）。
+
+使用示例:
+    import httpx
+    from okxx import RestAPI
+
+    api = RestAPI(
+        limits=httpx.Limits(max_connections=20, keepalive_expiry=120),
+        timeout=httpx.Timeout(10.0, connect=3.0, pool=1.0),
+        prewarm=True,
+        keepalive_interval=15,
+    )
+"""
+
+import asyncio
+import threading
+import time
+from typing import Optional, Union
+
+import httpx
+from loguru import logger
+
+from okxx import consts as c
+from okxx.limiter import PRIORITY_BACKFILL, request_priority
+
+# 空闲连接保留时间必须大于保活间隔，否则连接会在下一次保活请求前被连接池关闭
+DEFAULT_LIMITS = httpx.Limits(
+    max_connections=100, max_keepalive_connections=20, keepalive_expiry=90.0
+)
+# 读取超时与原来的 30 秒保持一致；建立连接和等待连接池的时间应当短得多
+DEFAULT_TIMEOUT = httpx.Timeout(30.0, connect=5.0, pool=10.0)
+# 推荐的保活间隔（默认不保活）
+DEFAULT_KEEPALIVE_INTERVAL = 20.0
+
+KEEPALIVE_PATH = c.SYSTEM_TIME
+
+
+def as_timeout(value: Union[float, httpx.Timeout, None]) -> httpx.Timeout:
+    """把客户端的 timeout 参数（秒数 / httpx.Timeout / None）转换为 httpx.Timeout。"""
+    if value is None:
+        return DEFAULT_TIMEOUT
+    if isinstance(value, httpx.Timeout):
+        return value
+    return httpx.Timeout(value)
+
+
+def check_interval(interval: Optional[float], limits: httpx.Limits):
+    """保活间隔不小于空闲连接保留时间时记录警告。"""
+    expiry = limits.keepalive_expiry
+    if interval and expiry is not None and interval >= expiry:
+        logger.warning(
+            f"keepalive_interval={interval}s is not shorter than keepalive_expiry={expiry}s, "
+            "idle connections will be closed before they are pinged."
+        )
+
+
+class _KeepAliveBase:
+    def __init__(
+        self,
+        client,
+        limiter_manager,
+        api_key: str,
+        interval: Optional[float],
+        prewarm: bool = False,
+    ):
+        """
+        :param client: 共享的 httpx.Client / httpx.AsyncClient（base_url 已设置）。
+        :param limiter_manager: 共享的限速管理器，保活请求同样受 SYSTEM_TIME 限速。
+        :param api_key: 用于构建限速键。
+        :param interval: 空闲多少秒后发送保活请求，None 表示只预热、不保活。
+        :param prewarm: 启动时是否立即发送一次请求以建立连接。
+        """
+        self.client = client
+        self.prewarm = prewarm
+        self.limiter_manager = limiter_manager
+        self.api_key = api_key
+        self.interval = interval
+        self.last_used = 0.0
+        self.pings = 0
+        self.failures = 0
+
+    def touch(self):
+        """记录一次正常请求，连接在此之后的 interval 秒内不需要保活。"""
+        self.last_used = time.monotonic()
+
+    def _idle_for(self) -> float:
+        return time.monotonic() - self.last_used
+
+    def _record(self, ok: bool, error: Optional[Exception] = None):
+        if ok:
+            self.pings += 1
+            self.touch()
+        else:
+            self.failures += 1
+            logger.debug(f"Keepalive ping failed: {error}")
+
+
+class KeepAlive(_KeepAliveBase):
+    """同步客户端的预热 / 保活线程。"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def ping(self) -> bool:
+        """发送一次保活请求，返回是否成功。"""
+        try:
+            with request_priority(PRIORITY_BACKFILL):
+                self.limiter_manager.acquire(KEEPALIVE_PATH, {}, self.api_key)
+            self.client.get(KEEPALIVE_PATH).raise_for_status()
+        except (httpx.HTTPError, RuntimeError) as e:
+            # RuntimeError: 客户端已关闭
+            self._record(False, e)
+            return False
+        self._record(True)
+        return True
+
+    def start(self):
+        """在后台线程中预热连接，并在配置了 interval 时持续保活。"""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(
+            target=self._run, name="okxx-keepalive", daemon=True
+        )
+        self._thread.start()
+
+    def _safe_ping(self):
+        try:
+            self.ping()
+        except Exception as e:
+            self.failures += 1
+            logger.exception(f"Unexpected error in keepalive ping: {e}")
+
+    def _run(self):
+        if self.prewarm:
+            self._safe_ping()
+        if not self.interval:
+            return
+        delay = self.interval
+        while not self._stop.wait(delay):
+            delay = self.interval - self._idle_for()
+            if delay <= 0:
+                # 失败时同样等待一个完整间隔再重试
+                self._safe_ping()
+                delay = self.interval
+
+    def stop(self):
+        self._stop.set()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=1)
+
+
+class AsyncKeepAlive(_KeepAliveBase):
+    """异步客户端的预热 / 保活任务。"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._task: Optional[asyncio.Task] = None
+
+    async def ping(self) -> bool:
+        """发送一次保活请求，返回是否成功。"""
+        try:
+            with request_priority(PRIORITY_BACKFILL):
+                await self.limiter_manager.acquire(KEEPALIVE_PATH, {}, self.api_key)
+            response = await self.client.get(KEEPALIVE_PATH)
+            response.raise_for_status()
+        except (httpx.HTTPError, RuntimeError) as e:
+            # RuntimeError: 客户端已关闭
+            self._record(False, e)
+            return False
+        self._record(True)
+        return True
+
+    def start(self):
+        """
+        在当前事件循环中启动预热 / 保活任务；没有运行中的事件循环时（例如在同步代码中创建客户端）
+        不做任何事，由第一次请求调用 start() 时启动。
+        """
+        if self._task is not None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._task = loop.create_task(self._run())
+
+    async def _safe_ping(self):
+        try:
+            await self.ping()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.failures += 1
+            logger.exception(f"Unexpected error in keepalive ping: {e}")
+
+    async def _run(self):
+        if self.prewarm:
+            await self._safe_ping()
+        if not self.interval:
+            return
+        delay = self.interval
+        while True:
+            await asyncio.sleep(delay)
+            delay = self.interval - self._idle_for()
+            if delay <= 0:
+                # 失败时同样等待一个完整间隔再重试
+                await self._safe_ping()
+                delay = self.interval
+
+    async def stop(self):
+        task = self._task
+        self._task = None
+        if task and not task.done():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
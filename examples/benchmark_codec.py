@@ -0,0 +1,80 @@
+"""
+JSON编解码性能基准
+用典型的 tickers / books 推送消息和下单请求体，对比各个可用后端的解码与编码速度，
+并校验所有后端的编码输出逐字节一致。
+
+运行方式（需要已安装 okxx 包，orjson / msgspec 可选）:
+    python -m okxx.examples.benchmark_codec
+"""
+
+import time
+
+from okxx import codec
+
+TICKER_FRAME = (
+    '{"arg":{"channel":"tickers","instId":"BTC-USDT"},"data":[{"instType":"SPOT",'
+    '"instId":"BTC-USDT","last":"67012.3","lastSz":"0.00012","askPx":"67012.4",'
+    '"askSz":"0.84","bidPx":"67012.3","bidSz":"1.21","open24h":"66210.1",'
+    '"high24h":"67450","low24h":"65988.8","sodUtc0":"66530.2","sodUtc8":"66801.5",'
+    '"volCcy24h":"612345678.912","vol24h":"9231.55","ts":"1717000000123"}]}'
+)
+
+
+def _books_frame(depth: int = 400) -> str:
+    bids = ",".join(
+        f'["{67012.3 - i * 0.1:.1f}","{0.5 + i % 7 * 0.137:.3f}","0","{1 + i % 5}"]'
+        for i in range(depth)
+    )
+    asks = ",".join(
+        f'["{67012.4 + i * 0.1:.1f}","{0.4 + i % 9 * 0.111:.3f}","0","{1 + i % 4}"]'
+        for i in range(depth)
+    )
+    return (
+        '{"arg":{"channel":"books","instId":"BTC-USDT"},"action":"snapshot","data":[{'
+        f'"asks":[{asks}],"bids":[{bids}],"ts":"1717000000123","checksum":-855196043,'
+        '"prevSeqId":-1,"seqId":123456}]}'
+    )
+
+
+ORDER_BODY = {
+    "instId": "BTC-USDT",
+    "tdMode": "cash",
+    "side": "buy",
+    "ordType": "limit",
+    "sz": "0.01",
+    "px": "30000",
+    "tag": "测试",
+    "attachAlgoOrds": [{"tpTriggerPx": "31000", "tpOrdPx": "-1"}],
+}
+
+
+def _bench(fn, arg, n: int) -> float:
+    start = time.perf_counter()
+    for _ in range(n):
+        fn(arg)
+    return n / (time.perf_counter() - start)
+
+
+def main():
+    backends = [name for name in ("json", "msgspec", "orjson") if name in codec._BACKENDS]
+    payloads = [
+        ("ticker decode", TICKER_FRAME.encode("utf-8"), 100_000),
+        ("books decode", _books_frame().encode("utf-8"), 2_000),
+    ]
+
+    encoded = {}
+    for name in backends:
+        codec.set_backend(name)
+        encoded[name] = codec.dumps(ORDER_BODY)
+        print(f"[{name}]")
+        for label, payload, n in payloads:
+            print(f"  {label:<14}{_bench(codec.loads, payload, n):>14,.0f} msg/s")
+        print(f"  {'order encode':<14}{_bench(codec.dumps, ORDER_BODY, 200_000):>14,.0f} msg/s")
+
+    assert len(set(encoded.values())) == 1, f"Encoded output differs: {encoded}"
+    print(f"\nEncoded order body is identical across backends: {encoded[backends[0]]}")
+    codec.set_backend()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""
+连接预热 / 保活基准
+在本地启动一个 HTTP/2 (TLS + ALPN h2) 服务器模拟交易所，每个请求延迟 1 个 RTT，
+新连接上的第一个请求额外延迟 2 个 RTT（模拟远程 TCP + TLS 握手），对比：
+- 原有配置：不预热，httpx 默认连接池（空闲连接 5 秒后关闭）；
+- 新配置：创建时预热，空闲时保活（connection.DEFAULT_LIMITS / keepalive_interval）。
+分别测量创建客户端后第一个请求、空闲 IDLE 秒后第一个请求的延迟，以及服务器端建立的连接数。
+
+运行方式（需要已安装 okxx 包、h2 以及 openssl 命令行工具）:
+    python -m okxx.examples.benchmark_connection
+"""
+
+import asyncio
+import os
+import ssl
+import subprocess
+import tempfile
+import threading
+import time
+
+import h2.config
+import h2.connection
+import h2.events
+import httpx
+
+from okxx import RestAPI
+
+RTT = 0.02
+IDLE = 6.0
+KEEPALIVE_INTERVAL = 2.0
+BODY = b'{"code":"0","msg":"","data":[{"ts":"1700000000000"}]}'
+
+
+def make_certificate(directory: str):
+    cert = os.path.join(directory, "cert.pem")
+    key = os.path.join(directory, "key.pem")
+    subprocess.run(
+        [
+            "openssl", "req", "-x509", "-nodes", "-days", "1",
+            "-newkey", "ec", "-pkeyopt", "ec_paramgen_curve:prime256v1",
+            "-keyout", key, "-out", cert, "-subj", "/CN=localhost",
+            "-addext", "subjectAltName=IP:127.0.0.1,DNS:localhost",
+        ],
+        check=True,
+        capture_output=True,
+    )
+    return cert, key
+
+
+class StandInServer:
+    """只返回固定响应的 HTTP/2 服务器，运行在独立线程的事件循环中。"""
+
+    def __init__(self, cert: str, key: str, rtt: float = RTT):
+        self.rtt = rtt
+        self.connections = 0
+        self.ssl_context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+        self.ssl_context.load_cert_chain(cert, key)
+        self.ssl_context.set_alpn_protocols(["h2"])
+        self.port = None
+        self._loop = asyncio.new_event_loop()
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        self._ready.wait()
+
+    def _run(self):
+        asyncio.set_event_loop(self._loop)
+        server = self._loop.run_until_complete(
+            asyncio.start_server(
+                self._handle, "127.0.0.1", 0, ssl=self.ssl_context
+            )
+        )
+        self.port = server.sockets[0].getsockname()[1]
+        self._ready.set()
+        self._loop.run_forever()
+
+    async def _respond(self, conn, writer, stream_id: int, delay: float):
+        await asyncio.sleep(delay)
+        conn.send_headers(
+            stream_id,
+            [
+                (":status", "200"),
+                ("content-type", "application/json"),
+                ("content-length", str(len(BODY))),
+            ],
+        )
+        conn.send_data(stream_id, BODY, end_stream=True)
+        writer.write(conn.data_to_send())
+
+    async def _handle(self, reader, writer):
+        self.connections += 1
+        # 本地握手几乎没有开销，在新连接的第一个请求上补上 TCP + TLS 握手的 2 个 RTT
+        handshake = 2 * self.rtt
+        conn = h2.connection.H2Connection(
+            config=h2.config.H2Configuration(client_side=False)
+        )
+        conn.initiate_connection()
+        writer.write(conn.data_to_send())
+        try:
+            while True:
+                data = await reader.read(65535)
+                if not data:
+                    break
+                for event in conn.receive_data(data):
+                    if isinstance(event, h2.events.RequestReceived):
+                        delay = self.rtt + handshake
+                        handshake = 0.0
+                        asyncio.ensure_future(
+                            self._respond(conn, writer, event.stream_id, delay)
+                        )
+                    elif isinstance(event, h2.events.ConnectionTerminated):
+                        return
+                writer.write(conn.data_to_send())
+        except (ConnectionError, ssl.SSLError):
+            pass
+        finally:
+            writer.close()
+
+
+def timed(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def bench(server: StandInServer, label: str, **kwargs):
+    before = server.connections
+    api = RestAPI(domain=f"https://127.0.0.1:{server.port}", **kwargs)
+    # 模拟客户端创建后处理其他初始化工作
+    time.sleep(0.5)
+    first = timed(api.public_data.get_system_time)
+    warm = timed(api.public_data.get_system_time)
+    time.sleep(IDLE)
+    after_idle = timed(api.public_data.get_system_time)
+    api.close()
+    print(f"{label}")
+    print(f"  first request:      {first * 1000:6.1f} ms")
+    print(f"  warm request:       {warm * 1000:6.1f} ms")
+    print(f"  after {IDLE:.0f}s idle:     {after_idle * 1000:6.1f} ms")
+    print(f"  connections opened: {server.connections - before}")
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        cert, key = make_certificate(directory)
+        # 让 httpx 信任自签名证书
+        os.environ["SSL_CERT_FILE"] = cert
+        server = StandInServer(cert, key)
+        server.start()
+        print(f"stand-in server: https://127.0.0.1:{server.port} (h2, rtt={RTT * 1000:.0f}ms)\n")
+
+        bench(
+            server,
+            "httpx defaults, no prewarm / keepalive",
+            limits=httpx.Limits(),
+            timeout=30,
+            prewarm=False,
+            keepalive_interval=None,
+        )
+        bench(
+            server,
+            f"DEFAULT_LIMITS, prewarm, keepalive every {KEEPALIVE_INTERVAL:.0f}s",
+            prewarm=True,
+            keepalive_interval=KEEPALIVE_INTERVAL,
+        )
+
+
+if __name__ == "__main__":
+    main()
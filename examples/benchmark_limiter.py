@@ -0,0 +1,92 @@
+"""
+限速器基准
+50 个线程 / 500 个协程同时争抢同一个令牌桶，统计吞吐量和各调用方获得令牌数的分布（公平性）。
+
+运行方式（需要已安装 okxx 包）:
+    python -m okxx.examples.benchmark_limiter
+"""
+
+import asyncio
+import statistics
+import threading
+import time
+
+from okxx.limiter import AsyncTokenBucketLimiter, SyncTokenBucketLimiter
+
+RATE = 500
+PERIOD = 1
+DURATION = 3.0
+
+
+def report(label: str, counts, elapsed: float, latencies):
+    total = sum(counts)
+    latencies = sorted(latencies)
+    p99 = latencies[int(len(latencies) * 0.99) - 1] if latencies else 0.0
+    print(f"{label}")
+    ceiling = RATE / PERIOD * elapsed
+    print(f"  acquired:   {total} in {elapsed:.2f}s (ceiling {ceiling:,.0f})")
+    print(
+        f"  per caller: min={min(counts)} max={max(counts)} "
+        f"stdev={statistics.pstdev(counts):.2f}"
+    )
+    print(f"  wait p50:   {statistics.median(latencies) * 1000:.1f} ms, p99: {p99 * 1000:.1f} ms")
+
+
+def bench_threads(workers: int = 50):
+    # 默认突发量为 1，令牌匀速补充，测量的就是持续争抢时的表现
+    limiter = SyncTokenBucketLimiter(RATE, PERIOD, name="bench")
+    counts = [0] * workers
+    latencies = []
+    lock = threading.Lock()
+    barrier = threading.Barrier(workers + 1)
+    deadline = 0.0
+
+    def worker(i: int):
+        barrier.wait()
+        local = []
+        while time.monotonic() < deadline:
+            t0 = time.monotonic()
+            limiter.acquire()
+            local.append(time.monotonic() - t0)
+            counts[i] += 1
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(workers)]
+    for t in threads:
+        t.start()
+    start = time.monotonic()
+    deadline = start + DURATION
+    barrier.wait()
+    for t in threads:
+        t.join()
+    elapsed = time.monotonic() - start
+    report(f"SyncTokenBucketLimiter, {workers} threads", counts, elapsed, latencies)
+
+
+async def bench_coroutines(workers: int = 500):
+    limiter = AsyncTokenBucketLimiter(RATE, PERIOD, name="bench")
+    counts = [0] * workers
+    latencies = []
+    deadline = time.monotonic() + DURATION
+
+    async def worker(i: int):
+        while time.monotonic() < deadline:
+            t0 = time.monotonic()
+            await limiter.acquire()
+            latencies.append(time.monotonic() - t0)
+            counts[i] += 1
+
+    start = time.monotonic()
+    await asyncio.gather(*(worker(i) for i in range(workers)))
+    elapsed = time.monotonic() - start
+    report(f"AsyncTokenBucketLimiter, {workers} coroutines", counts, elapsed, latencies)
+
+
+def main():
+    bench_threads()
+    asyncio.run(bench_coroutines())
+
+
+if __name__ == "__main__":
+    main()
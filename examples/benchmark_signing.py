@@ -0,0 +1,55 @@
+"""
+签名性能基准
+对比 utils.sign(utils.pre_hash(...)) 与预绑定密钥的 utils.Signer 每秒可生成的签名数量。
+
+运行方式（需要已安装 okxx 包）:
+    python -m okxx.examples.benchmark_signing
+"""
+
+import time
+
+from okxx import utils
+
+SECRET_KEY = "0123456789ABCDEF0123456789ABCDEF"
+TIMESTAMP = "2024-01-01T00:00:00.000Z"
+REQUEST_PATH = "/api/v5/trade/order"
+BODY = (
+    '{"instId":"BTC-USDT","tdMode":"cash","side":"buy",'
+    '"ordType":"limit","sz":"0.01","px":"30000"}'
+)
+
+
+def bench_legacy(n: int) -> float:
+    """原有的函数式签名路径"""
+    start = time.perf_counter()
+    for _ in range(n):
+        utils.sign(
+            utils.pre_hash(TIMESTAMP, "POST", REQUEST_PATH, BODY), SECRET_KEY
+        ).decode("utf-8")
+    return time.perf_counter() - start
+
+
+def bench_signer(n: int) -> float:
+    """预绑定密钥的 Signer"""
+    signer = utils.Signer(SECRET_KEY)
+    start = time.perf_counter()
+    for _ in range(n):
+        signer.sign(TIMESTAMP, "POST", REQUEST_PATH, BODY)
+    return time.perf_counter() - start
+
+
+def main(n: int = 200_000):
+    expected = utils.sign(
+        utils.pre_hash(TIMESTAMP, "POST", REQUEST_PATH, BODY), SECRET_KEY
+    ).decode("utf-8")
+    assert utils.Signer(SECRET_KEY).sign(TIMESTAMP, "POST", REQUEST_PATH, BODY) == expected
+
+    legacy = bench_legacy(n)
+    signer = bench_signer(n)
+    print(f"utils.sign + pre_hash: {n / legacy:>12,.0f} signatures/s")
+    print(f"utils.Signer:          {n / signer:>12,.0f} signatures/s")
+    print(f"speedup:               {legacy / signer:>12.2f}x")
+
+
+if __name__ == "__main__":
+    main()
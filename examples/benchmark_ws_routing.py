@@ -0,0 +1,120 @@
+"""
+WebSocket 消息路由基准
+400 个产品的 tickers 频道，每个产品一个只关心自己的回调，对比：
+- 按频道路由（原有方式）：完整解析消息后调用频道下所有回调，由回调自行过滤 instId；
+- 按订阅参数路由：先解析 arg 前缀得到 (channel, instId)，只调用该产品的回调。
+  分别测量在接收循环中直接调用回调（queue_size=None）和默认的按订阅队列交付两种方式，
+  队列方式计时到所有队列处理完为止。
+
+运行方式（需要已安装 okxx 包）:
+    python -m okxx.examples.benchmark_ws_routing
+"""
+
+import asyncio
+import logging
+import time
+from typing import Optional
+
+from okxx import codec
+from okxx.ws.base import WsBaseAsync
+
+INSTRUMENTS = 400
+MESSAGES = 20_000
+
+
+def make_messages():
+    messages = []
+    for i in range(MESSAGES):
+        inst_id = f"COIN{i % INSTRUMENTS}-USDT"
+        messages.append(
+            codec.dumps(
+                {
+                    "arg": {"channel": "tickers", "instId": inst_id},
+                    "data": [
+                        {
+                            "instType": "SPOT",
+                            "instId": inst_id,
+                            "last": "1.2345",
+                            "lastSz": "10",
+                            "askPx": "1.2346",
+                            "askSz": "100",
+                            "bidPx": "1.2344",
+                            "bidSz": "100",
+                            "ts": str(1700000000000 + i),
+                        }
+                    ],
+                }
+            )
+        )
+    return messages
+
+
+def make_callbacks(counts):
+    callbacks = {}
+    for i in range(INSTRUMENTS):
+        inst_id = f"COIN{i}-USDT"
+
+        async def callback(msg_data, inst_id=inst_id):
+            # 与原有用法一致：回调只处理自己的产品
+            if msg_data["arg"]["instId"] != inst_id:
+                return
+            counts[inst_id] = counts.get(inst_id, 0) + 1
+
+        callbacks[inst_id] = callback
+    return callbacks
+
+
+async def bench_channel(messages) -> float:
+    counts = {}
+    callbacks = list(make_callbacks(counts).values())
+    start = time.perf_counter()
+    for message in messages:
+        msg_data = codec.loads(message)
+        for callback in callbacks:
+            await callback(msg_data)
+    elapsed = time.perf_counter() - start
+    assert sum(counts.values()) == len(messages)
+    return elapsed
+
+
+async def drain(ws: WsBaseAsync, total: int):
+    """等待所有订阅队列处理（或按溢出策略丢弃）完 total 条消息。"""
+    while True:
+        stats = [queue.stats() for queue in ws.queues.values()]
+        done = sum(s["delivered"] + s["dropped"] for s in stats)
+        if done >= total:
+            return sum(s["dropped"] for s in stats)
+        await asyncio.sleep(0)
+
+
+async def bench_routed(messages, queue_size: Optional[int]) -> float:
+    counts = {}
+    ws = WsBaseAsync("wss://localhost/ws/v5/public", queue_size=queue_size)
+    for inst_id, callback in make_callbacks(counts).items():
+        await ws.subscribe([{"channel": "tickers", "instId": inst_id}], callback)
+    start = time.perf_counter()
+    for message in messages:
+        await ws._on_raw_message(message)
+    dropped = await drain(ws, len(messages)) if queue_size is not None else 0
+    elapsed = time.perf_counter() - start
+    await ws._close_queues(list(ws.queues))
+    assert sum(counts.values()) + dropped == len(messages)
+    return elapsed
+
+
+async def main():
+    # 未连接时订阅会记录错误日志，这里只测量消息分发
+    logging.getLogger("okxx.ws.base").setLevel(logging.CRITICAL)
+    messages = make_messages()
+    channel = await bench_channel(messages)
+    routed = await bench_routed(messages, queue_size=None)
+    queued = await bench_routed(messages, queue_size=1000)
+    print(f"{INSTRUMENTS} subscriptions, {MESSAGES:,} messages")
+    print(f"  channel routing:          {channel / MESSAGES * 1e6:8.1f} us/message")
+    print(f"  key routing, direct:      {routed / MESSAGES * 1e6:8.1f} us/message")
+    print(f"  key routing, queued:      {queued / MESSAGES * 1e6:8.1f} us/message")
+    print(f"  speedup (direct/queued):  {channel / routed:8.1f}x / {channel / queued:.1f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,82 @@
+"""
+限速器内存占用检查
+以大量不同的 instId 调用按 instId 限速的接口（例如逐个查询期权订单），其中一部分键收到服务端限速，
+检查令牌桶数量、保留的自适应退避状态和内存占用在达到上限后保持平稳；任何一项超出上限时以非零状态退出。
+
+运行方式（需要已安装 okxx 包）:
+    python -m okxx.examples.limiter_memory [总键数]
+"""
+
+import sys
+import time
+import tracemalloc
+
+from loguru import logger
+
+from okxx import consts as c
+from okxx.limiter import AdaptivePolicy, SyncRateLimiterManager
+
+API_KEY = "demo-key"
+MAX_BUCKETS = 10_000
+MAX_PARKED = 1_000
+# 每隔多少个键模拟一次 50011 限速
+THROTTLE_EVERY = 50
+# 桶数量和保留的退避状态都达到上限后（从 WARMUP 个键开始）允许的内存增长
+WARMUP = max(3 * MAX_BUCKETS, THROTTLE_EVERY * MAX_PARKED) + MAX_BUCKETS
+MAX_GROWTH = 1024 * 1024
+
+
+class _Throttled(Exception):
+    code = "50011"
+
+
+def main(total: int = 300_000) -> bool:
+    # 限速警告日志与本检查无关
+    logger.disable("okxx")
+    manager = SyncRateLimiterManager(
+        adaptive=AdaptivePolicy(max_parked=MAX_PARKED), max_buckets=MAX_BUCKETS
+    )
+    tracemalloc.start()
+    start = time.perf_counter()
+    step = total // 10
+    baseline = None
+    ok = True
+    print(f"{'keys':>10} {'buckets':>8} {'evicted':>9} {'parked':>7} {'memory':>10}")
+    for i in range(1, total + 1):
+        params = {"instId": f"BTC-USD-{240000 + i // 1000}-{i}-C"}
+        manager.acquire(c.ORDER_INFO, params, API_KEY, c.GET)
+        error = _Throttled() if i % THROTTLE_EVERY == 0 else None
+        manager.record_result(c.ORDER_INFO, params, API_KEY, error, c.GET)
+        if manager.bucket_count > MAX_BUCKETS:
+            print(f"bucket count {manager.bucket_count:,} exceeds {MAX_BUCKETS:,}")
+            ok = False
+            break
+        if i == WARMUP:
+            baseline, _ = tracemalloc.get_traced_memory()
+        if i % step == 0:
+            current, _ = tracemalloc.get_traced_memory()
+            print(
+                f"{i:>10,} {manager.bucket_count:>8,} {manager.evicted:>9,} "
+                f"{manager.adaptive.parked_count:>7,} {current / 1024 / 1024:>8.1f}MB"
+            )
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    elapsed = time.perf_counter() - start
+    print(f"{total / elapsed:,.0f} acquires/s with tracemalloc enabled")
+
+    if manager.adaptive.parked_count > MAX_PARKED:
+        print(f"parked adaptive state {manager.adaptive.parked_count:,} exceeds {MAX_PARKED:,}")
+        ok = False
+    if baseline is not None:
+        growth = current - baseline
+        print(f"memory growth after {WARMUP:,} keys: {growth / 1024:,.0f}KB")
+        if growth > MAX_GROWTH:
+            print(f"memory grew by more than {MAX_GROWTH / 1024:,.0f}KB")
+            ok = False
+    print("ok" if ok else "FAILED")
+    return ok
+
+
+if __name__ == "__main__":
+    if not main(int(sys.argv[1]) if len(sys.argv) > 1 else 300_000):
+        raise SystemExit(1)
@@ -0,0 +1,114 @@
+"""
+限速窗口检查
+用模拟时钟驱动令牌桶：请求在随机时间到达（包括空闲后的突发），记录每个请求的放行时间，
+然后检查任意长度为 period 的窗口内放行的令牌数都不超过 rate。
+覆盖默认突发量、批量接口的突发量、多令牌请求以及查询类（轮询）获取方式。
+另外检查下单路径的延迟：空闲的下单 / 撤单 / 改单桶在突发量以内的连续请求不应等待。
+
+运行方式（需要已安装 okxx 包）:
+    python -m okxx.examples.limiter_window_check
+"""
+
+import random
+import time
+
+from okxx import consts as c
+from okxx.limiter import SyncRateLimiterManager, SyncTokenBucketLimiter
+
+REQUESTS = 20_000
+# 忽略累加 period / rate 时的浮点误差
+EPSILON = 1e-9
+
+CASES = [
+    # rate, period, burst, 单次最多令牌数
+    (20, 2, None, 1),
+    (10, 2, None, 1),
+    (60, 2, 10, 1),
+    (60, 2, 30, 1),
+    (300, 2, 20, 20),
+    (3, 1, None, 1),
+]
+
+
+def simulate(rate: int, period: int, burst, max_tokens: int, seed: int = 0):
+    rng = random.Random(seed)
+    limiter = SyncTokenBucketLimiter(rate, period, name="check", burst=burst)
+    admitted = []
+    now = 0.0
+    for _ in range(REQUESTS):
+        # 大部分请求密集到达，偶尔空闲一段时间后突发
+        if rng.random() < 0.02:
+            now += rng.uniform(0, 3 * period)
+        else:
+            now += rng.expovariate(4 * rate / period)
+        tokens = rng.randint(1, max_tokens)
+        if rng.random() < 0.5:
+            wait = limiter._reserve(tokens, now)
+        else:
+            # 查询类请求：令牌不足时等待后重试
+            at = now
+            while True:
+                wait = limiter._try_reserve(tokens, at)
+                if wait <= 0:
+                    break
+                at += wait
+            wait = at - now
+        admitted.append((now + max(wait, 0.0), tokens))
+    return admitted
+
+
+def max_window(admitted, period: int) -> int:
+    admitted = sorted(admitted)
+    best = 0
+    total = 0
+    end = 0
+    for start, (t, _) in enumerate(admitted):
+        while end < len(admitted) and admitted[end][0] < t + period - EPSILON:
+            total += admitted[end][1]
+            end += 1
+        best = max(best, total)
+        total -= admitted[start][1]
+    return best
+
+
+# 下单路径：(接口, 空闲桶上连续请求的次数)
+ORDER_PATH = [(c.PLACE_ORDER, 10), (c.CANCEL_ORDER, 10), (c.AMEND_ORDER, 10)]
+# 突发量以内的连续请求总耗时上限（秒），只包含加锁和计算的开销
+MAX_BURST_LATENCY = 0.05
+
+
+def check_order_latency() -> bool:
+    ok = True
+    manager = SyncRateLimiterManager()
+    params = {"instId": "BTC-USDT-SWAP"}
+    for path, count in ORDER_PATH:
+        burst = manager._rate_configs[path].get("burst", 1)
+        start = time.perf_counter()
+        for _ in range(count):
+            manager.acquire(path, params, "latency-check")
+        elapsed = time.perf_counter() - start
+        passed = count <= burst and elapsed <= MAX_BURST_LATENCY
+        ok = ok and passed
+        print(
+            f"{path:<32} burst={burst:>3} {count} back-to-back acquires in "
+            f"{elapsed * 1000:6.1f} ms {'ok' if passed else 'TOO SLOW'}"
+        )
+    return ok
+
+
+def main():
+    ok = check_order_latency()
+    for rate, period, burst, max_tokens in CASES:
+        worst = max_window(simulate(rate, period, burst, max_tokens), period)
+        passed = worst <= rate
+        ok = ok and passed
+        print(
+            f"rate={rate:>3}/{period}s burst={str(burst or 1):>3} tokens<={max_tokens:<2} "
+            f"max per window={worst:>3} {'ok' if passed else 'EXCEEDED'}"
+        )
+    if not ok:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+"""
+无人值守检查
+依次运行所有自带断言的检查脚本（不需要网络），任何一项失败时以非零状态退出，可直接放在 CI 中运行。
+
+运行方式（需要已安装 okxx 包）:
+    python -m okxx.examples.run_checks
+"""
+
+from okxx.examples import limiter_memory, limiter_window_check
+
+
+def main() -> bool:
+    results = {}
+    print("== limiter_window_check ==")
+    try:
+        limiter_window_check.main()
+        results["limiter_window_check"] = True
+    except SystemExit as e:
+        results["limiter_window_check"] = not e.code
+    print("== limiter_memory ==")
+    results["limiter_memory"] = limiter_memory.main()
+    print()
+    for name, passed in results.items():
+        print(f"{name:<24} {'ok' if passed else 'FAILED'}")
+    return all(results.values())
+
+
+if __name__ == "__main__":
+    if not main():
+        raise SystemExit(1)
@@ -0,0 +1,98 @@
+"""
+跨进程共享限速示例
+启动多个工作进程共用同一个令牌桶（例如同一 API Key 的下单接口），统计总吞吐量是否
+被限制在单个桶的速率内，检查在父进程中创建、fork 后在子进程中使用的桶不会丢失更新，
+并测量单次 acquire 的开销。
+
+运行方式（需要已安装 okxx 包，仅类 Unix 系统）:
+    python -m okxx.examples.shared_limiter_demo
+"""
+
+import multiprocessing
+import os
+import tempfile
+import time
+
+from okxx import consts as c
+from okxx.limiter import SyncRateLimiterManager, SyncTokenBucketLimiter
+from okxx.shared_limiter import SharedMemoryBackend
+
+WORKERS = 16
+DURATION = 3.0
+PARAMS = {"instId": "BTC-USDT", "tdMode": "cash", "side": "buy", "ordType": "market", "sz": "1"}
+
+
+def worker(path: str, start_at: float, results):
+    manager = SyncRateLimiterManager(backend=SharedMemoryBackend(path))
+    time.sleep(max(start_at - time.monotonic(), 0))
+    deadline = start_at + DURATION
+    count = 0
+    while True:
+        manager.acquire(c.PLACE_ORDER, PARAMS, "demo-key")
+        # 只统计在窗口内放行的请求
+        if time.monotonic() >= deadline:
+            break
+        count += 1
+    results.put(count)
+
+
+def check_fork(path: str, children: int = 8, n: int = 10_000):
+    """父进程创建桶后 fork，子进程并发预约，检查共享 TAT 累加了全部预约。"""
+    limiter = SharedMemoryBackend(path).sync_limiter(10**6, 1, "fork-check")
+    # 把 TAT 放在远处，子进程的预约只做累加
+    start = time.monotonic() + 3600
+    limiter._tat = start
+    pids = []
+    for _ in range(children):
+        pid = os.fork()
+        if pid == 0:
+            for _ in range(n):
+                limiter._reserve(1, start)
+            os._exit(0)
+        pids.append(pid)
+    for pid in pids:
+        os.waitpid(pid, 0)
+    reserved = round((limiter._tat - start) / limiter._interval)
+    print(f"forked children reserved {reserved} of {children * n} tokens")
+
+
+def measure_overhead(path: str, n: int = 200_000):
+    """在不触发等待的速率下测量 acquire 的平均耗时。"""
+    local = SyncTokenBucketLimiter(10**9, 1)
+    shared = SharedMemoryBackend(path).sync_limiter(10**9, 1, "overhead")
+    for label, limiter in (("process-local", local), ("shared", shared)):
+        start = time.perf_counter()
+        for _ in range(n):
+            limiter.acquire()
+        print(f"{label:>14} acquire: {(time.perf_counter() - start) / n * 1e6:.2f} us")
+
+
+def main():
+    path = os.path.join(tempfile.gettempdir(), f"okxx-limiter-demo-{os.getpid()}")
+    try:
+        SharedMemoryBackend(path)  # 预先创建共享表
+        results = multiprocessing.Queue()
+        start_at = time.monotonic() + 1.0
+        procs = [
+            multiprocessing.Process(target=worker, args=(path, start_at, results))
+            for _ in range(WORKERS)
+        ]
+        for p in procs:
+            p.start()
+        counts = [results.get() for _ in procs]
+        for p in procs:
+            p.join()
+
+        config = SyncRateLimiterManager()._rate_configs[c.PLACE_ORDER]
+        burst = config.get("burst", 1)
+        ceiling = burst + (config["rate"] - burst + 1) / config["period"] * DURATION
+        print(f"{WORKERS} processes acquired {sum(counts)} tokens in {DURATION:.0f}s "
+              f"(ceiling {ceiling:.0f}), per process: {counts}")
+        check_fork(path)
+        measure_overhead(path)
+    finally:
+        os.unlink(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -28,7 +28,11 @@ class OkxAPIException(Exception):
         self.message = "An unknown error occurred"
         self.status_code = response.status_code
         self.response = response
-        self.request = getattr(response, "request", None)
+        try:
+            self.request = response.request
+        except (AttributeError, RuntimeError):
+            # 直接由响应字节构造的 httpx.Response 没有关联的请求
+            self.request = None
 
         try:
             # 尝试从JSON响应中解析错误码和信息
@@ -73,3 +77,43 @@ class OkxParamsException(Exception):
     @override
     def __str__(self):
         return f"OkxParamsException: {self.message}"
+
+
+class OkxBatchOrderException(Exception):
+    """
+    批量接口中单个订单执行失败时抛出的异常（整体请求成功或部分成功）。
+    """
+
+    def __init__(self, code, message, data):
+        """
+        :param code: 订单级错误码 (sCode)
+        :param message: 订单级错误信息 (sMsg)
+        :param data: 该订单在批量响应中的完整结果
+        """
+        self.code = code
+        self.message = message
+        self.data = data
+
+    @override
+    def __str__(self):
+        return f"OkxBatchOrderException(code='{self.code}'): {self.message}"
+
+
+class OkxWsSubscribeException(Exception):
+    """
+    WebSocket (取消)订阅请求被服务器拒绝，或连接在确认前断开时抛出的异常。
+    """
+
+    def __init__(self, code, message, arg):
+        """
+        :param code: 错误码，连接断开时为 'N/A'
+        :param message: 错误信息
+        :param arg: 对应的订阅参数
+        """
+        self.code = code
+        self.message = message
+        self.arg = arg
+
+    @override
+    def __str__(self):
+        return f"OkxWsSubscribeException(code='{self.code}', arg={self.arg}): {self.message}"
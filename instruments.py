@@ -0,0 +1,322 @@
+# okx/instruments.py
+"""
+产品元数据缓存
+
+一次性（并行）加载所有产品类型的基础信息，保存为紧凑的只读记录，并按
+instId / instFamily / uly / state 建立索引。数据在 TTL 到期后自动刷新，
+也可以通过 WebSocket 的 instruments 频道实时更新。
+
+提供基于 tickSz / lotSz 的价格、数量取整工具，避免下单路径上反复查询产品信息。
+
+使用示例:
+    from okxx.instruments import InstrumentRegistry
+
+    registry = InstrumentRegistry(api.public_data)
+    registry.load()
+    inst = registry.get('BTC-USDT-SWAP')
+    px = registry.round_price('BTC-USDT-SWAP', 30000.123)   # '30000.1'
+    sz = registry.round_size('BTC-USDT-SWAP', 1.2345)       # '1.23'
+"""
+
+import asyncio
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from decimal import ROUND_CEILING, ROUND_FLOOR, ROUND_HALF_UP, Decimal
+from typing import Dict, Iterable, List, Optional
+
+from loguru import logger
+
+INST_TYPES = ("SPOT", "MARGIN", "SWAP", "FUTURES", "OPTION")
+
+_ROUNDING = {"nearest": ROUND_HALF_UP, "down": ROUND_FLOOR, "up": ROUND_CEILING}
+
+
+def _dec(value: Optional[str]) -> Optional[Decimal]:
+    return Decimal(value) if value not in (None, "") else None
+
+
+class Instrument:
+    """单个产品的基础信息（只保留常用字段）。"""
+
+    __slots__ = (
+        "instId",
+        "instType",
+        "instFamily",
+        "uly",
+        "baseCcy",
+        "quoteCcy",
+        "settleCcy",
+        "ctVal",
+        "ctMult",
+        "ctValCcy",
+        "tickSz",
+        "lotSz",
+        "minSz",
+        "state",
+        "listTime",
+        "expTime",
+        "optType",
+        "stk",
+    )
+
+    def __init__(self, data: Dict[str, str]):
+        get = data.get
+        self.instId: str = data["instId"]
+        self.instType: str = get("instType", "")
+        self.instFamily: str = get("instFamily", "")
+        self.uly: str = get("uly", "")
+        self.baseCcy: str = get("baseCcy", "")
+        self.quoteCcy: str = get("quoteCcy", "")
+        self.settleCcy: str = get("settleCcy", "")
+        self.ctVal = _dec(get("ctVal"))
+        self.ctMult = _dec(get("ctMult"))
+        self.ctValCcy: str = get("ctValCcy", "")
+        self.tickSz = _dec(get("tickSz"))
+        self.lotSz = _dec(get("lotSz"))
+        self.minSz = _dec(get("minSz"))
+        self.state: str = get("state", "")
+        self.listTime: Optional[int] = int(get("listTime")) if get("listTime") else None
+        self.expTime: Optional[int] = int(get("expTime")) if get("expTime") else None
+        self.optType: str = get("optType", "")
+        self.stk = _dec(get("stk"))
+
+    def __repr__(self) -> str:
+        return (
+            f"Instrument({self.instId}, {self.instType}, tickSz={self.tickSz}, "
+            f"lotSz={self.lotSz}, state={self.state})"
+        )
+
+
+def _quantize(value, step: Decimal, mode: str) -> str:
+    if mode not in _ROUNDING:
+        raise ValueError(f"Invalid rounding mode: {mode}")
+    units = (Decimal(str(value)) / step).to_integral_value(rounding=_ROUNDING[mode])
+    return str((units * step).quantize(step))
+
+
+class _RegistryBase:
+    """索引与查询逻辑，由同步和异步版本共享。"""
+
+    def __init__(self, public_api, inst_types: Iterable[str], ttl: Optional[float]):
+        self.public_api = public_api
+        self.inst_types = tuple(inst_types)
+        self.ttl = ttl
+        self.loaded_at: Optional[float] = None
+
+        self._by_id: Dict[str, Instrument] = {}
+        self._by_family: Dict[str, List[Instrument]] = defaultdict(list)
+        self._by_uly: Dict[str, List[Instrument]] = defaultdict(list)
+        self._by_state: Dict[str, List[Instrument]] = defaultdict(list)
+        self._by_type: Dict[str, List[Instrument]] = defaultdict(list)
+
+    @property
+    def stale(self) -> bool:
+        if self.loaded_at is None:
+            return True
+        return self.ttl is not None and time.monotonic() - self.loaded_at > self.ttl
+
+    def _rebuild(self, records: Dict[str, Instrument]):
+        """整体替换索引；查询方只会看到旧索引或新索引，不会看到中间状态。"""
+        by_family = defaultdict(list)
+        by_uly = defaultdict(list)
+        by_state = defaultdict(list)
+        by_type = defaultdict(list)
+        for inst in records.values():
+            if inst.instFamily:
+                by_family[inst.instFamily].append(inst)
+            if inst.uly:
+                by_uly[inst.uly].append(inst)
+            by_state[inst.state].append(inst)
+            by_type[inst.instType].append(inst)
+        self._by_id = records
+        self._by_family = by_family
+        self._by_uly = by_uly
+        self._by_state = by_state
+        self._by_type = by_type
+        self.loaded_at = time.monotonic()
+        logger.debug(f"Instrument registry loaded {len(records)} instruments")
+
+    def _records_from(self, pages: Iterable[List[Dict[str, str]]]) -> Dict[str, Instrument]:
+        records: Dict[str, Instrument] = {}
+        for page in pages:
+            for data in page:
+                inst = Instrument(data)
+                # SPOT 与 MARGIN 共享 instId，优先保留 SPOT 的记录
+                records.setdefault(inst.instId, inst)
+        return records
+
+    def update(self, items: Iterable[Dict[str, str]]):
+        """
+        用推送或查询得到的产品信息增量更新注册表（例如 WebSocket instruments 频道）。
+        """
+        records = dict(self._by_id)
+        for data in items:
+            inst = Instrument(data)
+            existing = records.get(inst.instId)
+            if existing is None or existing.instType == inst.instType:
+                records[inst.instId] = inst
+        self._rebuild(records)
+
+    async def on_ws_message(self, msg_data: dict):
+        """可直接作为 instruments 频道的回调函数。"""
+        data = msg_data.get("data")
+        if data:
+            self.update(data)
+
+    # --- 查询接口 ---
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def __contains__(self, inst_id: str) -> bool:
+        return inst_id in self._by_id
+
+    def get(self, inst_id: str) -> Optional[Instrument]:
+        return self._by_id.get(inst_id)
+
+    def by_family(self, inst_family: str) -> List[Instrument]:
+        return self._by_family.get(inst_family, [])
+
+    def by_uly(self, uly: str) -> List[Instrument]:
+        return self._by_uly.get(uly, [])
+
+    def by_state(self, state: str) -> List[Instrument]:
+        return self._by_state.get(state, [])
+
+    def by_type(self, inst_type: str) -> List[Instrument]:
+        return self._by_type.get(inst_type, [])
+
+    def _require(self, inst_id: str) -> Instrument:
+        inst = self._by_id.get(inst_id)
+        if inst is None:
+            raise KeyError(f"Unknown instrument: {inst_id}")
+        return inst
+
+    def _step(self, inst_id: str, field: str) -> Decimal:
+        """产品的 tickSz / lotSz；缺失或不为正数时抛出 ValueError。"""
+        step = getattr(self._require(inst_id), field)
+        if step is None or step <= 0:
+            raise ValueError(f"Instrument {inst_id} has no valid {field}: {step}")
+        return step
+
+    def round_price(self, inst_id: str, px, mode: str = "nearest") -> str:
+        """
+        把价格取整到 tickSz 的整数倍。
+
+        :param mode: 'nearest' 四舍五入，'down' 向下，'up' 向上。
+        :return: 可直接用于下单的价格字符串。
+        """
+        return _quantize(px, self._step(inst_id, "tickSz"), mode)
+
+    def round_size(self, inst_id: str, sz, mode: str = "down") -> str:
+        """
+        把数量取整到 lotSz 的整数倍，默认向下取整以免超出可用数量。
+        """
+        return _quantize(sz, self._step(inst_id, "lotSz"), mode)
+
+
+class InstrumentRegistry(_RegistryBase):
+    """同步版本，基于 PublicAPI。"""
+
+    def __init__(
+        self,
+        public_api,
+        inst_types: Iterable[str] = INST_TYPES,
+        ttl: Optional[float] = 3600,
+        max_workers: int = 8,
+    ):
+        """
+        :param public_api: PublicAPI 实例（例如 RestAPI.public_data）。
+        :param inst_types: 需要加载的产品类型。
+        :param ttl: 数据有效期（秒），到期后下一次 ensure_fresh() 会重新加载；None 表示不过期。
+        :param max_workers: 并行加载的线程数。
+        """
+        super().__init__(public_api, inst_types, ttl)
+        self.max_workers = max_workers
+        self._load_lock = threading.Lock()
+
+    def _fetch(self, inst_type: str, inst_family: Optional[str] = None) -> List[Dict]:
+        if inst_family is None:
+            return self.public_api.get_instruments(instType=inst_type)
+        return self.public_api.get_instruments(instType=inst_type, instFamily=inst_family)
+
+    def load(self):
+        """并行加载所有产品类型并重建索引。"""
+        with self._load_lock:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                futures = [
+                    pool.submit(self._fetch, t) for t in self.inst_types if t != "OPTION"
+                ]
+                if "OPTION" in self.inst_types:
+                    # 期权必须按交易品种查询
+                    families = [
+                        family
+                        for page in self.public_api.get_underlying(instType="OPTION")
+                        for family in page
+                    ]
+                    futures += [
+                        pool.submit(self._fetch, "OPTION", family) for family in families
+                    ]
+                pages = [f.result() for f in futures]
+            self._rebuild(self._records_from(pages))
+
+    def ensure_fresh(self):
+        """数据过期时重新加载。"""
+        if self.stale:
+            self.load()
+
+
+class AsyncInstrumentRegistry(_RegistryBase):
+    """异步版本，基于 AsyncPublicAPI。"""
+
+    def __init__(
+        self,
+        public_api,
+        inst_types: Iterable[str] = INST_TYPES,
+        ttl: Optional[float] = 3600,
+    ):
+        """
+        :param public_api: AsyncPublicAPI 实例（例如 AsyncRestAPI.public_data）。
+        :param inst_types: 需要加载的产品类型。
+        :param ttl: 数据有效期（秒），None 表示不过期。
+        """
+        super().__init__(public_api, inst_types, ttl)
+        self._load_lock: Optional[asyncio.Lock] = None
+
+    async def _fetch(self, inst_type: str, inst_family: Optional[str] = None) -> List[Dict]:
+        if inst_family is None:
+            return await self.public_api.get_instruments(instType=inst_type)
+        return await self.public_api.get_instruments(
+            instType=inst_type, instFamily=inst_family
+        )
+
+    async def load(self):
+        """并行加载所有产品类型并重建索引。"""
+        if self._load_lock is None:
+            self._load_lock = asyncio.Lock()
+        async with self._load_lock:
+            coros = [self._fetch(t) for t in self.inst_types if t != "OPTION"]
+            if "OPTION" in self.inst_types:
+                underlying = await self.public_api.get_underlying(instType="OPTION")
+                families = [family for page in underlying for family in page]
+                coros += [self._fetch("OPTION", family) for family in families]
+            pages = await asyncio.gather(*coros)
+            self._rebuild(self._records_from(pages))
+
+    async def ensure_fresh(self):
+        """数据过期时重新加载。"""
+        if self.stale:
+            await self.load()
+
+    async def subscribe(self, ws, inst_types: Optional[Iterable[str]] = None):
+        """
+        订阅 instruments 频道，产品信息变化时实时更新注册表。
+
+        :param ws: 已启动的 WsPublicAsync 客户端。
+        """
+        params = [
+            {"channel": "instruments", "instType": t}
+            for t in (inst_types or self.inst_types)
+        ]
+        await ws.subscribe(params, self.on_ws_message)
@@ -1,55 +1,216 @@
 # okx/limiter.py
 import asyncio
+import contextvars
 import time
 import threading
-from collections import deque, defaultdict
-from typing import Dict, Any, List
+from collections import OrderedDict
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Dict, Any, List, Optional, Tuple, Union
 from loguru import logger
 
 # 导入所有API路径常量
 from okxx import consts as c
+from okxx.telemetry import LimiterTelemetry, as_telemetry
 
 # ==============================================================================
-# 异步限速器 (Async Version)
+# 请求优先级 (Priority)
 # ==============================================================================
 
+# 数值越小优先级越高
+PRIORITY_CANCEL = 0
+PRIORITY_AMEND = 1
+PRIORITY_PLACE = 2
+PRIORITY_QUERY = 3
+PRIORITY_BACKFILL = 4
+
+# 交易类请求的默认优先级，其余请求默认为 PRIORITY_QUERY。
+# 按 (HTTP方法, 接口路径) 区分：下单和查询订单共用 /api/v5/trade/order
+_REQUEST_PRIORITY: Dict[Tuple[str, str], int] = {
+    (c.POST, c.CANCEL_ORDER): PRIORITY_CANCEL,
+    (c.POST, c.CANCEL_BATCH_ORDERS): PRIORITY_CANCEL,
+    (c.POST, c.AMEND_ORDER): PRIORITY_AMEND,
+    (c.POST, c.AMEND_BATCH_ORDER): PRIORITY_AMEND,
+    (c.POST, c.PLACE_ORDER): PRIORITY_PLACE,
+    (c.POST, c.BATCH_ORDERS): PRIORITY_PLACE,
+    (c.POST, c.CLOSE_POSITION): PRIORITY_PLACE,
+}
+
+# 低优先级请求轮询时为更高优先级保留的桶容量比例
+_POLL_HEADROOM = {PRIORITY_QUERY: 0.0, PRIORITY_BACKFILL: 0.25}
+
+_priority_var: contextvars.ContextVar = contextvars.ContextVar(
+    "okxx_request_priority", default=None
+)
+
+
+@contextmanager
+def request_priority(level: int):
+    """
+    在当前上下文（线程或协程任务）中覆盖请求优先级。
 
-class AsyncTokenBucketLimiter:
+    使用示例:
+        with request_priority(PRIORITY_BACKFILL):
+            api.market_data.get_history_candlesticks(...)
     """
-    一个基于异步的令牌桶速率限制器。
+    token = _priority_var.set(level)
+    try:
+        yield
+    finally:
+        _priority_var.reset(token)
+
+
+def current_priority(method: str, request_path: str) -> int:
+    """当前请求的优先级：上下文中显式设置的优先，否则按 HTTP 方法和接口路径决定。"""
+    level = _priority_var.get()
+    if level is not None:
+        return level
+    return _REQUEST_PRIORITY.get((method, request_path), PRIORITY_QUERY)
+
+
+# ==============================================================================
+# GCRA 令牌桶 (Generic Cell Rate Algorithm)
+# ==============================================================================
+
+
+class _GcraBucket:
+    """
+    GCRA 形式的令牌桶，每个桶只保存一个“理论到达时间”（TAT），内存为 O(1)。
+
+    - 桶容量为 burst，令牌以 period / (rate - burst + 1) 的间隔匀速补充，
+      保证任意长度为 period 的窗口内放行的请求不超过 rate（与 OKX 的滑动窗口限速一致）；
+    - acquire 只在极短的临界区内计算并预约自己的放行时间，然后在锁外等待，
+      同一个桶上的其他调用方不会被阻塞，并按预约顺序（FIFO）依次放行；
+    - 交易类优先级（撤单、改单、下单）直接预约；查询和回补只在令牌足够时才获取，
+      否则等待后重试，不会排在随后到达的交易请求前面。
     """
 
-    def __init__(self, rate: int, period_seconds: int, name: str = "default"):
+    def __init__(
+        self,
+        rate: int,
+        period_seconds: int,
+        name: str = "default",
+        burst: Optional[int] = None,
+    ):
+        """
+        :param rate: 每个周期允许的请求数。
+        :param period_seconds: 周期长度（秒）。
+        :param burst: （可选）桶容量，即允许的瞬时突发量，默认为 1（请求均匀分布在周期内）。
+                      突发量越大，持续速率越低：为了不超过每周期 rate 次，
+                      持续速率为每周期 rate - burst + 1 次。批量接口需要不小于单次批量的订单数。
+        """
         if rate <= 0 or period_seconds <= 0:
             raise ValueError("Rate and period must be positive.")
+        burst = 1 if burst is None else burst
+        if not 0 < burst <= rate:
+            raise ValueError("Burst must be between 1 and rate.")
 
         # 按照要求，不使用元组赋值
         self.rate_limit = rate
         self.period = period_seconds
+        self.burst = burst
         self.name = name
 
-        self._timestamps = deque()
-        self._lock = asyncio.Lock()
+        self._base_rate = rate
+        self._base_burst = burst
+        self._interval = period_seconds / (rate - burst + 1)
+        self._tolerance = self._interval * burst
+        self._tat = 0.0
+
+    def _check(self, tokens: int):
+        if tokens > self._base_burst:
+            raise ValueError(
+                f"Cannot acquire {tokens} tokens from limiter '{self.name}' with burst {self._base_burst}."
+            )
+
+    def set_rate(self, rate: int):
+        """
+        调整速率（自适应限速使用），桶容量按比例缩放，已有的预约不受影响。
+        """
+        if rate <= 0:
+            raise ValueError("Rate must be positive.")
+        self.rate_limit = rate
+        self.burst = min(rate, max(1, round(self._base_burst * rate / self._base_rate)))
+        self._interval = self.period / (rate - self.burst + 1)
+        self._tolerance = self._interval * self.burst
+
+    def pause(self, seconds: float):
+        """在接下来的 seconds 秒内不再放行新的请求（例如服务端返回 Retry-After）。"""
+        self._tat = max(self._tat, time.monotonic() + seconds + self._tolerance)
+
+    def _reserve(self, tokens: int, now: float, headroom: float = 0.0) -> float:
+        """
+        预约 tokens 个令牌，返回需要等待的秒数（调用方需保证互斥）。
+        :param headroom: 为更高优先级的调用方保留的令牌数，本次预约不会占用这部分容量。
+        """
+        tat = self._tat if self._tat > now else now
+        self._tat = tat + tokens * self._interval
+        return self._tat - self._tolerance + headroom * self._interval - now
+
+    def _peek(self, tokens: int, now: float, headroom: float = 0.0) -> float:
+        """不预约，只计算 tokens 个令牌可用前还需等待的秒数（<= 0 表示可以立即获取）。"""
+        tat = self._tat if self._tat > now else now
+        return tat + (tokens + headroom) * self._interval - self._tolerance - now
+
+    def _try_reserve(self, tokens: int, now: float, headroom: float = 0.0) -> float:
+        """
+        令牌足够时预约并返回 0，否则不预约，返回建议的等待时间（调用方需保证互斥）。
+        """
+        wait = self._peek(tokens, now, headroom)
+        if wait > 0:
+            return wait
+        self._reserve(tokens, now)
+        return 0.0
+
+    def _poll_headroom(self, tokens: int, priority: int) -> float:
+        headroom = self.burst * _POLL_HEADROOM.get(priority, 0.0)
+        return min(headroom, max(self.burst - tokens, 0))
+
+    def _refund(self, tokens: int):
+        """取消尚未使用的预约，把令牌还给桶（调用方需保证互斥）。"""
+        self._tat -= tokens * self._interval
+
+    @property
+    def available(self) -> float:
+        """当前可立即获取的令牌数（近似值）。"""
+        backlog = max(self._tat - time.monotonic(), 0.0)
+        return max(self._tolerance - backlog, 0.0) / self._interval
 
-    async def acquire(self):
-        async with self._lock:
-            while True:
-                now = time.monotonic()
-                window_start = now - self.period
-                while self._timestamps and self._timestamps[0] <= window_start:
-                    self._timestamps.popleft()
 
-                if len(self._timestamps) < self.rate_limit:
-                    self._timestamps.append(now)
-                    return
+# ==============================================================================
+# 异步限速器 (Async Version)
+# ==============================================================================
 
-                earliest_request_time = self._timestamps[0]
-                wait_time = (earliest_request_time + self.period) - now
-                if wait_time > 0:
-                    logger.trace(
-                        f"Async Rate limiter '{self.name}' triggered. Waiting for {wait_time:.3f} seconds."
-                    )
-                    await asyncio.sleep(wait_time)
+
+class AsyncTokenBucketLimiter(_GcraBucket):
+    """
+    一个基于异步的令牌桶速率限制器。
+    事件循环是单线程的，预约过程中没有 await，因此不需要锁。
+    """
+
+    async def acquire(self, tokens: int = 1, priority: int = PRIORITY_PLACE):
+        """
+        获取 tokens 个令牌，批量接口按订单数量计费。
+        :param priority: 请求优先级，低于 PRIORITY_PLACE 的请求以轮询方式获取。
+        """
+        self._check(tokens)
+        if priority > PRIORITY_PLACE:
+            headroom = self._poll_headroom(tokens, priority)
+            while True:
+                wait_time = self._try_reserve(tokens, time.monotonic(), headroom)
+                if wait_time <= 0:
+                    return
+                await asyncio.sleep(wait_time)
+        wait_time = self._reserve(tokens, time.monotonic())
+        if wait_time > 0:
+            logger.trace(
+                f"Async Rate limiter '{self.name}' triggered. Waiting for {wait_time:.3f} seconds."
+            )
+            try:
+                await asyncio.sleep(wait_time)
+            except asyncio.CancelledError:
+                self._refund(tokens)
+                raise
 
 
 # ==============================================================================
@@ -57,42 +218,43 @@ class AsyncTokenBucketLimiter:
 # ==============================================================================
 
 
-class SyncTokenBucketLimiter:
+class SyncTokenBucketLimiter(_GcraBucket):
     """
     一个基于线程安全的同步令牌桶速率限制器。
+    锁只保护预约计算，等待在锁外进行。
     """
 
-    def __init__(self, rate: int, period_seconds: int, name: str = "default"):
-        if rate <= 0 or period_seconds <= 0:
-            raise ValueError("Rate and period must be positive.")
-
-        # 按照要求，不使用元组赋值
-        self.rate_limit = rate
-        self.period = period_seconds
-        self.name = name
-
-        self._timestamps = deque()
+    def __init__(
+        self,
+        rate: int,
+        period_seconds: int,
+        name: str = "default",
+        burst: Optional[int] = None,
+    ):
+        super().__init__(rate, period_seconds, name=name, burst=burst)
         self._lock = threading.Lock()
 
-    def acquire(self):
-        with self._lock:
+    def acquire(self, tokens: int = 1, priority: int = PRIORITY_PLACE):
+        """
+        获取 tokens 个令牌，批量接口按订单数量计费。
+        :param priority: 请求优先级，低于 PRIORITY_PLACE 的请求以轮询方式获取。
+        """
+        self._check(tokens)
+        if priority > PRIORITY_PLACE:
+            headroom = self._poll_headroom(tokens, priority)
             while True:
-                now = time.monotonic()
-                window_start = now - self.period
-                while self._timestamps and self._timestamps[0] <= window_start:
-                    self._timestamps.popleft()
-
-                if len(self._timestamps) < self.rate_limit:
-                    self._timestamps.append(now)
+                with self._lock:
+                    wait_time = self._try_reserve(tokens, time.monotonic(), headroom)
+                if wait_time <= 0:
                     return
-
-                earliest_request_time = self._timestamps[0]
-                wait_time = (earliest_request_time + self.period) - now
-                if wait_time > 0:
-                    logger.trace(
-                        f"Sync Rate limiter '{self.name}' triggered. Waiting for {wait_time:.3f} seconds."
-                    )
-                    time.sleep(wait_time)
+                time.sleep(wait_time)
+        with self._lock:
+            wait_time = self._reserve(tokens, time.monotonic())
+        if wait_time > 0:
+            logger.trace(
+                f"Sync Rate limiter '{self.name}' triggered. Waiting for {wait_time:.3f} seconds."
+            )
+            time.sleep(wait_time)
 
 
 # ==============================================================================
@@ -175,18 +337,47 @@ class _RateLimiterConfig:
         c.TIER: {"rate": 10, "period": 2, "key_by": ["ip"]},
         c.STATUS: {"rate": 10, "period": 2, "key_by": ["ip"]},
         # === 交易 (Trade) ===
-        c.PLACE_ORDER: {"rate": 60, "period": 2, "key_by": ["user", "instId/family"]},
-        c.BATCH_ORDERS: {"rate": 300, "period": 2, "key_by": ["user", "instType"]},
-        c.CANCEL_ORDER: {"rate": 60, "period": 2, "key_by": ["user", "instId"]},
+        # 下单 / 撤单 / 改单允许一半速率的瞬时突发，空闲后的一串撤单不会被均匀摊开到整个周期
+        c.PLACE_ORDER: {
+            "rate": 60,
+            "period": 2,
+            "burst": 30,
+            "key_by": ["user", "instId/family"],
+        },
+        # 批量接口按订单数计费，单次最多 20 个订单，桶容量至少为 20
+        c.BATCH_ORDERS: {
+            "rate": 300,
+            "period": 2,
+            "burst": 20,
+            "key_by": ["user", "instType"],
+        },
+        c.CANCEL_ORDER: {
+            "rate": 60,
+            "period": 2,
+            "burst": 30,
+            "key_by": ["user", "instId"],
+        },
         c.CANCEL_BATCH_ORDERS: {
             "rate": 300,
             "period": 2,
+            "burst": 20,
+            "key_by": ["user", "instType"],
+        },
+        c.AMEND_ORDER: {
+            "rate": 60,
+            "period": 2,
+            "burst": 30,
+            "key_by": ["user", "instId"],
+        },
+        c.AMEND_BATCH_ORDER: {
+            "rate": 300,
+            "period": 2,
+            "burst": 20,
             "key_by": ["user", "instType"],
         },
-        c.AMEND_ORDER: {"rate": 60, "period": 2, "key_by": ["user", "instId"]},
-        c.AMEND_BATCH_ORDER: {"rate": 300, "period": 2, "key_by": ["user", "instType"]},
         c.CLOSE_POSITION: {"rate": 20, "period": 2, "key_by": ["user", "mgnMode"]},
-        c.ORDER_INFO: {"rate": 60, "period": 2, "key_by": ["user", "instId"]},
+        # 查询订单与下单共用 /api/v5/trade/order，按 "GET 路径" 单独配置（参见 config_path()）
+        c.GET + " " + c.ORDER_INFO: {"rate": 60, "period": 2, "key_by": ["user", "instId"]},
         c.ORDERS_PENDING: {"rate": 20, "period": 2, "key_by": ["user"]},
         c.ORDERS_HISTORY: {"rate": 40, "period": 2, "key_by": ["user"]},
         c.ORDERS_HISTORY_ARCHIVE: {"rate": 10, "period": 2, "key_by": ["user"]},
@@ -205,23 +396,50 @@ class _RateLimiterConfig:
     }
 
 
-def _build_dynamic_key(config: Dict, params: Dict, api_key: str) -> str:
+# 同一路径的不同请求方法使用不同限速的接口路径
+_METHOD_KEYED_PATHS = frozenset(
+    key.partition(" ")[2] for key in _RateLimiterConfig.RATE_CONFIGS if " " in key
+)
+
+
+def config_path(method: str, request_path: str) -> str:
+    """
+    请求在 RATE_CONFIGS 中的键，同时作为令牌桶键的接口部分。
+    大多数接口就是路径本身；按方法区分限速的路径（例如 GET /api/v5/trade/order）为 "方法 路径"。
+    """
+    if request_path in _METHOD_KEYED_PATHS and method != c.POST:
+        return method + " " + request_path
+    return request_path
+
+
+def _request_cost(params: Union[Dict, List[Dict]]) -> int:
+    """批量接口的参数是订单列表，按订单数量计费；其余请求每次计1。"""
+    if isinstance(params, list):
+        return max(len(params), 1)
+    return 1
+
+
+@lru_cache(maxsize=4096)
+def _instrument_key(inst_id: str) -> str:
+    """期权按交易品种（如 BTC-USD-240628-60000-C -> BTC-USD）限速，其他产品按 instId；结果缓存。"""
+    if "-C-" in inst_id or "-P-" in inst_id or inst_id.endswith(("-C", "-P")):
+        return inst_id.rsplit("-", 3)[0]
+    return inst_id
+
+
+def _build_dynamic_key(
+    config: Dict, params: Union[Dict, List[Dict]], api_key: str
+) -> str:
     """通用函数：根据配置和请求上下文构建动态键"""
+    if isinstance(params, list):
+        # 批量接口：以第一个订单的参数构建键
+        params = params[0] if params else {}
     key_parts: List[str] = []
     if "instId/family" in config["key_by"]:
         key_parts.append(api_key if "user" in config["key_by"] else "ip_shared")
-        inst_id = params.get("instId", "")
-        if "-C-" in inst_id or "-P-" in inst_id:
-            inst_family = params.get("instFamily")
-            if inst_family:
-                key_parts.append(inst_family)
-            else:
-                try:
-                    key_parts.append(inst_id.rsplit("-", 3)[0])
-                except IndexError:
-                    key_parts.append(inst_id)
-        else:
-            key_parts.append(inst_id)
+        key_parts.append(
+            params.get("instFamily") or _instrument_key(params.get("instId", ""))
+        )
         return ":".join(key_parts)
     for key_component in config["key_by"]:
         if key_component == "user":
@@ -233,64 +451,425 @@ def _build_dynamic_key(config: Dict, params: Dict, api_key: str) -> str:
     return ":".join(key_parts)
 
 
+# ==============================================================================
+# 自适应限速 (Adaptive)
+# ==============================================================================
+
+# 表示触发限速的业务错误码：50011 用户请求频率过快，50061 子账户请求频率过快
+THROTTLE_CODES = ("50011", "50061")
+
+
+def _is_throttled(error: Optional[Exception]) -> bool:
+    if error is None:
+        return False
+    return (
+        getattr(error, "code", None) in THROTTLE_CODES
+        or getattr(error, "status_code", None) == 429
+    )
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    try:
+        return float(headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return None
+
+
+class _AdaptiveState:
+    __slots__ = (
+        "prior",
+        "cap",
+        "throttles",
+        "successes",
+        "observed_limit",
+        "last_throttle",
+        "parked_rate",
+    )
+
+    def __init__(self, prior: int, cap: int):
+        self.prior = prior
+        self.cap = cap
+        self.throttles = 0
+        self.successes = 0
+        self.observed_limit: Optional[int] = None
+        self.last_throttle: Optional[float] = None
+        # 桶被回收时仍处于退避中的速率，桶重建时恢复
+        self.parked_rate: Optional[int] = None
+
+
+class AdaptivePolicy:
+    """
+    自适应限速策略（AIMD）。
+
+    - 静态限速表作为先验：已知接口从表中的速率开始，未知接口使用 default_rate / default_period；
+    - 收到 50011 / 50061 或 HTTP 429 时，速率乘以 backoff（乘性减），并遵守 Retry-After；
+    - 在当前速率下连续成功 probe_periods 个周期的请求量后，速率加 1（加性增），
+      已知接口最多恢复到表中的速率，未知接口最多探测到 max_rate；
+    - stats() 报告每个桶的先验速率、当前速率和观测到的限速点。
+    """
+
+    def __init__(
+        self,
+        backoff: float = 0.5,
+        probe_periods: int = 2,
+        min_rate: int = 1,
+        default_rate: int = 10,
+        default_period: int = 2,
+        max_rate: int = 60,
+        max_parked: int = 10_000,
+    ):
+        """
+        :param backoff: 触发限速后速率的缩放系数。
+        :param probe_periods: 每次加速前需要连续成功的周期数。
+        :param min_rate: 速率下限。
+        :param default_rate: 未知接口的初始速率（每周期请求数）。
+        :param default_period: 未知接口的周期（秒）。
+        :param max_rate: 未知接口可探测到的最高速率。
+        :param max_parked: 桶已被回收、但仍在退避中的自适应状态最多保留的数量，
+                           超过后丢弃最早保留的状态（对应的桶重建时从先验速率重新开始）。
+        """
+        if not 0 < backoff < 1:
+            raise ValueError("backoff must be between 0 and 1.")
+        self.backoff = backoff
+        self.probe_periods = probe_periods
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        # 签名请求按用户限速，公共请求按IP限速
+        self._default_user = {
+            "rate": default_rate,
+            "period": default_period,
+            "key_by": ["user"],
+            "max_rate": max_rate,
+        }
+        self._default_ip = dict(self._default_user, key_by=["ip"])
+        self.max_parked = max_parked
+        self._states: Dict[str, _AdaptiveState] = {}
+        self._limiters: Dict[str, _GcraBucket] = {}
+        # 保留了退避速率的桶名，按保留顺序排列
+        self._parked: "OrderedDict[str, None]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def parked_count(self) -> int:
+        """桶已被回收、仍保留退避速率的状态数量。"""
+        return len(self._parked)
+
+    def default_config(self, api_key: str) -> Dict[str, Any]:
+        return self._default_user if api_key != "-1" else self._default_ip
+
+    def observe(
+        self, limiter: _GcraBucket, cap: int, error: Optional[Exception] = None
+    ):
+        """
+        记录一次请求结果。
+        :param cap: 该桶允许探测到的最高速率。
+        :param error: 请求失败时的异常，成功时为 None。
+        """
+        throttled = _is_throttled(error)
+        if error is not None and not throttled:
+            return
+        with self._lock:
+            state = self._states.get(limiter.name)
+            if state is None:
+                state = _AdaptiveState(limiter._base_rate, cap)
+                self._states[limiter.name] = state
+                self._limiters[limiter.name] = limiter
+            if throttled:
+                current = limiter.rate_limit
+                state.throttles += 1
+                state.successes = 0
+                state.observed_limit = current
+                state.last_throttle = time.time()
+                limiter.set_rate(max(self.min_rate, int(current * self.backoff)))
+                delay = _retry_after(error)
+                if delay:
+                    limiter.pause(delay)
+                logger.warning(
+                    f"Rate limiter '{limiter.name}' throttled by server, "
+                    f"rate {current} -> {limiter.rate_limit} per {limiter.period}s"
+                )
+                return
+            state.successes += 1
+            current = limiter.rate_limit
+            if current < state.cap and state.successes >= current * self.probe_periods:
+                state.successes = 0
+                limiter.set_rate(current + 1)
+                logger.debug(f"Rate limiter '{limiter.name}' probing up to {current + 1}")
+
+    def forget(self, name: str):
+        """
+        桶被回收时调用。速率已恢复到先验值的桶直接删除自适应状态；
+        仍处于退避中（速率低于先验值）的桶保留状态和当前速率，由 restore() 在桶重建时恢复，
+        避免回收后以原始速率重新触发服务端限速。
+        """
+        with self._lock:
+            state = self._states.get(name)
+            limiter = self._limiters.pop(name, None)
+            if state is None:
+                return
+            if limiter is not None and limiter.rate_limit < state.prior:
+                state.parked_rate = limiter.rate_limit
+                self._parked[name] = None
+                while len(self._parked) > self.max_parked:
+                    oldest, _ = self._parked.popitem(last=False)
+                    del self._states[oldest]
+            else:
+                del self._states[name]
+
+    def restore(self, limiter: _GcraBucket):
+        """新建的桶沿用回收前仍在退避中的速率（参见 forget()）。"""
+        with self._lock:
+            state = self._states.get(limiter.name)
+            if state is None or state.parked_rate is None:
+                return
+            self._limiters[limiter.name] = limiter
+            limiter.set_rate(state.parked_rate)
+            state.parked_rate = None
+            del self._parked[limiter.name]
+            state.successes = 0
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        每个桶的先验速率、当前速率、观测到的限速点和触发次数。
+        已回收但仍在退避中的桶报告保留的速率，period 为 None。
+        """
+        result = {}
+        with self._lock:
+            for name, state in self._states.items():
+                limiter = self._limiters.get(name)
+                result[name] = {
+                    "prior": state.prior,
+                    "rate": limiter.rate_limit if limiter is not None else state.parked_rate,
+                    "period": limiter.period if limiter is not None else None,
+                    "observed_limit": state.observed_limit,
+                    "throttles": state.throttles,
+                    "last_throttle": state.last_throttle,
+                }
+        return result
+
+
 class RateLimiterManager:
     """通用限速管理器基类"""
 
-    def __init__(self):
+    def __init__(
+        self,
+        backend=None,
+        adaptive: Union[AdaptivePolicy, bool, None] = None,
+        order_quota=None,
+        telemetry: Union[LimiterTelemetry, bool, None] = None,
+        max_buckets: int = 10_000,
+    ):
+        """
+        :param backend: （可选）限速状态后端，例如 shared_limiter.SharedMemoryBackend，
+                        用于多个进程共用同一组令牌桶；默认为进程内状态。
+        :param adaptive: （可选）AdaptivePolicy 实例，传 True 使用默认参数。
+                         启用后未知接口也会被限速，并根据服务端的限速响应自动调整速率。
+        :param order_quota: （可选）quota.OrderQuota 实例，跟踪子账户/母账户的下单配额。
+        :param telemetry: （可选）telemetry.LimiterTelemetry 实例，传 True 使用默认参数，
+                          记录每个桶的获取次数和等待时间分布。
+        :param max_buckets: 令牌桶数量上限。超过后按最近最少使用的顺序回收已完全恢复
+                            （空闲）的桶；被回收的桶再次使用时会重新创建，不影响限速结果。
+        """
         self._rate_configs = _RateLimiterConfig.RATE_CONFIGS
+        self.backend = backend
+        self.adaptive = AdaptivePolicy() if adaptive is True else (adaptive or None)
+        self.order_quota = order_quota
+        self.telemetry = as_telemetry(telemetry)
+        self.max_buckets = max_buckets
+        self.evicted = 0
+        # (接口路径, 动态键) -> 令牌桶，按最近使用顺序排列
+        self._limiters: "OrderedDict[Tuple[str, str], _GcraBucket]" = OrderedDict()
+
+    def _lookup(self, key: Tuple[str, str]) -> Optional[_GcraBucket]:
+        limiter = self._limiters.get(key)
+        if limiter is not None:
+            try:
+                self._limiters.move_to_end(key)
+            except KeyError:
+                # 刚好被其他线程回收，本次仍使用取到的桶
+                pass
+        return limiter
+
+    def _register(self, key: Tuple[str, str], config: Dict[str, Any]) -> _GcraBucket:
+        """创建并登记令牌桶，必要时回收空闲的桶（调用方需持有 _lock）。"""
+        limiter = self._limiters.get(key)
+        if limiter is None:
+            limiter_name = f"{key[0]}::{key[1]}"
+            limiter = self._new_limiter(
+                config["rate"], config["period"], limiter_name, config.get("burst")
+            )
+            if self.adaptive is not None:
+                self.adaptive.restore(limiter)
+            self._limiters[key] = limiter
+            if len(self._limiters) > self.max_buckets:
+                self._evict()
+        return limiter
+
+    def _evict(self, scan: int = 16):
+        """
+        从最久未使用的一端回收桶。只回收令牌已完全恢复的桶，
+        仍有欠额的桶被移到队尾，最多检查 scan 个，保证创建新桶的开销为 O(1)。
+        """
+        now = time.monotonic()
+        for _ in range(min(scan, len(self._limiters) - 1)):
+            if len(self._limiters) <= self.max_buckets:
+                return
+            key, limiter = next(iter(self._limiters.items()))
+            if limiter._tat > now:
+                self._limiters.move_to_end(key)
+                continue
+            del self._limiters[key]
+            self.evicted += 1
+            if self.telemetry is not None:
+                self.telemetry.forget(limiter.name)
+            if self.adaptive is not None:
+                self.adaptive.forget(limiter.name)
+
+    @property
+    def bucket_count(self) -> int:
+        """当前登记的令牌桶数量。"""
+        return len(self._limiters)
+
+    def _config_for(
+        self, request_path: str, api_key: str
+    ) -> Optional[Dict[str, Any]]:
+        config = self._rate_configs.get(request_path)
+        if config is None and self.adaptive is not None:
+            config = self.adaptive.default_config(api_key)
+        return config
+
+    def record_result(
+        self,
+        request_path: str,
+        params: Union[Dict, List[Dict]],
+        api_key: str,
+        error: Optional[Exception] = None,
+        method: str = c.POST,
+    ):
+        """
+        把请求结果反馈给自适应层，由客户端在每次请求结束后调用；未启用自适应限速时直接返回。
+        """
+        if self.adaptive is None:
+            return
+        path = config_path(method, request_path)
+        config = self._config_for(path, api_key)
+        dynamic_key = _build_dynamic_key(config, params, api_key)
+        limiter = self._limiters.get((path, dynamic_key))
+        if limiter is not None:
+            self.adaptive.observe(limiter, config.get("max_rate", config["rate"]), error)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """自适应限速的统计信息，未启用时为空。"""
+        return self.adaptive.stats() if self.adaptive is not None else {}
+
+    def snapshot(self, top: int = 10) -> Dict[str, Any]:
+        """遥测快照：每个桶的获取次数、等待时间分位数、利用率以及争用最严重的桶。"""
+        if self.telemetry is None:
+            return {"buckets": {}, "top_contended": []}
+        return self.telemetry.snapshot(top)
+
+    def prometheus(self, prefix: str = "okxx_limiter") -> str:
+        """以 Prometheus 文本格式导出遥测数据，未启用时为空字符串。"""
+        return self.telemetry.prometheus(prefix) if self.telemetry is not None else ""
 
 
 class AsyncRateLimiterManager(RateLimiterManager):
     """异步版本"""
 
-    def __init__(self):
-        super().__init__()
-        self._limiters: Dict[str, Dict[str, AsyncTokenBucketLimiter]] = defaultdict(
-            dict
-        )
+    def __init__(
+        self,
+        backend=None,
+        adaptive: Union[AdaptivePolicy, bool, None] = None,
+        order_quota=None,
+        telemetry: Union[LimiterTelemetry, bool, None] = None,
+        max_buckets: int = 10_000,
+    ):
+        super().__init__(backend, adaptive, order_quota, telemetry, max_buckets)
         self._lock = asyncio.Lock()
 
-    async def acquire(self, request_path: str, params: Dict, api_key: str):
-        config = self._rate_configs.get(request_path)
+    def _new_limiter(
+        self, rate: int, period: int, name: str, burst: Optional[int] = None
+    ) -> AsyncTokenBucketLimiter:
+        if self.backend is not None:
+            return self.backend.async_limiter(rate, period, name, burst)
+        return AsyncTokenBucketLimiter(rate, period, name=name, burst=burst)
+
+    async def acquire(
+        self,
+        request_path: str,
+        params: Union[Dict, List[Dict]],
+        api_key: str,
+        method: str = c.POST,
+    ):
+        path = config_path(method, request_path)
+        config = self._config_for(path, api_key)
         if not config:
             return
-        dynamic_key = _build_dynamic_key(config, params, api_key)
-        if dynamic_key not in self._limiters[request_path]:
+        key = (path, _build_dynamic_key(config, params, api_key))
+        limiter = self._lookup(key)
+        if limiter is None:
             async with self._lock:
-                if dynamic_key not in self._limiters[request_path]:
-                    rate = config["rate"]
-                    period = config["period"]
-                    limiter_name = f"{request_path}::{dynamic_key}"
-                    self._limiters[request_path][dynamic_key] = AsyncTokenBucketLimiter(
-                        rate, period, name=limiter_name
-                    )
-        limiter = self._limiters[request_path][dynamic_key]
+                limiter = self._register(key, config)
         if limiter:
-            await limiter.acquire()
+            tokens = _request_cost(params)
+            if self.telemetry is None:
+                await limiter.acquire(tokens, current_priority(method, request_path))
+            else:
+                start = time.perf_counter()
+                await limiter.acquire(tokens, current_priority(method, request_path))
+                self.telemetry.record(limiter, tokens, time.perf_counter() - start)
+        if self.order_quota is not None:
+            await self.order_quota.async_acquire(request_path, params, api_key, method)
 
 
 class SyncRateLimiterManager(RateLimiterManager):
     """同步版本"""
 
-    def __init__(self):
-        super().__init__()
-        self._limiters: Dict[str, Dict[str, SyncTokenBucketLimiter]] = defaultdict(dict)
+    def __init__(
+        self,
+        backend=None,
+        adaptive: Union[AdaptivePolicy, bool, None] = None,
+        order_quota=None,
+        telemetry: Union[LimiterTelemetry, bool, None] = None,
+        max_buckets: int = 10_000,
+    ):
+        super().__init__(backend, adaptive, order_quota, telemetry, max_buckets)
         self._lock = threading.Lock()
 
-    def acquire(self, request_path: str, params: Dict, api_key: str):
-        config = self._rate_configs.get(request_path)
+    def _new_limiter(
+        self, rate: int, period: int, name: str, burst: Optional[int] = None
+    ) -> SyncTokenBucketLimiter:
+        if self.backend is not None:
+            return self.backend.sync_limiter(rate, period, name, burst)
+        return SyncTokenBucketLimiter(rate, period, name=name, burst=burst)
+
+    def acquire(
+        self,
+        request_path: str,
+        params: Union[Dict, List[Dict]],
+        api_key: str,
+        method: str = c.POST,
+    ):
+        path = config_path(method, request_path)
+        config = self._config_for(path, api_key)
         if not config:
             return
-        dynamic_key = _build_dynamic_key(config, params, api_key)
-        if dynamic_key not in self._limiters[request_path]:
+        key = (path, _build_dynamic_key(config, params, api_key))
+        limiter = self._lookup(key)
+        if limiter is None:
             with self._lock:
-                if dynamic_key not in self._limiters[request_path]:
-                    rate = config["rate"]
-                    period = config["period"]
-                    limiter_name = f"{request_path}::{dynamic_key}"
-                    self._limiters[request_path][dynamic_key] = SyncTokenBucketLimiter(
-                        rate, period, name=limiter_name
-                    )
-        limiter = self._limiters[request_path][dynamic_key]
+                limiter = self._register(key, config)
         if limiter:
-            limiter.acquire()
+            tokens = _request_cost(params)
+            if self.telemetry is None:
+                limiter.acquire(tokens, current_priority(method, request_path))
+            else:
+                start = time.perf_counter()
+                limiter.acquire(tokens, current_priority(method, request_path))
+                self.telemetry.record(limiter, tokens, time.perf_counter() - start)
+        if self.order_quota is not None:
+            self.order_quota.acquire(request_path, params, api_key, method)
@@ -0,0 +1,418 @@
+# okx/models.py
+"""
+类型化响应模型（可选）
+
+API方法默认返回由字符串组成的嵌套字典。对于需要长期持有大量对象（如成交、K线）
+或反复读取价格/数量的场景，可以把 data 转换为这里的模型：
+- 每个模型使用 __slots__，内存占用远小于等价的 dict；
+- 数值字段保留原始字符串，首次访问时才转换为 float/int 并缓存，之后不再重复转换；
+- 原始字符串可通过 raw(name) 取得，例如用于回传给下单接口以避免精度损失。
+
+客户端方法默认仍返回字典；在 as_model() 上下文中调用时，客户端直接返回模型列表
+（缓存和请求合并仍按字典进行，每个调用方得到各自的模型对象）。
+
+使用示例:
+    from okxx import models
+
+    with models.as_model(models.Fill):
+        fills = api.trade.get_fills(instType='SPOT')   # List[models.Fill]
+    print(fills[0].instId, fills[0].fillPx)   # fillPx 为 float
+
+    # 也可以转换已有的 data，或直接从响应字节解码
+    tickers = models.Ticker.from_data(api.market_data.get_tickers(instType='SPOT'))
+    fills = models.decode_response(models.Fill, content)
+"""
+
+import contextvars
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Type, TypeVar, Union
+
+import httpx
+
+from okxx import codec
+from okxx import exceptions
+
+T = TypeVar("T", bound="Model")
+
+_MISSING = object()
+
+
+class Num:
+    """
+    惰性数值字段描述符。
+    原始字符串保存在 _r_<name> 槽位中，转换结果缓存在 _c_<name> 槽位中；
+    空字符串或缺失值转换为 None。
+    """
+
+    __slots__ = ("conv", "key", "raw_slot", "cache_slot")
+
+    def __init__(self, conv=float, key: Optional[str] = None):
+        """
+        :param conv: 转换函数，通常为 float 或 int。
+        :param key: JSON中的字段名，默认与属性名相同。
+        """
+        self.conv = conv
+        self.key = key
+
+    def __set_name__(self, owner, name: str):
+        if self.key is None:
+            self.key = name
+        self.raw_slot = "_r_" + name
+        self.cache_slot = "_c_" + name
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        cached = getattr(obj, self.cache_slot, _MISSING)
+        if cached is not _MISSING:
+            return cached
+        raw = getattr(obj, self.raw_slot)
+        value = self.conv(raw) if raw not in (None, "") else None
+        setattr(obj, self.cache_slot, value)
+        return value
+
+
+class Str:
+    """字符串字段，原样存放。"""
+
+    __slots__ = ("key",)
+
+    def __init__(self, key: Optional[str] = None):
+        self.key = key
+
+
+class _ModelMeta(type):
+    """根据类中声明的 Num / Str 字段生成 __slots__ 和构造所需的映射表。"""
+
+    def __new__(mcs, name, bases, namespace):
+        slots: List[str] = []
+        # (json键, 槽位名)，构造时按此表赋值
+        assign: List[Tuple[str, str]] = []
+        fields: List[str] = []
+        for attr, value in list(namespace.items()):
+            if isinstance(value, Num):
+                slots.append("_r_" + attr)
+                slots.append("_c_" + attr)
+                assign.append((value.key or attr, "_r_" + attr))
+                fields.append(attr)
+            elif isinstance(value, Str):
+                del namespace[attr]
+                slots.append(attr)
+                assign.append((value.key or attr, attr))
+                fields.append(attr)
+        namespace["__slots__"] = tuple(namespace.get("__slots__", ())) + tuple(slots)
+        cls = super().__new__(mcs, name, bases, namespace)
+        for base in bases:
+            assign = list(getattr(base, "_assign", ())) + assign
+            fields = list(getattr(base, "_fields", ())) + fields
+        cls._assign = tuple(assign)
+        cls._fields = tuple(fields)
+        # 数组形式的数据按列顺序直接写入槽位
+        slot_of = dict(assign)
+        cls._row_slots = tuple(slot_of[k] for k in getattr(cls, "_columns", ()))
+        return cls
+
+
+class Model(metaclass=_ModelMeta):
+    """所有响应模型的基类。"""
+
+    _assign: Tuple[Tuple[str, str], ...] = ()
+    _fields: Tuple[str, ...] = ()
+
+    @classmethod
+    def from_dict(cls: Type[T], data: Dict[str, Any]) -> T:
+        obj = cls.__new__(cls)
+        get = data.get
+        for key, slot in cls._assign:
+            object.__setattr__(obj, slot, get(key))
+        return obj
+
+    @classmethod
+    def from_data(cls: Type[T], data: Sequence[Dict[str, Any]]) -> List[T]:
+        """把API方法返回的 data 列表转换为模型列表。"""
+        return [cls.from_dict(item) for item in data]
+
+    def raw(self, name: str) -> Any:
+        """返回字段的原始值（数值字段为未转换的字符串）。"""
+        if isinstance(getattr(type(self), name, None), Num):
+            return getattr(self, "_r_" + name)
+        return getattr(self, name)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """还原为原始的字符串字典。"""
+        return {key: getattr(self, slot) for key, slot in self._assign}
+
+    def __repr__(self) -> str:
+        shown = ", ".join(f"{name}={self.raw(name)!r}" for name in self._fields[:6])
+        return f"{type(self).__name__}({shown}, ...)"
+
+
+class RowModel(Model):
+    """
+    以数组形式返回的数据（如K线、深度档位）的模型基类。
+    子类通过 _columns 声明各列对应的字段名。
+    """
+
+    _columns: Tuple[str, ...] = ()
+
+    @classmethod
+    def from_row(cls: Type[T], row: Sequence[str]) -> T:
+        obj = cls.__new__(cls)
+        for slot, value in zip(cls._row_slots, row):
+            object.__setattr__(obj, slot, value)
+        for slot in cls._row_slots[len(row) :]:
+            object.__setattr__(obj, slot, None)
+        return obj
+
+    @classmethod
+    def from_data(cls: Type[T], data: Sequence[Sequence[str]]) -> List[T]:
+        return [cls.from_row(row) for row in data]
+
+
+# ==============================================================================
+# 行情 (Market Data)
+# ==============================================================================
+
+
+class Ticker(Model):
+    instType = Str()
+    instId = Str()
+    last = Num()
+    lastSz = Num()
+    askPx = Num()
+    askSz = Num()
+    bidPx = Num()
+    bidSz = Num()
+    open24h = Num()
+    high24h = Num()
+    low24h = Num()
+    volCcy24h = Num()
+    vol24h = Num()
+    sodUtc0 = Num()
+    sodUtc8 = Num()
+    ts = Num(int)
+
+
+class Candle(RowModel):
+    """K线：[ts, o, h, l, c, vol, volCcy, volCcyQuote, confirm]"""
+
+    _columns = ("ts", "o", "h", "l", "c", "vol", "volCcy", "volCcyQuote", "confirm")
+
+    ts = Num(int)
+    o = Num()
+    h = Num()
+    l = Num()  # noqa: E741
+    c = Num()
+    vol = Num()
+    volCcy = Num()
+    volCcyQuote = Num()
+    confirm = Str()
+
+
+class BookLevel(RowModel):
+    """深度档位：[px, sz, liqOrd(已弃用), ordersCount]"""
+
+    _columns = ("px", "sz", "liqOrd", "numOrders")
+
+    px = Num()
+    sz = Num()
+    liqOrd = Str()
+    numOrders = Num(int)
+
+
+class Book(Model):
+    """深度快照，asks/bids 在首次访问时转换为 BookLevel 列表。"""
+
+    ts = Num(int)
+
+    __slots__ = ("_asks", "_bids")
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Book":
+        obj = super().from_dict(data)
+        obj._asks = data.get("asks", [])
+        obj._bids = data.get("bids", [])
+        return obj
+
+    @property
+    def asks(self) -> List[BookLevel]:
+        if self._asks and not isinstance(self._asks[0], BookLevel):
+            self._asks = BookLevel.from_data(self._asks)
+        return self._asks
+
+    @property
+    def bids(self) -> List[BookLevel]:
+        if self._bids and not isinstance(self._bids[0], BookLevel):
+            self._bids = BookLevel.from_data(self._bids)
+        return self._bids
+
+
+# ==============================================================================
+# 交易 (Trade)
+# ==============================================================================
+
+
+class Order(Model):
+    instType = Str()
+    instId = Str()
+    ordId = Str()
+    clOrdId = Str()
+    tag = Str()
+    ordType = Str()
+    side = Str()
+    posSide = Str()
+    tdMode = Str()
+    state = Str()
+    ccy = Str()
+    feeCcy = Str()
+    px = Num()
+    sz = Num()
+    avgPx = Num()
+    accFillSz = Num()
+    fillPx = Num()
+    fillSz = Num()
+    fee = Num()
+    pnl = Num()
+    lever = Num()
+    cTime = Num(int)
+    uTime = Num(int)
+
+
+class Fill(Model):
+    instType = Str()
+    instId = Str()
+    tradeId = Str()
+    ordId = Str()
+    clOrdId = Str()
+    billId = Str()
+    tag = Str()
+    side = Str()
+    posSide = Str()
+    execType = Str()
+    feeCcy = Str()
+    fillPx = Num()
+    fillSz = Num()
+    fee = Num()
+    fillPnl = Num()
+    ts = Num(int)
+
+
+# ==============================================================================
+# 账户 (Account)
+# ==============================================================================
+
+
+class Position(Model):
+    instType = Str()
+    instId = Str()
+    posId = Str()
+    posSide = Str()
+    mgnMode = Str()
+    ccy = Str()
+    pos = Num()
+    availPos = Num()
+    avgPx = Num()
+    markPx = Num()
+    upl = Num()
+    uplRatio = Num()
+    lever = Num()
+    liqPx = Num()
+    imr = Num()
+    mmr = Num()
+    margin = Num()
+    mgnRatio = Num()
+    notionalUsd = Num()
+    cTime = Num(int)
+    uTime = Num(int)
+
+
+class BalanceDetail(Model):
+    ccy = Str()
+    eq = Num()
+    cashBal = Num()
+    availBal = Num()
+    availEq = Num()
+    frozenBal = Num()
+    ordFrozen = Num()
+    upl = Num()
+    eqUsd = Num()
+    liab = Num()
+    uTime = Num(int)
+
+
+class Balance(Model):
+    """账户余额，details 在首次访问时转换为 BalanceDetail 列表。"""
+
+    totalEq = Num()
+    isoEq = Num()
+    adjEq = Num()
+    imr = Num()
+    mmr = Num()
+    mgnRatio = Num()
+    notionalUsd = Num()
+    uTime = Num(int)
+
+    __slots__ = ("_details",)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Balance":
+        obj = super().from_dict(data)
+        obj._details = data.get("details", [])
+        return obj
+
+    @property
+    def details(self) -> List[BalanceDetail]:
+        if self._details and not isinstance(self._details[0], BalanceDetail):
+            self._details = BalanceDetail.from_data(self._details)
+        return self._details
+
+
+def decode_response(
+    model: Type[Model], content: Union[bytes, str, httpx.Response]
+) -> List[Union[Model, Any]]:
+    """
+    直接从响应字节（或 httpx.Response）解码为模型列表，跳过中间的 data 字典处理。
+    业务错误码不为 '0' 时抛出 OkxAPIException。
+    """
+    response = content if isinstance(content, httpx.Response) else None
+    if response is not None:
+        content = response.content
+    json_res = codec.loads(content)
+    if json_res.get("code", "0") != "0":
+        if response is None:
+            response = httpx.Response(200, content=content)
+        raise exceptions.OkxAPIException(response)
+    return model.from_data(json_res.get("data", []))
+
+
+# ==============================================================================
+# 客户端接入
+# ==============================================================================
+
+_model_var: contextvars.ContextVar = contextvars.ContextVar(
+    "okxx_response_model", default=None
+)
+
+
+@contextmanager
+def as_model(model: Type[Model]):
+    """
+    在当前上下文（线程或协程任务）中，让客户端方法返回 model 列表而不是字典列表。
+
+    使用示例:
+        with as_model(Order):
+            orders = api.trade.get_order_list(instType='SWAP')
+    """
+    token = _model_var.set(model)
+    try:
+        yield
+    finally:
+        _model_var.reset(token)
+
+
+def apply_model(data: Any) -> Any:
+    """由客户端调用：当前上下文设置了模型且 data 为列表时转换为模型列表，否则原样返回。"""
+    model = _model_var.get()
+    if model is None or not isinstance(data, list):
+        return data
+    return model.from_data(data)
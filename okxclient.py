@@ -33,15 +33,32 @@ OKX API 底层HTTP客户端
     api.close()
 """
 
-import json
+import threading
+
 import httpx
 from loguru import logger
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Union
 
+from okxx import codec
 from okxx import consts as c
 from okxx import utils
 from okxx import exceptions
+from okxx import models
+from okxx.cache import ResponseCache
+from okxx import connection
 from okxx.limiter import SyncRateLimiterManager  # 导入同步版本的管理器
+from okxx.limiter import PRIORITY_QUERY, current_priority
+
+
+class _Flight:
+    """一次在途的可合并请求。"""
+
+    __slots__ = ("event", "result", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
 
 
 class OkxClient:
@@ -59,6 +76,14 @@ class OkxClient:
         base_api: str,
         debug: bool,
         proxy: Optional[str] = None,
+        limiter_manager: Optional[SyncRateLimiterManager] = None,
+        low_priority_concurrency: Optional[int] = None,
+        single_flight: bool = True,
+        cache: Optional[ResponseCache] = None,
+        limits: Optional[httpx.Limits] = None,
+        timeout: Union[float, httpx.Timeout, None] = None,
+        prewarm: bool = False,
+        keepalive_interval: Optional[float] = None,
     ):
         """
         初始化底层同步客户端。
@@ -71,6 +96,19 @@ class OkxClient:
             base_api (str): API的基础URL。
             debug (bool): 是否开启调试模式，打印详细日志。
             proxy (Optional[str]): 代理服务器地址，例如 'http://127.0.0.1:8888'。
+            limiter_manager (Optional[SyncRateLimiterManager]): 共享的限速管理器，
+                例如多个客户端或多个进程共用同一组令牌桶；默认每个客户端独立创建。
+            low_priority_concurrency (Optional[int]): 查询、回补等低优先级请求的最大并发数，
+                为撤单、下单等交易请求保留连接；默认不限制。
+            single_flight (bool): 是否合并同时在途的相同公共GET请求（共享一次请求和结果）。
+            cache (Optional[ResponseCache]): 慢变化公共接口的响应缓存，可在多个客户端间共享；默认不缓存。
+            limits (Optional[httpx.Limits]): 连接池配置，默认 connection.DEFAULT_LIMITS
+                （空闲连接保留 90 秒，需大于 keepalive_interval）。
+            timeout (Union[float, httpx.Timeout, None]): 超时配置，可分别设置
+                connect / read / write / pool，默认 connection.DEFAULT_TIMEOUT。
+            prewarm (bool): 创建客户端后是否立即在后台建立连接，默认关闭。
+            keepalive_interval (Optional[float]): 连接空闲超过该秒数时发送一次保活请求，
+                默认 None 不保活（推荐值 connection.DEFAULT_KEEPALIVE_INTERVAL）。
         """
         self.API_KEY = api_key
         self.API_SECRET_KEY = api_secret_key
@@ -78,13 +116,41 @@ class OkxClient:
         self.flag = flag
         self.domain = base_api
         self.debug = debug
+        # 预先绑定密钥的签名器，避免每次请求重复初始化HMAC
+        self.signer = utils.Signer(api_secret_key)
 
         # 使用 httpx.Client 创建同步客户端
+        limits = limits if limits is not None else connection.DEFAULT_LIMITS
         self.client = httpx.Client(
-            base_url=base_api, http2=True, proxy=proxy, timeout=30
+            base_url=base_api,
+            http2=True,
+            proxy=proxy,
+            limits=limits,
+            timeout=connection.as_timeout(timeout),
         )
         # 实例化一个同步的速率限制管理器
-        self.limiter_manager = SyncRateLimiterManager()
+        self.limiter_manager = (
+            limiter_manager if limiter_manager is not None else SyncRateLimiterManager()
+        )
+        # 低优先级请求的并发上限
+        self._low_priority_slots = (
+            threading.BoundedSemaphore(low_priority_concurrency)
+            if low_priority_concurrency
+            else None
+        )
+        # 在途的可合并请求: 键 -> _Flight
+        self.single_flight = single_flight
+        self._in_flight: Dict[str, _Flight] = {}
+        self._flight_lock = threading.Lock()
+        self.cache = cache
+        # 连接预热与保活（后台线程）
+        self.keepalive: Optional[connection.KeepAlive] = None
+        if prewarm or keepalive_interval:
+            connection.check_interval(keepalive_interval, limits)
+            self.keepalive = connection.KeepAlive(
+                self.client, self.limiter_manager, api_key, keepalive_interval, prewarm
+            )
+            self.keepalive.start()
 
     def _get_header(self, sign: str, timestamp: str) -> Dict[str, str]:
         """为需要签名的请求构建请求头。"""
@@ -110,6 +176,74 @@ class OkxClient:
 
     def _request(
         self, method: str, request_path: str, params: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """
+        同步请求入口。在 models.as_model() 上下文中调用时返回模型列表。
+        """
+        return models.apply_model(self._request_cached(method, request_path, params))
+
+    def _request_cached(
+        self, method: str, request_path: str, params: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """
+        配置了响应缓存时先查询缓存，未命中再发送请求并写入缓存
+        （注意：命中时返回的是缓存中的同一个对象，不要原地修改）。
+        """
+        cache = self.cache
+        key = (
+            cache.key_for(method, request_path, params, self.API_KEY)
+            if cache is not None
+            else None
+        )
+        if key is None:
+            return self._request_single_flight(method, request_path, params)
+        hit, result = cache.get(key, request_path)
+        if hit:
+            return result
+        result = self._request_single_flight(method, request_path, params)
+        cache.set(key, request_path, result)
+        return result
+
+    def _request_single_flight(
+        self, method: str, request_path: str, params: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """
+        相同的公共GET请求同时在途时只发送一次，
+        其余调用方等待并共享同一个结果（注意：返回的是同一个对象，不要原地修改）。
+        """
+        key = (
+            utils.single_flight_key(method, request_path, params, self.API_KEY)
+            if self.single_flight
+            else None
+        )
+        if key is None:
+            return self._send_request(method, request_path, params)
+
+        with self._flight_lock:
+            flight = self._in_flight.get(key)
+            leader = flight is None
+            if leader:
+                flight = _Flight()
+                self._in_flight[key] = flight
+        if not leader:
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = self._send_request(method, request_path, params)
+            return flight.result
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._flight_lock:
+                del self._in_flight[key]
+            flight.event.set()
+
+    def _send_request(
+        self, method: str, request_path: str, params: Dict[str, Any]
     ) -> Dict[str, Any]:
         """
         核心同步请求方法，集成了自动速率限制。
@@ -127,7 +261,7 @@ class OkxClient:
             OkxAPIException: 如果API返回错误码。
         """
         # 1. 自动应用限速器
-        self.limiter_manager.acquire(request_path, params, self.API_KEY)
+        self.limiter_manager.acquire(request_path, params, self.API_KEY, method)
 
         # 步骤 2: 根据HTTP方法准备URL和请求体
         if method == c.GET:
@@ -137,8 +271,8 @@ class OkxClient:
         elif method == c.POST:
             # POST请求：URL路径保持干净，参数序列化后放入请求体
             request_path_with_params = request_path
-            # 使用 separators 生成紧凑的JSON字符串，这是API签名的最佳实践
-            body = json.dumps(params, separators=(",", ":")) if params else ""
+            # 生成紧凑的JSON字符串，签名与发送使用同一个字符串
+            body = codec.dumps(params) if params else ""
         else:
             # 如果未来支持其他方法，可以在此扩展
             raise ValueError(f"Unsupported HTTP method: {method}")
@@ -147,11 +281,8 @@ class OkxClient:
         timestamp = utils.get_timestamp()  # 使用同步版本
         if self.API_KEY != "-1":  # 检查是否需要签名
             # 签名使用的是不带查询参数的原始路径(request_path)和请求体(body)
-            sign = utils.sign(
-                utils.pre_hash(timestamp, method, request_path, body),
-                self.API_SECRET_KEY,
-            )
-            header = self._get_header(sign.decode("utf-8"), timestamp)
+            sign = self.signer.sign(timestamp, method, request_path, body)
+            header = self._get_header(sign, timestamp)
         else:
             # 公共接口不需要签名
             header = self._get_header_no_sign()
@@ -162,6 +293,13 @@ class OkxClient:
             logger.debug(f"Body for request: {body}")
 
         # 步骤 4: 发送HTTP请求
+        low_priority = (
+            self._low_priority_slots is not None
+            and current_priority(method, request_path) >= PRIORITY_QUERY
+        )
+        if low_priority:
+            # 低优先级请求受并发上限约束，为交易请求保留连接
+            self._low_priority_slots.acquire()
         try:
             if method == c.GET:
                 response = self.client.get(request_path_with_params, headers=header)
@@ -174,18 +312,34 @@ class OkxClient:
         except httpx.RequestError as e:
             # 捕获所有 httpx 网络层面的错误 (如超时、DNS问题等)
             raise exceptions.OkxRequestException(f"HTTP request failed: {e}") from e
+        finally:
+            if low_priority:
+                self._low_priority_slots.release()
+            if self.keepalive is not None:
+                self.keepalive.touch()
 
         # 步骤 5: 处理HTTP响应
         if response.status_code != 200:
             # 如果HTTP状态码不是200 OK，抛出异常
-            raise exceptions.OkxAPIException(response)
+            error = exceptions.OkxAPIException(response)
+            self.limiter_manager.record_result(
+                request_path, params, self.API_KEY, error, method
+            )
+            raise error
 
         # 解析JSON响应
-        json_res = response.json()
+        json_res = codec.loads(response.content)
 
         # 检查OKX业务错误码
         if "code" in json_res and json_res["code"] != "0":
-            raise exceptions.OkxAPIException(response)
+            error = exceptions.OkxAPIException(response)
+            self.limiter_manager.record_result(
+                request_path, params, self.API_KEY, error, method
+            )
+            raise error
+
+        # 把结果反馈给自适应限速（未启用时为空操作）
+        self.limiter_manager.record_result(request_path, params, self.API_KEY, None, method)
 
         # 成功时，返回 'data' 字段内容，如果 'data' 不存在，则返回整个JSON响应
         return json_res.get("data", json_res)
@@ -206,8 +360,12 @@ class OkxClient:
         优雅地关闭底层的 httpx.Client 连接池。
         在程序退出时调用此方法是个好习惯。
         """
+        if getattr(self, "keepalive", None) is not None:
+            self.keepalive.stop()
         if hasattr(self, "client") and self.client:
             self.client.close()
+        if getattr(self, "cache", None) is not None:
+            self.cache.close()
 
     def __enter__(self):
         """上下文管理器支持"""
@@ -0,0 +1,233 @@
+# okx/quota.py
+"""
+子账户 / 母账户下单频率配额
+
+OKX 除了按接口限速外，还按子账户限制下单类请求的总频率（默认每 2 秒 1000 笔，
+VIP 用户按成交比率可获得更高额度），批量接口中的每一笔订单都单独计数。
+做市等场景下，多个产品、多个进程的下单请求会共同消耗同一个配额。
+
+OrderQuota 为每个子账户（按 API Key 区分）以及可选的母账户汇总维护一个令牌桶：
+- 下单 / 批量下单 / 改单 / 撤单（POST 请求）都按订单笔数计数，查询订单（同一路径的 GET 请求）不计数；
+- 接近上限时，新单和改单不会占用为撤单保留的余量（cancel_reserve），撤单始终优先；
+- 撤单直接排队，新单和改单在额度不足时等待后重试，不会挤占随后到达的撤单；
+- remaining() 返回当前剩余额度，stats() 返回各类请求的累计笔数。
+
+使用示例:
+    from okxx.limiter import SyncRateLimiterManager
+    from okxx.quota import OrderQuota
+
+    quota = OrderQuota(sub_rate=1000, master_rate=3000)
+    quota.register(api_key_a, sub_account='mm-a', master='main')
+    quota.register(api_key_b, sub_account='mm-b', master='main')
+    manager = SyncRateLimiterManager(order_quota=quota)
+"""
+
+import asyncio
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from okxx import consts as c
+from okxx.limiter import _GcraBucket, _request_cost
+
+PLACE = "place"
+AMEND = "amend"
+CANCEL = "cancel"
+
+# (HTTP方法, 接口路径) -> 配额类别。下单和查询订单共用 /api/v5/trade/order，需要按方法区分
+ORDER_QUOTA_REQUESTS: Dict[Tuple[str, str], str] = {
+    (c.POST, c.PLACE_ORDER): PLACE,
+    (c.POST, c.BATCH_ORDERS): PLACE,
+    (c.POST, c.AMEND_ORDER): AMEND,
+    (c.POST, c.AMEND_BATCH_ORDER): AMEND,
+    (c.POST, c.CANCEL_ORDER): CANCEL,
+    (c.POST, c.CANCEL_BATCH_ORDERS): CANCEL,
+}
+
+# 批量接口单次最多 20 笔订单
+_MAX_BATCH = 20
+
+
+class _Account:
+    __slots__ = ("name", "bucket", "master", "counts")
+
+    def __init__(self, name: str, bucket: _GcraBucket, master: Optional["_Account"]):
+        self.name = name
+        self.bucket = bucket
+        self.master = master
+        self.counts: Dict[str, int] = defaultdict(int)
+
+
+class OrderQuota:
+    """
+    子账户 / 母账户下单配额跟踪器，供 SyncRateLimiterManager / AsyncRateLimiterManager 使用。
+    """
+
+    def __init__(
+        self,
+        sub_rate: int = 1000,
+        period: int = 2,
+        master_rate: Optional[int] = None,
+        cancel_reserve: float = 0.1,
+        counted: Iterable[str] = (PLACE, AMEND, CANCEL),
+        burst: Optional[int] = None,
+    ):
+        """
+        :param sub_rate: 每个子账户每周期允许的订单笔数。
+        :param period: 周期（秒）。
+        :param master_rate: （可选）同一母账户下所有子账户合计的每周期笔数，None 表示不限制。
+        :param cancel_reserve: 为撤单保留的桶容量（burst）比例，新单和改单不会占用这部分额度。
+        :param counted: 计入配额的请求类别。官方规则中子账户限速只统计下单和改单，
+                        如需与之完全一致可传 (PLACE, AMEND)。
+        :param burst: （可选）每个配额桶允许的瞬时突发笔数，默认为每周期笔数的 1/10（至少 20，
+                      可容纳一次完整的批量请求）。突发越大，持续速率越低（见 limiter._GcraBucket）。
+        """
+        if not 0 <= cancel_reserve < 1:
+            raise ValueError("cancel_reserve must be in [0, 1).")
+        self.sub_rate = sub_rate
+        self.period = period
+        self.master_rate = master_rate
+        self.cancel_reserve = cancel_reserve
+        self.counted = frozenset(counted)
+        self.burst = burst
+
+        self._accounts: Dict[str, _Account] = {}
+        self._masters: Dict[str, _Account] = {}
+        self._lock = threading.Lock()
+
+    def register(
+        self,
+        api_key: str,
+        sub_account: Optional[str] = None,
+        master: Optional[str] = None,
+    ):
+        """
+        声明 API Key 所属的子账户和母账户；未注册的 API Key 视为独立的子账户，不参与母账户汇总。
+        """
+        with self._lock:
+            self._accounts[api_key] = self._new_account(api_key, sub_account, master)
+
+    def _new_account(
+        self, api_key: str, sub_account: Optional[str], master: Optional[str]
+    ) -> _Account:
+        master_account = None
+        if master is not None and self.master_rate:
+            master_account = self._masters.get(master)
+            if master_account is None:
+                bucket = self._new_bucket(self.master_rate, f"quota::{master}")
+                master_account = _Account(master, bucket, None)
+                self._masters[master] = master_account
+        name = sub_account or api_key
+        bucket = self._new_bucket(self.sub_rate, f"quota::{name}")
+        return _Account(name, bucket, master_account)
+
+    def _new_bucket(self, rate: int, name: str) -> _GcraBucket:
+        burst = self.burst or max(min(rate, _MAX_BATCH), rate // 10)
+        return _GcraBucket(rate, self.period, name=name, burst=min(burst, rate))
+
+    def _account(self, api_key: str) -> _Account:
+        account = self._accounts.get(api_key)
+        if account is None:
+            with self._lock:
+                account = self._accounts.get(api_key)
+                if account is None:
+                    account = self._new_account(api_key, None, None)
+                    self._accounts[api_key] = account
+        return account
+
+    def _kind(self, method: str, request_path: str) -> Optional[str]:
+        kind = ORDER_QUOTA_REQUESTS.get((method, request_path))
+        return kind if kind in self.counted else None
+
+    def _reserve(
+        self, kind: str, params: Union[Dict, List[Dict]], api_key: str
+    ) -> float:
+        """
+        尝试为一次请求获取配额，返回需要等待的秒数，<= 0 表示已获取。
+
+        撤单直接预约（排在所有新单之前），返回值为预约后的等待时间；
+        新单和改单只在额度（扣除撤单保留部分）足够时才扣减，否则不占用额度，
+        返回建议的等待时间，由调用方等待后重试，因此不会挤占随后到达的撤单。
+        """
+        tokens = _request_cost(params)
+        account = self._account(api_key)
+        buckets = [account.bucket]
+        if account.master is not None:
+            buckets.append(account.master.bucket)
+        with self._lock:
+            now = time.monotonic()
+            if kind != CANCEL:
+                wait = max(b._peek(tokens, now, self._headroom(b)) for b in buckets)
+                if wait > 0:
+                    return wait
+            wait = max(b._reserve(tokens, now) for b in buckets)
+            account.counts[kind] += tokens
+            if account.master is not None:
+                account.master.counts[kind] += tokens
+        return wait
+
+    def acquire(
+        self,
+        request_path: str,
+        params: Union[Dict, List[Dict]],
+        api_key: str,
+        method: str = c.POST,
+    ):
+        """同步获取配额，由 SyncRateLimiterManager 在接口限速之后调用。"""
+        kind = self._kind(method, request_path)
+        if kind is None:
+            return
+        while True:
+            wait_time = self._reserve(kind, params, api_key)
+            if wait_time > 0:
+                time.sleep(wait_time)
+            if wait_time <= 0 or kind == CANCEL:
+                return
+
+    async def async_acquire(
+        self,
+        request_path: str,
+        params: Union[Dict, List[Dict]],
+        api_key: str,
+        method: str = c.POST,
+    ):
+        """异步获取配额，由 AsyncRateLimiterManager 在接口限速之后调用。"""
+        kind = self._kind(method, request_path)
+        if kind is None:
+            return
+        while True:
+            wait_time = self._reserve(kind, params, api_key)
+            if wait_time > 0:
+                await asyncio.sleep(wait_time)
+            if wait_time <= 0 or kind == CANCEL:
+                return
+
+    def _headroom(self, bucket: _GcraBucket) -> float:
+        """新单和改单不能占用的余量（笔数）。"""
+        return bucket.burst * self.cancel_reserve
+
+    def remaining(self, api_key: str) -> Dict[str, Optional[float]]:
+        """
+        当前剩余额度（笔数）。
+        :return: {'sub': 子账户剩余, 'master': 母账户剩余或 None, 'place': 新单/改单可用的剩余}
+        """
+        account = self._account(api_key)
+        sub = account.bucket.available
+        master = account.master.bucket.available if account.master is not None else None
+        place = sub - self._headroom(account.bucket)
+        if master is not None:
+            place = min(place, master - self._headroom(account.master.bucket))
+        return {"sub": sub, "master": master, "place": max(place, 0.0)}
+
+    def near_cap(self, api_key: str) -> bool:
+        """新单和改单的额度是否已经用完（只剩撤单保留额度）。"""
+        return self.remaining(api_key)["place"] < 1
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """各子账户、母账户按类别累计的订单笔数。"""
+        with self._lock:
+            result = {a.name: dict(a.counts) for a in self._accounts.values()}
+            for m in self._masters.values():
+                result[f"master:{m.name}"] = dict(m.counts)
+        return result
@@ -58,8 +58,12 @@ from okxx.rest.SubAccount import SubAccountAPI
 from okxx.rest.Trade import TradeAPI
 from okxx.rest.TradingData import TradingDataAPI
 
+from okxx.cache import ResponseCache
 from okxx.consts import API_URL
-from typing import Optional
+from okxx.limiter import SyncRateLimiterManager
+from typing import Optional, Union
+
+import httpx
 
 
 class RestAPI:
@@ -77,6 +81,14 @@ class RestAPI:
         domain: str = API_URL,
         debug: bool = False,
         proxy: Optional[str] = None,
+        limiter_manager: Optional[SyncRateLimiterManager] = None,
+        low_priority_concurrency: Optional[int] = None,
+        single_flight: bool = True,
+        cache: Optional[ResponseCache] = None,
+        limits: Optional[httpx.Limits] = None,
+        timeout: Union[float, httpx.Timeout, None] = None,
+        prewarm: bool = False,
+        keepalive_interval: Optional[float] = None,
     ):
         """
         初始化SDK客户端。
@@ -88,10 +100,35 @@ class RestAPI:
         :param domain: API请求的域名。默认为 'https://www.okx.com'。
         :param debug: 是否开启调试模式，开启后会打印详细的请求日志。
         :param proxy: （可选）代理服务器地址，例如 'http://127.0.0.1:7890'。
+        :param limiter_manager: （可选）共享的限速管理器，可配合 shared_limiter.SharedMemoryBackend
+                                让多个进程共用同一组令牌桶。
+        :param low_priority_concurrency: （可选）查询、回补等低优先级请求的最大并发数，
+                                         为交易请求保留连接。
+        :param single_flight: 是否合并同时在途的相同公共GET请求，默认开启。
+        :param cache: （可选）cache.ResponseCache 实例，缓存产品信息、币种列表等慢变化接口的响应。
+        :param limits: （可选）httpx.Limits 连接池配置，默认 connection.DEFAULT_LIMITS。
+        :param timeout: （可选）超时秒数或 httpx.Timeout（可分别设置 connect / read / pool）。
+        :param prewarm: 是否在创建后立即在后台建立连接，默认关闭。
+        :param keepalive_interval: （可选）连接空闲超过该秒数时发送保活请求，默认不保活
+                                   （推荐值 connection.DEFAULT_KEEPALIVE_INTERVAL）。
         """
         # 创建一个共享的底层HTTP请求客户端
         self._client = OkxClient(
-            api_key, api_secret_key, passphrase, flag, domain, debug, proxy
+            api_key,
+            api_secret_key,
+            passphrase,
+            flag,
+            domain,
+            debug,
+            proxy,
+            limiter_manager=limiter_manager,
+            low_priority_concurrency=low_priority_concurrency,
+            single_flight=single_flight,
+            cache=cache,
+            limits=limits,
+            timeout=timeout,
+            prewarm=prewarm,
+            keepalive_interval=keepalive_interval,
         )
 
         # 将各个功能模块实例化为RestAPI的属性
@@ -0,0 +1,331 @@
+# okx/shared_limiter.py
+"""
+跨进程共享的限速状态
+
+同一台机器上的多个工作进程共用一个 API Key / IP 时，各进程独立的限速器会导致
+要么预留过多余量，要么触发 50011。本模块把每个令牌桶的状态（GCRA 的 TAT，一个 float64）
+放在 mmap 映射的共享文件中，所有进程按 _build_dynamic_key 生成的键共用同一个桶。
+
+- 表结构：文件头 + 固定数量的槽位，每个槽位为 (键哈希 uint64, TAT float64)，开放寻址；
+- 预约令牌时持有 fcntl 文件锁，临界区只有一次读和一次写，单次 acquire 开销在微秒级；
+- flock 锁属于打开的文件描述，fork 出的子进程会与父进程共用同一个描述而失去互斥，
+  因此子进程中会通过 os.register_at_fork 重新打开共享文件（运行期间不要删除该文件）；
+- 表满时回收已空闲（令牌已完全恢复）的槽位，各进程在预约时校验槽位仍属于自己的键，
+  被回收后重新查找槽位；没有可回收的槽位时退回进程内限速器并记录错误日志；
+- 时间基准为 time.monotonic()，同一台主机上的所有进程共享同一时钟；
+- 仅支持类 Unix 系统（需要 fcntl）。
+
+使用示例:
+    from okxx.limiter import SyncRateLimiterManager
+    from okxx.shared_limiter import SharedMemoryBackend
+
+    backend = SharedMemoryBackend('/dev/shm/okxx-limiter')
+    api = RestAPI(..., limiter_manager=SyncRateLimiterManager(backend=backend))
+"""
+
+import hashlib
+import mmap
+import os
+import struct
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+from loguru import logger
+
+from okxx.limiter import (
+    AsyncTokenBucketLimiter,
+    SyncTokenBucketLimiter,
+    _GcraBucket,
+)
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - 仅类 Unix 系统可用
+    fcntl = None
+
+DEFAULT_PATH = (
+    "/dev/shm/okxx-limiter" if os.path.isdir("/dev/shm") else "/tmp/okxx-limiter"
+)
+
+_MAGIC = b"OKXL"
+_VERSION = 1
+# magic, version, 保留, 槽位数
+_HEADER = struct.Struct("<4sHHQ")
+_HEADER_SIZE = 64
+
+
+def _key_hash(key: str) -> int:
+    """64 位键哈希，0 表示空槽位。"""
+    digest = hashlib.blake2b(key.encode(), digest_size=8).digest()
+    value = int.from_bytes(digest, "little")
+    return value or 1
+
+
+# 当前进程中打开的表，fork 后在子进程中重新打开
+_open_tables: "weakref.WeakSet[SharedLimiterTable]" = weakref.WeakSet()
+
+
+def _reopen_after_fork():
+    for table in list(_open_tables):
+        table._after_fork()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reopen_after_fork)
+
+
+class SharedLimiterTable:
+    """mmap 共享文件中的令牌桶状态表。"""
+
+    def __init__(self, path: str = DEFAULT_PATH, slots: int = 4096):
+        """
+        :param path: 共享文件路径，所有进程必须使用同一路径；建议放在 /dev/shm 下。
+        :param slots: 槽位数量（即可容纳的桶数量），仅在首次创建文件时生效。
+        """
+        if fcntl is None:
+            raise RuntimeError("SharedLimiterTable requires fcntl (Unix only).")
+        self.path = path
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        self._thread_lock = threading.Lock()
+        with self._file_lock():
+            if os.fstat(self._fd).st_size == 0:
+                os.ftruncate(self._fd, _HEADER_SIZE + 16 * slots)
+                os.pwrite(self._fd, _HEADER.pack(_MAGIC, _VERSION, 0, slots), 0)
+            magic, version, _, slots = _HEADER.unpack(os.pread(self._fd, _HEADER.size, 0))
+        if magic != _MAGIC or version != _VERSION:
+            os.close(self._fd)
+            raise ValueError(
+                f"{path} is not a limiter table (magic={magic!r}, version={version})."
+            )
+        self.slots = slots
+        self._mm = mmap.mmap(self._fd, _HEADER_SIZE + 16 * slots)
+        view = memoryview(self._mm)
+        self._keys = view[_HEADER_SIZE : _HEADER_SIZE + 8 * slots].cast("Q")
+        self._tats = view[_HEADER_SIZE + 8 * slots :].cast("d")
+        self._index: Dict[str, int] = {}
+        self.reclaimed = 0
+        self.overflowed = 0
+        _open_tables.add(self)
+
+    def _after_fork(self):
+        """
+        子进程中调用：继承的描述与父进程共用 flock 锁，需要重新打开文件获得独立的描述；
+        fork 时可能有其他线程持有线程锁，一并重建。
+        """
+        self._thread_lock = threading.Lock()
+        inherited = self._fd
+        try:
+            self._fd = os.open(self.path, os.O_RDWR)
+        except OSError as e:
+            logger.error(f"Failed to reopen shared limiter table {self.path} after fork: {e}")
+            return
+        os.close(inherited)
+
+    @contextmanager
+    def _file_lock(self):
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    @contextmanager
+    def locked(self):
+        """进程内（线程锁）+ 进程间（文件锁）互斥。"""
+        with self._thread_lock:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def slot_for(self, key: str) -> Optional[int]:
+        """
+        返回键对应的槽位，首次使用时在表中登记；表已满且没有空闲槽位时返回 None。
+        """
+        slot = self._index.get(key)
+        if slot is not None and self._keys[slot] == _key_hash(key):
+            return slot
+        with self.locked():
+            slot = self._find(_key_hash(key), time.monotonic())
+        if slot is None:
+            self.overflowed += 1
+            self._index.pop(key, None)
+        else:
+            self._index[key] = slot
+        return slot
+
+    def _find(self, h: int, now: float) -> Optional[int]:
+        """
+        查找或登记键哈希对应的槽位（调用方需持有锁）。
+        没有空槽位时回收一个令牌已完全恢复的槽位：空闲的桶与新建的桶状态相同。
+        槽位一旦登记就不会再清空，表满后查找会扫描整张表，因此回收不会打断其他键的探测链。
+        """
+        keys = self._keys
+        tats = self._tats
+        start = h % self.slots
+        idle = None
+        for i in range(self.slots):
+            probe = (start + i) % self.slots
+            value = keys[probe]
+            if value == h:
+                return probe
+            if value == 0:
+                keys[probe] = h
+                tats[probe] = 0.0
+                return probe
+            if idle is None and tats[probe] <= now:
+                idle = probe
+        if idle is not None:
+            keys[idle] = h
+            tats[idle] = 0.0
+            self.reclaimed += 1
+        return idle
+
+    def get_tat(self, slot: int) -> float:
+        return self._tats[slot]
+
+    def set_tat(self, slot: int, value: float):
+        self._tats[slot] = value
+
+    def reset(self):
+        """清空所有桶（仅用于测试或运维）。"""
+        with self.locked():
+            for i in range(self.slots):
+                self._keys[i] = 0
+                self._tats[i] = 0.0
+        self._index.clear()
+
+    def close(self):
+        _open_tables.discard(self)
+        self._keys.release()
+        self._tats.release()
+        self._mm.close()
+        os.close(self._fd)
+
+
+class _SharedBucketMixin:
+    """把 GCRA 的 TAT 存放在共享表中，预约、退还和暂停都在跨进程锁内完成。"""
+
+    def _bind(self, table: SharedLimiterTable, slot: int):
+        self._table = table
+        self._slot = slot
+        self._hash = _key_hash(self.name)
+
+    def _own_slot(self, now: float) -> int:
+        """确认槽位仍属于本桶的键，被其他进程回收后重新查找（调用方需持有锁）。"""
+        table = self._table
+        if table._keys[self._slot] != self._hash:
+            slot = table._find(self._hash, now)
+            if slot is None:
+                # 没有可用槽位时沿用原槽位：与其他键共用状态只会限速得更保守
+                logger.error(
+                    f"Shared limiter table {table.path} is full, '{self.name}' shares a slot."
+                )
+            else:
+                self._slot = slot
+        return self._slot
+
+    @property
+    def _tat(self) -> float:
+        return self._table.get_tat(self._slot)
+
+    @_tat.setter
+    def _tat(self, value: float):
+        # _GcraBucket.__init__ 会把 TAT 初始化为 0，绑定槽位前忽略
+        if hasattr(self, "_slot"):
+            self._table.set_tat(self._slot, value)
+
+    def _reserve(self, tokens: int, now: float, headroom: float = 0.0) -> float:
+        # 热路径：直接操作锁和共享数组，避免上下文管理器的额外开销
+        table = self._table
+        tats = table._tats
+        slot = self._slot
+        with table._thread_lock:
+            fcntl.flock(table._fd, fcntl.LOCK_EX)
+            try:
+                if table._keys[slot] != self._hash:
+                    slot = self._own_slot(now)
+                tat = tats[slot]
+                if tat < now:
+                    tat = now
+                tat += tokens * self._interval
+                tats[slot] = tat
+            finally:
+                fcntl.flock(table._fd, fcntl.LOCK_UN)
+        return tat - self._tolerance + headroom * self._interval - now
+
+    def _try_reserve(self, tokens: int, now: float, headroom: float = 0.0) -> float:
+        with self._table.locked():
+            self._own_slot(now)
+            wait = self._peek(tokens, now, headroom)
+            if wait > 0:
+                return wait
+            # 已持有锁，直接调用基类的预约逻辑
+            _GcraBucket._reserve(self, tokens, now)
+            return 0.0
+
+    def _refund(self, tokens: int):
+        with self._table.locked():
+            slot = self._own_slot(time.monotonic())
+            self._table._tats[slot] -= tokens * self._interval
+
+    def pause(self, seconds: float):
+        with self._table.locked():
+            now = time.monotonic()
+            slot = self._own_slot(now)
+            tats = self._table._tats
+            tats[slot] = max(tats[slot], now + seconds + self._tolerance)
+
+
+class SharedSyncTokenBucketLimiter(_SharedBucketMixin, SyncTokenBucketLimiter):
+    """状态保存在共享表中的同步令牌桶。"""
+
+
+class SharedAsyncTokenBucketLimiter(_SharedBucketMixin, AsyncTokenBucketLimiter):
+    """状态保存在共享表中的异步令牌桶。"""
+
+
+class SharedMemoryBackend:
+    """
+    供 SyncRateLimiterManager / AsyncRateLimiterManager 使用的共享内存后端。
+    表已满且没有可回收的槽位时退回到进程内限速器（不再跨进程共享）并记录错误日志，
+    此时应增大 slots。
+    """
+
+    def __init__(self, path: str = DEFAULT_PATH, slots: int = 4096):
+        self.table = SharedLimiterTable(path, slots)
+
+    def _create(
+        self, shared_cls, local_cls, rate: int, period: int, name: str, burst: Optional[int]
+    ):
+        slot = self.table.slot_for(name)
+        if slot is None:
+            logger.error(
+                f"Shared limiter table {self.table.path} is full ({self.table.slots} slots), "
+                f"'{name}' falls back to a process-local limiter; increase slots."
+            )
+            return local_cls(rate, period, name=name, burst=burst)
+        limiter = shared_cls(rate, period, name=name, burst=burst)
+        limiter._bind(self.table, slot)
+        return limiter
+
+    def sync_limiter(
+        self, rate: int, period: int, name: str, burst: Optional[int] = None
+    ) -> SyncTokenBucketLimiter:
+        return self._create(
+            SharedSyncTokenBucketLimiter, SyncTokenBucketLimiter, rate, period, name, burst
+        )
+
+    def async_limiter(
+        self, rate: int, period: int, name: str, burst: Optional[int] = None
+    ) -> AsyncTokenBucketLimiter:
+        return self._create(
+            SharedAsyncTokenBucketLimiter, AsyncTokenBucketLimiter, rate, period, name, burst
+        )
+
+    def close(self):
+        self.table.close()
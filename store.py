@@ -0,0 +1,414 @@
+# okx/store.py
+"""
+本地K线/成交存储
+
+把历史数据按 产品/周期/自然日(UTC) 切分为列式二进制段文件保存在本地，重启后直接内存映射读取，
+不再重复下载：
+    <root>/candles/<instId>/<bar>/<YYYY-MM-DD>.bin
+    <root>/trades/<instId>/<YYYY-MM-DD>.bin
+
+段文件格式：16字节文件头（魔数、版本、列数、行数）后紧跟各列的连续数据，
+每列均为8字节定长（int64 或 float64），按时间升序排列。读取时通过 mmap + memoryview
+直接映射为类型化视图，不复制数据；安装了 numpy 时可用 Segment.array() 得到零拷贝的 ndarray。
+
+incremental_sync() 只请求比本地最后一条记录更新的数据。
+
+使用示例:
+    from okxx.store import CandleStore
+
+    store = CandleStore('./data')
+    store.incremental_sync(api.market_data, 'BTC-USDT', '1m', since=1704067200000)
+    for segment in store.read('BTC-USDT', '1m', start=..., end=...):
+        closes = segment.column('close')   # memoryview('d')，零拷贝
+"""
+
+import abc
+import datetime
+import mmap
+import os
+import struct
+import tempfile
+from array import array
+from typing import Any, Dict, Generator, Iterator, List, Optional, Sequence, Tuple
+
+from loguru import logger
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - 可选依赖
+    np = None
+
+_MAGIC = b"OKXS"
+_VERSION = 1
+_HEADER = struct.Struct("<4sHHQ")  # magic, version, ncols, nrows
+
+# 列名 -> array 类型码
+CANDLE_COLUMNS: Tuple[Tuple[str, str], ...] = (
+    ("ts", "q"),
+    ("open", "d"),
+    ("high", "d"),
+    ("low", "d"),
+    ("close", "d"),
+    ("volume", "d"),
+)
+TRADE_COLUMNS: Tuple[Tuple[str, str], ...] = (
+    ("ts", "q"),
+    ("tradeId", "q"),
+    ("px", "d"),
+    ("sz", "d"),
+    ("side", "q"),  # 1 = buy, -1 = sell
+)
+
+
+def _day_of(ts_ms: int) -> str:
+    return datetime.datetime.fromtimestamp(
+        ts_ms // 1000, tz=datetime.timezone.utc
+    ).strftime("%Y-%m-%d")
+
+
+class Segment:
+    """
+    一个内存映射的段文件，各列以类型化 memoryview 的形式暴露，不复制数据。
+    使用完毕后调用 close()，或使用 with 语句。
+    """
+
+    def __init__(self, path: str, columns: Tuple[Tuple[str, str], ...]):
+        self.path = path
+        self._columns = columns
+        self._file = open(path, "rb")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, ncols, nrows = _HEADER.unpack_from(self._mmap, 0)
+        if magic != _MAGIC or version != _VERSION or ncols != len(columns):
+            self.close()
+            raise ValueError(f"Invalid segment file: {path}")
+        self.nrows = nrows
+        self._views: Dict[str, memoryview] = {}
+        self._buf = memoryview(self._mmap)
+        offset = _HEADER.size
+        for name, typecode in columns:
+            self._views[name] = self._buf[offset : offset + nrows * 8].cast(typecode)
+            offset += nrows * 8
+
+    def __len__(self) -> int:
+        return self.nrows
+
+    def column(self, name: str) -> memoryview:
+        """返回某一列的类型化视图（'q' 或 'd'）。"""
+        return self._views[name]
+
+    def array(self, name: str):
+        """返回某一列的零拷贝 numpy 数组（需要安装 numpy）。"""
+        if np is None:
+            raise ImportError("Segment.array() requires numpy.")
+        return np.frombuffer(self._views[name], dtype=self._views[name].format)
+
+    def close(self):
+        """
+        释放映射。如果仍有 numpy 数组等对象引用着这些列，映射会在它们被回收后自动释放。
+        """
+        try:
+            for view in getattr(self, "_views", {}).values():
+                view.release()
+            if getattr(self, "_buf", None) is not None:
+                self._buf.release()
+            if self._mmap is not None:
+                self._mmap.close()
+        except BufferError:
+            pass
+        self._views = {}
+        self._buf = None
+        self._mmap = None
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def _read_rows(path: str, columns) -> List[array]:
+    """把段文件完整读入内存（仅在合并写入时使用）。"""
+    with open(path, "rb") as f:
+        data = f.read()
+    _magic, _version, _ncols, nrows = _HEADER.unpack_from(data, 0)
+    result = []
+    offset = _HEADER.size
+    for _name, typecode in columns:
+        col = array(typecode)
+        col.frombytes(data[offset : offset + nrows * 8])
+        result.append(col)
+        offset += nrows * 8
+    return result
+
+
+def _write_segment(path: str, columns, cols: Sequence[array]):
+    """
+    原子地写入段文件：先在同一目录下写唯一命名的临时文件再替换，
+    多个进程 / 线程同时写同一天的段文件时不会互相覆盖临时文件。
+    """
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".okxx-seg-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(_HEADER.pack(_MAGIC, _VERSION, len(columns), len(cols[0])))
+            for col in cols:
+                f.write(col.tobytes())
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+# 分页同步生成器：yield 请求参数，接收 send() 回来的一页数据，结束时返回写入的行数。
+# 同步和异步版本共用同一个生成器，只是驱动它的循环不同。
+_Pager = Generator[Dict[str, str], Any, int]
+
+
+def _drive(pager: _Pager, fetch) -> int:
+    try:
+        params = next(pager)
+        while True:
+            params = pager.send(fetch(**params))
+    except StopIteration as stop:
+        return stop.value
+
+
+async def _async_drive(pager: _Pager, fetch) -> int:
+    try:
+        params = next(pager)
+        while True:
+            params = pager.send(await fetch(**params))
+    except StopIteration as stop:
+        return stop.value
+
+
+class _ColumnStore(abc.ABC):
+    """按自然日切分的列式段文件存储。"""
+
+    columns: Tuple[Tuple[str, str], ...] = ()
+    # 用于去重的列序号（同一个键只保留最新写入的一行）
+    key_column = 0
+
+    def __init__(self, root: str):
+        self.root = root
+
+    @abc.abstractmethod
+    def _dir(self, *parts: str) -> str:
+        """键对应的段文件目录。"""
+
+    def days(self, *parts: str) -> List[str]:
+        directory = self._dir(*parts)
+        if not os.path.isdir(directory):
+            return []
+        return sorted(
+            name[:-4] for name in os.listdir(directory) if name.endswith(".bin")
+        )
+
+    def last_ts(self, *parts: str) -> Optional[int]:
+        """本地最后一条记录的时间戳，没有数据时返回 None。"""
+        for day in reversed(self.days(*parts)):
+            path = os.path.join(self._dir(*parts), day + ".bin")
+            with Segment(path, self.columns) as seg:
+                if len(seg):
+                    return seg.column("ts")[-1]
+        return None
+
+    def write(self, parts: Tuple[str, ...], rows: Sequence[Sequence]):
+        """
+        写入已转换为数值的行（任意顺序），按自然日合并进对应的段文件。
+        """
+        by_day: Dict[str, List[Sequence]] = {}
+        for row in rows:
+            by_day.setdefault(_day_of(row[0]), []).append(row)
+
+        for day, day_rows in by_day.items():
+            path = os.path.join(self._dir(*parts), day + ".bin")
+            merged: Dict[int, Tuple] = {}
+            if os.path.exists(path):
+                existing = _read_rows(path, self.columns)
+                for i in range(len(existing[0])):
+                    row = tuple(col[i] for col in existing)
+                    merged[row[self.key_column]] = row
+            for row in day_rows:
+                merged[row[self.key_column]] = tuple(row)
+            ordered = sorted(merged.values(), key=lambda r: (r[0], r[self.key_column]))
+            cols = [
+                array(typecode, (row[i] for row in ordered))
+                for i, (_name, typecode) in enumerate(self.columns)
+            ]
+            _write_segment(path, self.columns, cols)
+
+    def read(
+        self, *parts: str, start: Optional[int] = None, end: Optional[int] = None
+    ) -> Iterator[Segment]:
+        """
+        按时间顺序逐个映射覆盖 [start, end) 的段文件。
+        段以自然日为粒度，首尾两段可能包含区间外的数据，可按 ts 列自行截取。
+        """
+        start_day = _day_of(start) if start is not None else None
+        end_day = _day_of(end - 1) if end is not None else None
+        for day in self.days(*parts):
+            if start_day is not None and day < start_day:
+                continue
+            if end_day is not None and day > end_day:
+                break
+            yield Segment(os.path.join(self._dir(*parts), day + ".bin"), self.columns)
+
+
+class CandleStore(_ColumnStore):
+    """K线存储，键为 (instId, bar)。"""
+
+    columns = CANDLE_COLUMNS
+
+    def _dir(self, instId: str, bar: str) -> str:
+        return os.path.join(self.root, "candles", instId, bar)
+
+    @staticmethod
+    def _parse(rows: Sequence[Sequence[str]]) -> List[Tuple]:
+        """只保留已完结的K线（confirm='1'），未完结的K线在下一次同步时重新获取。"""
+        parsed = []
+        for row in rows:
+            if row[-1] != "1":
+                continue
+            volume = float(row[5]) if len(row) >= 9 else float("nan")
+            parsed.append(
+                (
+                    int(row[0]),
+                    float(row[1]),
+                    float(row[2]),
+                    float(row[3]),
+                    float(row[4]),
+                    volume,
+                )
+            )
+        return parsed
+
+    def _pages(self, instId: str, bar: str, since: Optional[int], limit: int) -> _Pager:
+        last = self.last_ts(instId, bar)
+        floor = last if last is not None else (since - 1 if since is not None else None)
+        if floor is None:
+            raise ValueError(f"No local data for {instId} {bar}; 'since' is required.")
+
+        collected: List[Sequence[str]] = []
+        after = None
+        while True:
+            params = {"instId": instId, "bar": bar, "limit": str(limit)}
+            if after is not None:
+                params["after"] = after
+            rows = yield params
+            if not rows:
+                break
+            fresh = [row for row in rows if int(row[0]) > floor]
+            collected.extend(fresh)
+            if len(fresh) < len(rows):
+                break
+            after = rows[-1][0]
+
+        parsed = self._parse(collected)
+        if parsed:
+            self.write((instId, bar), parsed)
+        logger.debug(f"Synced {len(parsed)} candles for {instId} {bar}")
+        return len(parsed)
+
+    def incremental_sync(
+        self,
+        market_api,
+        instId: str,
+        bar: str,
+        since: Optional[int] = None,
+        method: str = "get_history_candlesticks",
+        limit: int = 100,
+    ) -> int:
+        """
+        只下载比本地最后一条记录更新的K线并写入存储。
+
+        :param market_api: MarketAPI 实例。
+        :param since: 本地没有数据时的起始时间戳（毫秒）。
+        :param method: 使用的 MarketAPI K线方法。
+        :return: 新写入的行数。
+        """
+        pager = self._pages(instId, bar, since, limit)
+        return _drive(pager, getattr(market_api, method))
+
+    async def async_incremental_sync(
+        self,
+        market_api,
+        instId: str,
+        bar: str,
+        since: Optional[int] = None,
+        method: str = "get_history_candlesticks",
+        limit: int = 100,
+    ) -> int:
+        """incremental_sync 的异步版本，market_api 为 AsyncMarketAPI 实例。"""
+        pager = self._pages(instId, bar, since, limit)
+        return await _async_drive(pager, getattr(market_api, method))
+
+
+class TradeStore(_ColumnStore):
+    """成交存储，键为 instId，按 tradeId 去重。"""
+
+    columns = TRADE_COLUMNS
+    key_column = 1
+
+    def _dir(self, instId: str) -> str:
+        return os.path.join(self.root, "trades", instId)
+
+    @staticmethod
+    def _parse(rows: Sequence[Dict[str, str]]) -> List[Tuple]:
+        return [
+            (
+                int(row["ts"]),
+                int(row["tradeId"]),
+                float(row["px"]),
+                float(row["sz"]),
+                1 if row["side"] == "buy" else -1,
+            )
+            for row in rows
+        ]
+
+    def _pages(self, instId: str, since: Optional[int], limit: int) -> _Pager:
+        last = self.last_ts(instId)
+        floor = last if last is not None else (since - 1 if since is not None else None)
+        if floor is None:
+            raise ValueError(f"No local data for {instId}; 'since' is required.")
+
+        collected: List[Dict[str, str]] = []
+        params: Dict[str, str] = {}
+        while True:
+            rows = yield {"instId": instId, "limit": str(limit), **params}
+            if not rows:
+                break
+            # 同一毫秒的成交可能跨越两次同步，保留 ts == floor 的记录，由 tradeId 去重
+            fresh = [row for row in rows if int(row["ts"]) >= floor]
+            collected.extend(fresh)
+            if len(fresh) < len(rows):
+                break
+            params = {"type": "1", "after": rows[-1]["tradeId"]}
+
+        parsed = self._parse(collected)
+        if parsed:
+            self.write((instId,), parsed)
+        logger.debug(f"Synced {len(parsed)} trades for {instId}")
+        return len(parsed)
+
+    def incremental_sync(
+        self, market_api, instId: str, since: Optional[int] = None, limit: int = 100
+    ) -> int:
+        """
+        只下载比本地最后一条记录更新的成交并写入存储。
+
+        :param market_api: MarketAPI 实例。
+        :param since: 本地没有数据时的起始时间戳（毫秒）。
+        :return: 新写入的行数。
+        """
+        pager = self._pages(instId, since, limit)
+        return _drive(pager, market_api.get_history_trades)
+
+    async def async_incremental_sync(
+        self, market_api, instId: str, since: Optional[int] = None, limit: int = 100
+    ) -> int:
+        """incremental_sync 的异步版本，market_api 为 AsyncMarketAPI 实例。"""
+        pager = self._pages(instId, since, limit)
+        return await _async_drive(pager, market_api.get_history_trades)
@@ -0,0 +1,224 @@
+# okx/telemetry.py
+"""
+限速器遥测
+
+记录每个令牌桶的获取次数、令牌数、等待时间分布（HDR 风格的对数分桶直方图）和当前利用率，
+可导出为 Python 字典快照或 Prometheus 文本格式，用于判断延迟来自本地限速器还是 OKX 服务端。
+
+使用示例:
+    from okxx.limiter import AsyncRateLimiterManager
+
+    manager = AsyncRateLimiterManager(telemetry=True)
+    api = AsyncRestAPI(..., limiter_manager=manager)
+    ...
+    print(manager.snapshot()['top_contended'])
+    print(manager.prometheus())
+"""
+
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# 直方图精度：每个 2 的幂区间再细分为 16 档（相对误差约 6%），最小分辨率 1 微秒
+_SUB_BUCKETS = 16
+_SUB_BITS = 5  # log2(2 * _SUB_BUCKETS)
+
+# Prometheus 导出时使用的直方图上界（秒）
+PROMETHEUS_BUCKETS = (0.0001, 0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0)
+
+
+class WaitHistogram:
+    """
+    对数-线性分桶的等待时间直方图，内存与记录次数无关。
+    """
+
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self):
+        self.counts: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    @staticmethod
+    def _index(micros: int) -> int:
+        magnitude = micros.bit_length() - _SUB_BITS
+        if magnitude <= 0:
+            return micros
+        return (magnitude + 1) * _SUB_BUCKETS + (micros >> magnitude) - _SUB_BUCKETS
+
+    @staticmethod
+    def _lower_bound(index: int) -> int:
+        if index < 2 * _SUB_BUCKETS:
+            return index
+        magnitude = index // _SUB_BUCKETS - 1
+        return (index - magnitude * _SUB_BUCKETS) << magnitude
+
+    def record(self, seconds: float):
+        micros = int(seconds * 1_000_000) if seconds > 0 else 0
+        index = self._index(micros)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, q: float) -> float:
+        """返回第 q 百分位（0-100）的等待时间（秒），取所在分桶的下界。"""
+        if not self.count:
+            return 0.0
+        target = max(1, int(self.count * q / 100 + 0.5))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= target:
+                return self._lower_bound(index) / 1_000_000
+        return self.max
+
+    def cumulative(self, bounds: Iterable[float]) -> List[Tuple[float, int]]:
+        """按给定上界（秒）统计累计次数，用于导出 Prometheus 直方图。"""
+        items = sorted(
+            (self._lower_bound(i) / 1_000_000, n) for i, n in self.counts.items()
+        )
+        result = []
+        seen = 0
+        pos = 0
+        for bound in bounds:
+            while pos < len(items) and items[pos][0] <= bound:
+                seen += items[pos][1]
+                pos += 1
+            result.append((bound, seen))
+        return result
+
+
+class _BucketStats:
+    __slots__ = ("limiter", "acquires", "tokens", "waited", "hist")
+
+    def __init__(self, limiter):
+        self.limiter = limiter
+        self.acquires = 0
+        self.tokens = 0
+        # 发生实际等待（>= 1 毫秒）的次数
+        self.waited = 0
+        self.hist = WaitHistogram()
+
+
+class LimiterTelemetry:
+    """
+    限速器遥测数据收集器，由限速管理器在每次 acquire 后调用 record()。
+    """
+
+    def __init__(self, wait_threshold: float = 0.001):
+        """
+        :param wait_threshold: 等待时间超过该值（秒）才计为一次“被限速”。
+        """
+        self.wait_threshold = wait_threshold
+        self._buckets: Dict[str, _BucketStats] = {}
+        self._lock = threading.Lock()
+
+    def record(self, limiter, tokens: int, wait: float):
+        with self._lock:
+            stats = self._buckets.get(limiter.name)
+            if stats is None:
+                stats = _BucketStats(limiter)
+                self._buckets[limiter.name] = stats
+            stats.acquires += 1
+            stats.tokens += tokens
+            if wait >= self.wait_threshold:
+                stats.waited += 1
+            stats.hist.record(wait)
+
+    def forget(self, name: str):
+        """删除某个桶的统计数据（桶被回收时调用）。"""
+        with self._lock:
+            self._buckets.pop(name, None)
+
+    @staticmethod
+    def _utilization(limiter) -> float:
+        return 1.0 - limiter.available / limiter.burst
+
+    def snapshot(self, top: int = 10) -> Dict[str, Any]:
+        """
+        当前统计数据。
+        :param top: top_contended 中返回的桶数量，按累计等待时间排序。
+        """
+        with self._lock:
+            items = list(self._buckets.items())
+        buckets = {}
+        for name, stats in items:
+            hist = stats.hist
+            buckets[name] = {
+                "acquires": stats.acquires,
+                "tokens": stats.tokens,
+                "waited": stats.waited,
+                "wait_total": hist.total,
+                "wait_max": hist.max,
+                "wait_p50": hist.percentile(50),
+                "wait_p99": hist.percentile(99),
+                "wait_p999": hist.percentile(99.9),
+                "rate": stats.limiter.rate_limit,
+                "period": stats.limiter.period,
+                "utilization": self._utilization(stats.limiter),
+            }
+        contended = sorted(
+            (n for n in buckets if buckets[n]["waited"]),
+            key=lambda n: buckets[n]["wait_total"],
+            reverse=True,
+        )
+        return {"buckets": buckets, "top_contended": contended[:top]}
+
+    def prometheus(self, prefix: str = "okxx_limiter") -> str:
+        """导出为 Prometheus 文本格式。"""
+        with self._lock:
+            items = list(self._buckets.items())
+        lines = [
+            f"# HELP {prefix}_acquires_total Number of acquire calls per bucket.",
+            f"# TYPE {prefix}_acquires_total counter",
+        ]
+        labels = {name: _labels(name) for name, _ in items}
+        for name, stats in items:
+            lines.append(f"{prefix}_acquires_total{{{labels[name]}}} {stats.acquires}")
+        lines += [
+            f"# HELP {prefix}_tokens_total Number of tokens taken per bucket.",
+            f"# TYPE {prefix}_tokens_total counter",
+        ]
+        for name, stats in items:
+            lines.append(f"{prefix}_tokens_total{{{labels[name]}}} {stats.tokens}")
+        lines += [
+            f"# HELP {prefix}_utilization Fraction of the bucket currently in use.",
+            f"# TYPE {prefix}_utilization gauge",
+        ]
+        for name, stats in items:
+            value = self._utilization(stats.limiter)
+            lines.append(f"{prefix}_utilization{{{labels[name]}}} {value:.6f}")
+        lines += [
+            f"# HELP {prefix}_wait_seconds Time spent waiting for tokens.",
+            f"# TYPE {prefix}_wait_seconds histogram",
+        ]
+        for name, stats in items:
+            hist = stats.hist
+            for bound, n in hist.cumulative(PROMETHEUS_BUCKETS):
+                lines.append(
+                    f'{prefix}_wait_seconds_bucket{{{labels[name]},le="{bound}"}} {n}'
+                )
+            lines.append(
+                f'{prefix}_wait_seconds_bucket{{{labels[name]},le="+Inf"}} {hist.count}'
+            )
+            lines.append(f"{prefix}_wait_seconds_sum{{{labels[name]}}} {hist.total:.6f}")
+            lines.append(f"{prefix}_wait_seconds_count{{{labels[name]}}} {hist.count}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(name: str) -> str:
+    path, _, key = name.partition("::")
+    return f'path="{_escape(path)}",key="{_escape(key)}"'
+
+
+def as_telemetry(value) -> Optional[LimiterTelemetry]:
+    """把管理器的 telemetry 参数（True / 实例 / None）转换为实例。"""
+    if value is True:
+        return LimiterTelemetry()
+    return value or None
@@ -1,8 +1,11 @@
 import hmac
 import base64
+import binascii
+import hashlib
 import datetime
 import logging
 import json
+import time
 from typing import Optional
 
 import httpx
@@ -36,6 +39,12 @@ def get_timestamp() -> str:
     return t + "Z"
 
 
+def format_timestamp(epoch_seconds: float) -> str:
+    """将Unix时间(秒)格式化为OKX API要求的UTC ISO 8601时间戳（毫秒精度）。"""
+    sec, ms = divmod(int(epoch_seconds * 1000), 1000)
+    return time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(sec)) + ".%03dZ" % ms
+
+
 async def get_timestamp_async() -> str:
     """异步版本：获取符合OKX API要求的UTC时区ISO 8601格式的时间戳（从服务器获取）。"""
     server_time_sec = await get_server_timestamp()
@@ -79,10 +88,56 @@ def pre_hash(timestamp: str, method: str, request_path: str, body: str) -> str:
     :return: 拼接后的待签名字符串
     """
     pre_hash_string = str(timestamp) + str.upper(method) + request_path + body
-    logger.debug(f"Pre-hash string: {pre_hash_string}")
+    logger.debug("Pre-hash string: %s", pre_hash_string)
     return pre_hash_string
 
 
+class Signer:
+    """
+    绑定到某个API Secret的HMAC-SHA256签名器。
+
+    构造时用密钥预先初始化HMAC对象，每次签名只需 copy() 一份已带密钥的内部状态，
+    省去了重复编码密钥和密钥填充的开销；结果直接以 str 返回，可直接放入请求头。
+    """
+
+    __slots__ = ("_mac",)
+
+    def __init__(self, secret_key: str):
+        """
+        :param secret_key: API Secret
+        """
+        self._mac = hmac.new(secret_key.encode("utf-8"), digestmod=hashlib.sha256)
+
+    def sign(self, timestamp: str, method: str, request_path: str, body: str) -> str:
+        """
+        对 timestamp + method + requestPath + body 签名，语义与
+        sign(pre_hash(...), secretKey) 相同。
+
+        :return: Base64编码后的签名字符串
+        """
+        mac = self._mac.copy()
+        mac.update((timestamp + method.upper() + request_path + body).encode("utf-8"))
+        return binascii.b2a_base64(mac.digest(), newline=False).decode("ascii")
+
+
+# 行情和公共数据接口，返回结果与调用者身份无关
+PUBLIC_PATH_PREFIXES = ("/api/v5/market/", "/api/v5/public/")
+
+
+def single_flight_key(
+    method: str, request_path: str, params: dict, api_key: str
+) -> Optional[str]:
+    """
+    返回可合并请求的键：只有无需签名的GET请求，或行情/公共数据接口的GET请求可以合并，
+    其余请求返回 None。
+    """
+    if method != "GET":
+        return None
+    if api_key != "-1" and not request_path.startswith(PUBLIC_PATH_PREFIXES):
+        return None
+    return request_path + parse_params_to_str(params)
+
+
 def parse_params_to_str(params: dict) -> str:
     """
     将GET请求的参数字典转换为URL查询字符串。
@@ -102,3 +157,21 @@ def parse_params_to_str(params: dict) -> str:
         url = url[:-1]
 
     return "" if url == "?" else url
+
+
+def infer_inst_type(inst_id: str) -> str:
+    """
+    根据产品ID的格式推断产品类型。
+    注意：币币(SPOT)与币币杠杆(MARGIN)的产品ID格式相同，统一返回 'SPOT'。
+
+    :param inst_id: 产品ID，如 'BTC-USDT'、'BTC-USDT-SWAP'、'BTC-USD-240329'、'BTC-USD-240329-50000-C'
+    :return: 'SPOT' / 'SWAP' / 'FUTURES' / 'OPTION'
+    """
+    parts = inst_id.split("-")
+    if parts[-1] == "SWAP":
+        return "SWAP"
+    if len(parts) == 5 and parts[-1] in ("C", "P"):
+        return "OPTION"
+    if len(parts) == 3 and parts[-1].isdigit():
+        return "FUTURES"
+    return "SPOT"
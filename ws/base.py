@@ -1,31 +1,112 @@
 # okx/ws/base.py
 import asyncio
+import itertools
 import json
 import logging
-from collections import defaultdict
-from typing import Callable, Dict, List, Optional
+from collections import defaultdict, deque
+from typing import Callable, Deque, Dict, Iterator, List, Optional, Set, Tuple
 
 import websockets
+from okxx import codec
+from okxx.exceptions import OkxWsSubscribeException
+from okxx.limiter import AsyncTokenBucketLimiter
+from okxx.ws.conflate import ConflatedView
 from okxx.ws.factory import WebSocketFactory
+from okxx.ws.queues import DEFAULT_OVERFLOW, SubscriptionQueue, check_policy
 
 logger = logging.getLogger(__name__)
 
+# 推送数据消息以 arg 开头，例如 {"arg":{"channel":"tickers","instId":"BTC-USDT"},"data":[...]}
+_ARG_PREFIX = '{"arg":'
+# 路由键使用的标识字段，按优先级排列
+_KEY_FIELDS = ("instId", "instFamily", "ccy", "instType")
+
+RouteKey = Tuple[str, str]
+
+
+def route_key(arg: Dict[str, str]) -> RouteKey:
+    """订阅参数 / 推送消息 arg 的路由键: (channel, instId / instFamily / ccy / instType)。"""
+    for field in _KEY_FIELDS:
+        value = arg.get(field)
+        if value:
+            return arg.get("channel", ""), value
+    return arg.get("channel", ""), ""
+
+
+def peek_arg(message) -> Optional[Dict[str, str]]:
+    """
+    只解析推送消息开头的 arg 对象，不解析 data。
+    消息不是以 arg 开头（例如事件消息）或无法解析时返回 None。
+    """
+    if not isinstance(message, str) or not message.startswith(_ARG_PREFIX):
+        return None
+    # arg 中只有字符串字段，第一个 '}' 就是 arg 的结尾
+    end = message.find("}", len(_ARG_PREFIX))
+    if end < 0:
+        return None
+    try:
+        return codec.loads(message[len(_ARG_PREFIX) : end + 1])
+    except ValueError:
+        return None
+
 
 class WsBaseAsync:
     """WebSocket基础客户端，处理连接、订阅和消息分发"""
 
+    # 单个(取消)订阅请求的最大字节数（OKX 限制为 64KB）
+    MAX_REQUEST_BYTES = 60 * 1024
+    # 每条连接每秒最多发送的 subscribe / unsubscribe / login 请求数
+    OP_RATE = 3
+    # 按 OP_RATE 次 / OP_PERIOD 秒发送，留出序列化和网络抖动的余量
+    OP_PERIOD = 1.2
+    # 每条连接每小时最多发送的 subscribe / unsubscribe / login 请求数
+    OPS_PER_HOUR = 480
+    # resubscribe() 等待取消订阅确认的最长时间（秒）
+    RESUBSCRIBE_ACK_TIMEOUT = 5.0
+
     def __init__(
         self,
         url: str,
         ping_interval: Optional[int] = None,
         ping_timeout: Optional[int] = None,
+        queue_size: Optional[int] = 1000,
+        overflow: Optional[Dict[str, str]] = None,
     ):
+        """
+        :param url: WebSocket服务器地址
+        :param queue_size: 每个订阅的消息队列容量，回调在独立任务中执行；None 表示在接收循环中直接调用回调。
+        :param overflow: （可选）频道 -> 队列溢出策略（block / drop_oldest / conflate），
+                         覆盖 queues.DEFAULT_OVERFLOW，未列出的频道使用 block。
+        """
         self.factory = WebSocketFactory(url, ping_interval, ping_timeout)
         self.subscriptions = defaultdict(list)  # channel -> [param1, param2]
         self.callbacks = defaultdict(list)  # channel -> [callback1, callback2]
+        # 路由索引: (channel, instId/instFamily/ccy/instType) -> [callback1, ...]
+        self.routes: Dict[RouteKey, List[Callable]] = defaultdict(list)
+        # 按路由键划分的消息队列
+        self.queue_size = queue_size
+        self.overflow = {**DEFAULT_OVERFLOW, **(overflow or {})}
+        for policy in self.overflow.values():
+            check_policy(policy)
+        self.queues: Dict[RouteKey, SubscriptionQueue] = {}
+        # 合并订阅: 路由键 -> 只保存最新消息的视图
+        self.views: Dict[RouteKey, ConflatedView] = {}
+        self._key_overflow: Dict[RouteKey, str] = {}
         self.auto_reconnect = True
         self.consumer_task = None
 
+        # (取消)订阅请求的发送节奏和确认跟踪
+        self._reset_op_limiters()
+        self._request_ids = itertools.count(1)
+        # (op, 路由键) -> 等待确认的 Future（按发送顺序）
+        self._pending: Dict[Tuple[str, RouteKey], Deque[asyncio.Future]] = defaultdict(deque)
+        # 请求 id -> 该请求中各参数的 Future，用于把 error 事件对应到请求
+        self._requests: Dict[str, List[Tuple[Dict[str, str], asyncio.Future]]] = {}
+        # 最近一次被拒绝的订阅: 路由键 -> 错误事件
+        self.subscription_errors: Dict[RouteKey, dict] = {}
+        # 已记录过警告的无匹配订阅的路由键
+        self._unmatched: Set[RouteKey] = set()
+
         # 事件处理器字典，用于优雅地处理非数据类消息
         self._event_handlers = {
             "subscribe": self._handle_subscribe_event,
@@ -33,6 +114,33 @@ class WsBaseAsync:
             "error": self._handle_error_event,
         }
 
+    def _reset_op_limiters(self):
+        """
+        每条连接的请求频率限制，新建连接（包括重连）后重新计数。
+        - 每秒：突发量为 1，任意 OP_PERIOD 秒内不超过 OP_RATE 次；
+        - 每小时：允许一半额度的突发，之后匀速补充，任意 1 小时内不超过 OPS_PER_HOUR 次。
+        """
+        url = self.factory.url
+        self._op_limiter = AsyncTokenBucketLimiter(
+            self.OP_RATE, self.OP_PERIOD, name=f"ws-op::{url}", burst=1
+        )
+        self._hourly_op_limiter = AsyncTokenBucketLimiter(
+            self.OPS_PER_HOUR,
+            3600,
+            name=f"ws-op-hourly::{url}",
+            burst=self.OPS_PER_HOUR // 2,
+        )
+
+    async def _acquire_op(self):
+        """发送 subscribe / unsubscribe / login 请求前调用。"""
+        if self._hourly_op_limiter.available < 1:
+            logger.warning(
+                f"Hourly limit of {self.OPS_PER_HOUR} requests on this connection reached, "
+                f"delaying request."
+            )
+        await self._hourly_op_limiter.acquire()
+        await self._op_limiter.acquire()
+
     async def start(self):
         """启动客户端，连接并开始消费消息"""
         logger.info("🚀 Starting WebSocket client...")
@@ -50,6 +158,10 @@ class WsBaseAsync:
                 await self.consumer_task
             except asyncio.CancelledError:
                 pass  # 任务取消是正常行为
+        self._fail_pending("Client stopped before the request was acknowledged.")
+        await self._close_queues(list(self.queues))
+        for view in set(self.views.values()):
+            await view.close()
         await self.factory.close()
         logger.info("WebSocket client stopped.")
 
@@ -59,32 +171,7 @@ class WsBaseAsync:
             try:
                 async for message in self.factory.websocket:
                     try:
-                        msg_data = json.loads(message)
-                        event = msg_data.get("event")
-
-                        # 优先处理系统事件
-                        if event and event in self._event_handlers:
-                            self._event_handlers[event](msg_data)
-                            continue
-
-                        # 分发数据消息到对应的回调
-                        arg = msg_data.get("arg", {})
-                        channel = arg.get("channel")
-                        if channel and channel in self.callbacks:
-                            for callback in self.callbacks[channel]:
-                                try:
-                                    await callback(msg_data)
-                                except Exception as e:
-                                    logger.error(
-                                        f"Error in callback for channel {channel}: {e}"
-                                    )
-                        else:
-                            # 记录但不过度干扰
-                            if "event" not in msg_data and "data" not in msg_data:
-                                logger.warning(
-                                    f"Unhandled message or event: {message[:150]}..."
-                                )
-
+                        await self._on_raw_message(message)
                     except json.JSONDecodeError:
                         logger.error(f"Invalid JSON received: {message[:150]}...")
                     except Exception as e:
@@ -95,6 +182,7 @@ class WsBaseAsync:
                 websockets.ConnectionClosedOK,
             ) as e:
                 logger.error(f"🚫 Connection closed: {e}. Auto-reconnecting...")
+                self._fail_pending(f"Connection closed before the request was acknowledged: {e}")
                 if self.auto_reconnect:
                     await self._handle_reconnect()
                 else:
@@ -108,9 +196,124 @@ class WsBaseAsync:
                 )
                 await asyncio.sleep(5)
 
+    async def _on_raw_message(self, message):
+        """
+        处理一条原始消息。数据推送先只解析 arg 确定路由键，没有回调关心的消息直接丢弃，
+        不解析 data；其余消息（事件等）完整解析后处理。
+        """
+        arg = peek_arg(message)
+        if arg is not None:
+            key = route_key(arg)
+            view = self.views.get(key)
+            callbacks = self._callbacks_for(key)
+            if view is None and not callbacks:
+                return
+            await self._route(key, view, callbacks, codec.loads(message))
+            return
+
+        msg_data = codec.loads(message)
+        event = msg_data.get("event")
+
+        # 优先处理系统事件
+        if event and event in self._event_handlers:
+            self._event_handlers[event](msg_data)
+            return
+
+        # 分发数据消息到对应的回调
+        key = route_key(msg_data.get("arg", {}))
+        view = self.views.get(key)
+        callbacks = self._callbacks_for(key)
+        if view is not None or callbacks:
+            await self._route(key, view, callbacks, msg_data)
+        elif "event" not in msg_data and "data" not in msg_data:
+            # 记录但不过度干扰
+            logger.warning(f"Unhandled message or event: {message[:150]}...")
+
+    async def _route(
+        self,
+        key: RouteKey,
+        view: Optional[ConflatedView],
+        callbacks: List[Callable],
+        msg_data: dict,
+    ):
+        """更新合并订阅的视图，并把消息交给普通订阅的回调。"""
+        if view is not None:
+            view.update(key, msg_data)
+        if callbacks:
+            await self._dispatch(key, callbacks, msg_data)
+
+    def _callbacks_for(self, key: RouteKey) -> List[Callable]:
+        """
+        路由键对应的回调；没有精确匹配时，只退回到该频道中未按 instId / instFamily
+        过滤的订阅（例如按 instType / ccy 订阅）的回调，避免把某个产品的推送交给
+        只订阅了其他产品的回调。仍然没有回调的推送记录一次警告。
+        """
+        callbacks = self.routes.get(key)
+        if callbacks:
+            return callbacks
+        if key in self.views:
+            return ()
+        channel = key[0]
+        fallback: List[Callable] = []
+        for param in self.subscriptions.get(channel, ()):
+            if param.get("instId") or param.get("instFamily"):
+                continue
+            for callback in self.routes.get(route_key(param), ()):
+                if callback not in fallback:
+                    fallback.append(callback)
+        if not fallback and key not in self._unmatched:
+            self._unmatched.add(key)
+            logger.warning(f"No subscription matches push for {key}, dropping its messages")
+        return fallback
+
+    async def _dispatch(self, key: RouteKey, callbacks: List[Callable], msg_data: dict):
+        """把一条数据消息放入该路由键的队列；未启用队列时直接调用回调。"""
+        if self.queue_size is None:
+            await self._deliver(key, callbacks, msg_data)
+            return
+        queue = self.queues.get(key)
+        if queue is None:
+            queue = self._new_queue(key)
+        await queue.put(msg_data)
+
+    def _new_queue(self, key: RouteKey) -> SubscriptionQueue:
+        policy = self._key_overflow.get(key) or self.overflow.get(key[0], "block")
+
+        async def deliver(msg_data: dict):
+            # 在消费时查找回调，订阅期间新增的回调同样能收到后续消息
+            await self._deliver(key, self._callbacks_for(key), msg_data)
+
+        queue = SubscriptionQueue(f"{key[0]}:{key[1]}", deliver, self.queue_size, policy)
+        self.queues[key] = queue
+        return queue
+
+    async def _close_queues(self, keys: List[RouteKey]):
+        for key in keys:
+            queue = self.queues.pop(key, None)
+            if queue is not None:
+                await queue.close()
+
+    def queue_stats(self) -> Dict[str, Dict]:
+        """各订阅队列的溢出策略、当前 / 最大深度、已处理和已丢弃的消息数。"""
+        return {queue.name: queue.stats() for queue in self.queues.values()}
+
+    @property
+    def dropped(self) -> int:
+        """所有订阅队列累计丢弃的消息数。"""
+        return sum(queue.dropped for queue in self.queues.values())
+
+    async def _deliver(self, key: RouteKey, callbacks: List[Callable], msg_data: dict):
+        """把一条数据消息交给订阅了该路由键的回调。"""
+        for callback in callbacks:
+            try:
+                await callback(msg_data)
+            except Exception as e:
+                logger.error(f"Error in callback for {key[0]}:{key[1]}: {e}")
+
     async def _handle_reconnect(self):
         """处理断线重连逻辑"""
         if await self.factory.reconnect():
+            self._reset_op_limiters()
             await self._resubscribe_all()
         else:
             logger.error("Failed to reconnect, will retry consumer loop.")
@@ -136,8 +339,20 @@ class WsBaseAsync:
         unique_params = [dict(t) for t in {tuple(d.items()) for d in all_params}]
         await self._send_subscription_payload(unique_params, "subscribe")
 
-    async def subscribe(self, params: List[Dict[str, str]], callback: Callable):
-        """订阅一个或多个频道，并关联回调函数"""
+    async def subscribe(
+        self,
+        params: List[Dict[str, str]],
+        callback: Callable,
+        overflow: Optional[str] = None,
+    ) -> List[asyncio.Future]:
+        """
+        订阅一个或多个频道，并关联回调函数
+        :param overflow: （可选）这些订阅的队列溢出策略，覆盖按频道的默认值。
+        :return: 每个参数一个 Future，收到 subscribe 事件时结果为事件中的 arg，
+                 被拒绝或连接断开时为 OkxWsSubscribeException。
+        """
+        if overflow is not None:
+            check_policy(overflow)
         for param in params:
             channel = param.get("channel")
             if not channel:
@@ -147,11 +362,50 @@ class WsBaseAsync:
             self.subscriptions[channel].append(param)
             if callback not in self.callbacks[channel]:
                 self.callbacks[channel].append(callback)
+            key = route_key(param)
+            routed = self.routes[key]
+            if callback not in routed:
+                routed.append(callback)
+            self._unmatched.discard(key)
+            if overflow is not None:
+                self._key_overflow[key] = overflow
+                queue = self.queues.get(key)
+                if queue is not None:
+                    queue.policy = overflow
+
+        return await self._send_subscription_payload(params, "subscribe")
+
+    async def subscribe_conflated(
+        self,
+        params: List[Dict[str, str]],
+        callback: Optional[Callable] = None,
+        interval: Optional[float] = None,
+        view: Optional[ConflatedView] = None,
+    ) -> ConflatedView:
+        """
+        合并订阅：每个 (channel, instId) 只保留最新一条消息，参见 conflate.ConflatedView。
+        :param callback: （可选）接收最新消息的协程函数；不指定时由调用方通过 latest() / poll() 读取。
+        :param interval: （可选）回调的最小交付间隔（秒）。
+        :param view: （可选）复用已有的视图（例如多个连接共用一个视图）。
+        :return: 保存最新消息的 ConflatedView。
+        """
+        if view is None:
+            view = ConflatedView(callback, interval)
+        for param in params:
+            channel = param.get("channel")
+            if not channel:
+                logger.warning(f"Subscription parameter missing 'channel': {param}")
+                continue
+            self.subscriptions[channel].append(param)
+            self.views[route_key(param)] = view
+        view.start()
 
         await self._send_subscription_payload(params, "subscribe")
+        return view
 
-    async def unsubscribe(self, params: List[Dict[str, str]]):
-        """取消订阅一个或多个频道"""
+    async def unsubscribe(self, params: List[Dict[str, str]]) -> List[asyncio.Future]:
+        """取消订阅一个或多个频道，返回值与 subscribe() 相同"""
+        removed = []
         for param in params:
             channel = param.get("channel")
             if channel in self.subscriptions:
@@ -159,32 +413,181 @@ class WsBaseAsync:
                 self.subscriptions[channel] = [
                     p for p in self.subscriptions[channel] if p != param
                 ]
+                key = route_key(param)
+                if not any(route_key(p) == key for p in self.subscriptions[channel]):
+                    self.routes.pop(key, None)
+                    self._key_overflow.pop(key, None)
+                    removed.append(key)
+                    view = self.views.pop(key, None)
+                    if view is not None:
+                        view.discard(key)
                 # 如果该频道下没有订阅了，则清空
                 if not self.subscriptions[channel]:
                     del self.subscriptions[channel]
-                    del self.callbacks[channel]
+                    self.callbacks.pop(channel, None)
+
+        futures = await self._send_subscription_payload(params, "unsubscribe")
+        await self._close_queues(removed)
+        return futures
+
+    async def resubscribe(self, params: List[Dict[str, str]]) -> List[asyncio.Future]:
+        """
+        对已订阅的频道先取消订阅再重新订阅（例如让服务器重新推送全量快照），
+        回调、队列和合并视图保持不变。返回值与 subscribe() 相同。
+        收到取消订阅确认（或等待 RESUBSCRIBE_ACK_TIMEOUT 秒）后才发送订阅请求，
+        保证服务器按先取消、后订阅的顺序处理。确认由接收循环处理，
+        因此不能在接收循环中直接等待本方法（queue_size=None 时的回调应放到单独的任务中调用）。
+        """
+        futures = await self._send_subscription_payload(params, "unsubscribe")
+        if futures:
+            _done, pending = await asyncio.wait(
+                futures, timeout=self.RESUBSCRIBE_ACK_TIMEOUT
+            )
+            if pending:
+                logger.warning(
+                    f"No unsubscribe ack for {len(pending)} of {len(futures)} args "
+                    f"within {self.RESUBSCRIBE_ACK_TIMEOUT}s, resubscribing anyway"
+                )
+        return await self._send_subscription_payload(params, "subscribe")
+
+    def _chunks(self, params: List[Dict[str, str]]) -> Iterator[List[Dict[str, str]]]:
+        """按请求大小上限切分参数列表。"""
+        # 预留 {"id":...,"op":...,"args":[]} 外层的长度
+        limit = self.MAX_REQUEST_BYTES - 64
+        chunk: List[Dict[str, str]] = []
+        size = 0
+        for param in params:
+            param_size = len(codec.dumps(param)) + 1
+            if chunk and size + param_size > limit:
+                yield chunk
+                chunk, size = [], 0
+            chunk.append(param)
+            size += param_size
+        if chunk:
+            yield chunk
 
-        await self._send_subscription_payload(params, "unsubscribe")
+    async def _send_subscription_payload(
+        self, params: List[Dict[str, str]], op: str
+    ) -> List[asyncio.Future]:
+        """
+        构建并发送(取消)订阅请求。参数按 MAX_REQUEST_BYTES 分批，
+        每批之间按 OP_RATE / OPS_PER_HOUR 控制发送节奏。
+        :return: 每个参数一个 Future，收到对应的 subscribe / unsubscribe 或 error 事件时完成。
+        """
+        loop = asyncio.get_running_loop()
+        futures = []
+        for param in params:
+            future = loop.create_future()
+            # 调用方不关心结果时，避免出现 "exception was never retrieved" 警告
+            future.add_done_callback(_consume_exception)
+            futures.append(future)
 
-    async def _send_subscription_payload(self, params: List[Dict[str, str]], op: str):
-        """构建并发送(取消)订阅请求"""
         if not self.factory.is_connected():
             logger.error(f"Cannot {op}, not connected.")
-            return
+            for param, future in zip(params, futures):
+                future.set_exception(
+                    OkxWsSubscribeException("N/A", f"Cannot {op}, not connected.", param)
+                )
+            return futures
+
+        self._prune_requests()
+        pending = iter(zip(params, futures))
+        for chunk in self._chunks(params):
+            entries = [next(pending) for _ in chunk]
+            await self._acquire_op()
+            request_id = f"{op[:3]}{next(self._request_ids)}"
+            self._requests[request_id] = entries
+            for param, future in entries:
+                self._pending[(op, route_key(param))].append(future)
+
+            payload = codec.dumps({"id": request_id, "op": op, "args": chunk})
+            logger.info(f"📡 Sending {op} request {request_id} with {len(chunk)} args")
+            logger.debug(f"{op} payload: {payload}")
+            try:
+                await self.factory.websocket.send(payload)
+            except websockets.ConnectionClosed as e:
+                logger.error(f"Failed to send {op} request, connection closed: {e}")
+                self._fail_pending(f"Failed to send {op} request, connection closed: {e}")
+                break
+        return futures
+
+    def _prune_requests(self):
+        """删除所有参数都已确认的请求记录。"""
+        done = [
+            request_id
+            for request_id, entries in self._requests.items()
+            if all(future.done() for _, future in entries)
+        ]
+        for request_id in done:
+            del self._requests[request_id]
+
+    def _resolve(self, op: str, arg: dict) -> bool:
+        """用 subscribe / unsubscribe 事件完成最早一个等待中的 Future。"""
+        key = route_key(arg)
+        waiters = self._pending.get((op, key))
+        while waiters:
+            future = waiters.popleft()
+            if not future.done():
+                future.set_result(arg)
+                if not waiters:
+                    del self._pending[(op, key)]
+                return True
+        self._pending.pop((op, key), None)
+        return False
+
+    def _reject(self, entries: List[Tuple[Dict[str, str], asyncio.Future]], msg_data: dict):
+        code = msg_data.get("code", "N/A")
+        message = msg_data.get("msg", "")
+        for param, future in entries:
+            if future.done():
+                continue
+            self.subscription_errors[route_key(param)] = msg_data
+            future.set_exception(OkxWsSubscribeException(code, message, param))
 
-        payload = json.dumps({"op": op, "args": params})
-        logger.info(f"📡 Sending {op} request: {payload}")
-        try:
-            await self.factory.websocket.send(payload)
-        except websockets.ConnectionClosed as e:
-            logger.error(f"Failed to send {op} request, connection closed: {e}")
+    def _fail_pending(self, message: str):
+        """连接断开或客户端停止时，让所有等待确认的 Future 失败。"""
+        for entries in self._requests.values():
+            for param, future in entries:
+                if not future.done():
+                    future.set_exception(OkxWsSubscribeException("N/A", message, param))
+        self._requests.clear()
+        self._pending.clear()
 
     # --- Event Handlers ---
     def _handle_subscribe_event(self, msg_data: dict):
-        logger.info(f"✅ Subscription confirmed for: {msg_data.get('arg')}")
+        arg = msg_data.get("arg", {})
+        self.subscription_errors.pop(route_key(arg), None)
+        self._resolve("subscribe", arg)
+        logger.debug(f"✅ Subscription confirmed for: {arg}")
 
     def _handle_unsubscribe_event(self, msg_data: dict):
-        logger.info(f"✅ Unsubscription confirmed for: {msg_data.get('arg')}")
+        arg = msg_data.get("arg", {})
+        self._resolve("unsubscribe", arg)
+        logger.debug(f"✅ Unsubscription confirmed for: {arg}")
 
     def _handle_error_event(self, msg_data: dict):
         logger.error(f"🚨 Error message from server: {msg_data}")
+        entries = self._requests.get(msg_data.get("id", ""))
+        if entries is None:
+            # 没有 id 时，按错误信息中出现的频道和产品匹配等待中的订阅；
+            # 没有 instId / instFamily / ccy / instType 的订阅无法从文本中区分，不参与匹配
+            text = msg_data.get("msg", "")
+            entries = [
+                (param, future)
+                for request in self._requests.values()
+                for param, future in request
+                if not future.done() and _mentions(text, param)
+            ]
+        self._reject(entries, msg_data)
+
+
+def _mentions(text: str, param: Dict[str, str]) -> bool:
+    """错误信息中是否同时出现了订阅参数的频道和路由标识（标识为空时视为不匹配）。"""
+    channel = param.get("channel", "")
+    ident = route_key(param)[1]
+    return bool(channel) and bool(ident) and channel in text and ident in text
+
+
+def _consume_exception(future: asyncio.Future):
+    if not future.cancelled():
+        future.exception()
@@ -0,0 +1,133 @@
+# okx/ws/conflate.py
+"""
+合并订阅（只保留最新值）
+
+tickers、mark-price、index-tickers、books5 等频道的每条推送都是完整快照，大部分消费者只关心最新值。
+ConflatedView 按路由键 (channel, instId) 只保存最新一条消息：
+- latest() / snapshot() 随时读取最新值，不会读到过期数据；
+- poll() 返回上次调用以来有更新的路由键的最新消息，每个路由键最多一条；
+- 指定回调时，由后台任务把最新消息交给回调：interval 为 None 时每处理完一批就取下一批
+  （消费者越慢，合并越多），否则每 interval 秒最多交付一次。
+
+使用示例:
+    view = await ws.subscribe_conflated(
+        [{"channel": "tickers", "instId": inst_id} for inst_id in inst_ids]
+    )
+    ...
+    ticker = view.latest("BTC-USDT")
+    for key, msg in view.poll().items():
+        ...
+"""
+
+import asyncio
+import logging
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+RouteKey = Tuple[str, str]
+
+# 适合合并订阅的频道
+CONFLATABLE_CHANNELS = ("tickers", "mark-price", "index-tickers", "books5", "bbo-tbt")
+
+
+class ConflatedView:
+    """按路由键保存最新消息的视图。"""
+
+    def __init__(self, callback: Optional[Callable] = None, interval: Optional[float] = None):
+        """
+        :param callback: （可选）接收最新消息的协程函数，参数与普通订阅回调相同。
+        :param interval: （可选）回调的最小交付间隔（秒），None 表示消费者处理完一批后立即交付下一批。
+        """
+        self.callback = callback
+        self.interval = interval
+        self._latest: Dict[RouteKey, dict] = {}
+        self._changed: Dict[RouteKey, None] = {}
+        self._event = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.updates = 0
+        self.delivered = 0
+
+    def update(self, key: RouteKey, msg_data: dict):
+        """由接收循环调用，记录一条新消息。"""
+        self._latest[key] = msg_data
+        self._changed[key] = None
+        self.updates += 1
+        self._event.set()
+
+    def latest(self, inst_id: str, channel: Optional[str] = None) -> Optional[dict]:
+        """某个产品的最新消息；同一产品订阅了多个频道时需要指定 channel。"""
+        if channel is not None:
+            return self._latest.get((channel, inst_id))
+        for (ch, key_id), msg_data in self._latest.items():
+            if key_id == inst_id:
+                return msg_data
+        return None
+
+    def snapshot(self) -> Dict[RouteKey, dict]:
+        """所有路由键的最新消息（副本）。"""
+        return dict(self._latest)
+
+    def poll(self) -> Dict[RouteKey, dict]:
+        """返回上次 poll() 以来有更新的路由键的最新消息。"""
+        if not self._changed:
+            return {}
+        changed = self._changed
+        self._changed = {}
+        self._event.clear()
+        latest = self._latest
+        result = {key: latest[key] for key in changed if key in latest}
+        self.delivered += len(result)
+        return result
+
+    async def wait(self, timeout: Optional[float] = None) -> Dict[RouteKey, dict]:
+        """等待到有更新（或超时）后返回 poll() 的结果。"""
+        if not self._changed:
+            try:
+                await asyncio.wait_for(self._event.wait(), timeout)
+            except asyncio.TimeoutError:
+                return {}
+        return self.poll()
+
+    def discard(self, key: RouteKey):
+        """取消订阅后删除该路由键的数据。"""
+        self._latest.pop(key, None)
+        self._changed.pop(key, None)
+
+    # --- 回调交付 ---
+    def start(self):
+        if self.callback is not None and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            if self.interval:
+                await asyncio.sleep(self.interval)
+                batch = self.poll()
+            else:
+                batch = await self.wait()
+            for key, msg_data in batch.items():
+                try:
+                    await self.callback(msg_data)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.error(f"Error in conflated callback for {key[0]}:{key[1]}: {e}")
+
+    async def close(self):
+        task = self._task
+        self._task = None
+        if task and not task.done():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "keys": len(self._latest),
+            "updates": self.updates,
+            "delivered": self.delivered,
+            "conflated": self.updates - self.delivered,
+        }
@@ -0,0 +1,325 @@
+# okx/ws/orderbook.py
+"""
+本地订单簿引擎
+
+基于 WsPublicAsync 的 books / books5 / books-l2-tbt / books50-l2-tbt 频道维护本地订单簿：
+- 买卖两侧均以有序的 array 存储价格、以字典按价格索引档位：修改已有档位为 O(1)，
+  新增 / 删除档位为 O(log n) 查找加一次连续内存移动（见 _BookSide）；
+- 每次增量更新后校验 OKX 的 CRC32 checksum 以及 seqId 连续性，不一致时自动重新订阅以获取新快照；
+- 提供最优价、逐档迭代和按数量计算VWAP等查询，均直接在内部数组上进行，不复制订单簿。
+"""
+
+import asyncio
+import logging
+import zlib
+from array import array
+from bisect import bisect_left
+from typing import Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+from okxx.ws.public import WsPublicAsync
+
+logger = logging.getLogger(__name__)
+
+BOOK_CHANNELS = ("books", "books5", "books-l2-tbt", "books50-l2-tbt")
+
+# OKX checksum 只取买卖双方前25档
+CHECKSUM_DEPTH = 25
+
+
+class _BookSide:
+    """
+    订单簿的一侧：有序的 keys 数组 + 以 key 为索引的档位字典。
+    keys 按升序排列：卖盘存储价格本身，买盘存储价格的相反数，因此下标0始终是最优价。
+    levels 保存 key -> (数量, 原始价格字符串, 原始数量字符串)，原始字符串用于计算 checksum。
+
+    绝大多数增量更新只修改已有档位的数量，只需一次字典查找（O(1)），不移动任何数据；
+    新增 / 删除档位时用二分查找定位（O(log n)），再在 keys 中插入 / 删除一个8字节的 double，
+    移动的是一段连续内存（O(n) 的 memmove，books 频道最多400档，约3KB）。
+    在这种深度下它比纯 Python 实现的平衡树或跳表更快，因此没有使用树结构。
+    """
+
+    __slots__ = ("_sign", "keys", "levels")
+
+    def __init__(self, is_bid: bool):
+        self._sign = -1.0 if is_bid else 1.0
+        self.keys = array("d")
+        self.levels: Dict[float, Tuple[float, str, str]] = {}
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def clear(self):
+        del self.keys[:]
+        self.levels.clear()
+
+    def apply(self, px: str, sz: str):
+        """应用一个档位变化，数量为0表示删除该档位。"""
+        key = float(px) * self._sign
+        size = float(sz)
+        levels = self.levels
+        if key in levels:
+            if size == 0:
+                del levels[key]
+                del self.keys[bisect_left(self.keys, key)]
+            else:
+                levels[key] = (size, px, sz)
+        elif size != 0:
+            levels[key] = (size, px, sz)
+            self.keys.insert(bisect_left(self.keys, key), key)
+
+    def price(self, i: int) -> float:
+        return self.keys[i] * self._sign
+
+    def size(self, i: int) -> float:
+        return self.levels[self.keys[i]][0]
+
+    def raw(self, i: int) -> Tuple[str, str]:
+        """第 i 档的原始 (价格, 数量) 字符串。"""
+        _size, px, sz = self.levels[self.keys[i]]
+        return px, sz
+
+    def iter_levels(self, depth: Optional[int] = None) -> Iterator[Tuple[float, float]]:
+        n = len(self.keys) if depth is None else min(depth, len(self.keys))
+        keys = self.keys
+        levels = self.levels
+        sign = self._sign
+        for i in range(n):
+            key = keys[i]
+            yield key * sign, levels[key][0]
+
+    def vwap(self, size: float) -> Optional[float]:
+        """吃掉 size 数量所需的成交均价；深度不足时返回 None。"""
+        if size <= 0:
+            raise ValueError(f"VWAP size must be positive, got {size}.")
+        remaining = size
+        notional = 0.0
+        levels = self.levels
+        for key in self.keys:
+            level_size = levels[key][0]
+            take = level_size if level_size < remaining else remaining
+            notional += take * key
+            remaining -= take
+            if remaining <= 0:
+                return notional * self._sign / size
+        return None
+
+
+class OrderBook:
+    """单个产品的本地订单簿。"""
+
+    def __init__(self, inst_id: str, channel: str = "books"):
+        self.inst_id = inst_id
+        self.channel = channel
+        self.bids = _BookSide(is_bid=True)
+        self.asks = _BookSide(is_bid=False)
+        self.ts: Optional[int] = None
+        self.seq_id: Optional[int] = None
+        # 收到快照后才为 True；校验失败时置为 False，直到下一次快照
+        self.valid = False
+
+    def apply_snapshot(self, data: dict):
+        self.bids.clear()
+        self.asks.clear()
+        for level in data.get("bids", ()):
+            self.bids.apply(level[0], level[1])
+        for level in data.get("asks", ()):
+            self.asks.apply(level[0], level[1])
+        self._update_meta(data)
+        self.valid = True
+
+    def apply_update(self, data: dict) -> bool:
+        """
+        应用增量更新。
+        :return: seqId 连续且 checksum 校验通过时返回 True。
+        """
+        prev_seq_id = data.get("prevSeqId")
+        if (
+            prev_seq_id is not None
+            and self.seq_id is not None
+            and int(prev_seq_id) != self.seq_id
+        ):
+            logger.warning(
+                f"Sequence gap on {self.channel}:{self.inst_id} "
+                f"(prevSeqId={prev_seq_id}, local seqId={self.seq_id})"
+            )
+            self.valid = False
+            return False
+
+        for level in data.get("bids", ()):
+            self.bids.apply(level[0], level[1])
+        for level in data.get("asks", ()):
+            self.asks.apply(level[0], level[1])
+        self._update_meta(data)
+        return True
+
+    def _update_meta(self, data: dict):
+        if "ts" in data:
+            self.ts = int(data["ts"])
+        if "seqId" in data:
+            self.seq_id = int(data["seqId"])
+
+    def checksum(self) -> int:
+        """按OKX规则计算前25档的CRC32校验值（有符号32位整数）。"""
+        bids = self.bids
+        asks = self.asks
+        parts: List[str] = []
+        for i in range(CHECKSUM_DEPTH):
+            if i < len(bids):
+                parts.extend(bids.raw(i))
+            if i < len(asks):
+                parts.extend(asks.raw(i))
+        crc = zlib.crc32(":".join(parts).encode("utf-8"))
+        return crc - (1 << 32) if crc >= (1 << 31) else crc
+
+    def verify(self, expected: Optional[int]) -> bool:
+        """校验 checksum；消息中没有 checksum 字段时视为通过。"""
+        if expected is None:
+            return True
+        if self.checksum() != int(expected):
+            logger.warning(f"Checksum mismatch on {self.channel}:{self.inst_id}")
+            self.valid = False
+            return False
+        return True
+
+    # --- 查询接口 ---
+    def best_bid(self) -> Optional[Tuple[float, float]]:
+        if not self.bids:
+            return None
+        return self.bids.price(0), self.bids.size(0)
+
+    def best_ask(self) -> Optional[Tuple[float, float]]:
+        if not self.asks:
+            return None
+        return self.asks.price(0), self.asks.size(0)
+
+    def mid(self) -> Optional[float]:
+        if not self.bids or not self.asks:
+            return None
+        return (self.bids.price(0) + self.asks.price(0)) / 2
+
+    def spread(self) -> Optional[float]:
+        if not self.bids or not self.asks:
+            return None
+        return self.asks.price(0) - self.bids.price(0)
+
+    def iter_bids(self, depth: Optional[int] = None) -> Iterator[Tuple[float, float]]:
+        """从最优价开始逐档迭代买盘 (price, size)，不复制订单簿。"""
+        return self.bids.iter_levels(depth)
+
+    def iter_asks(self, depth: Optional[int] = None) -> Iterator[Tuple[float, float]]:
+        """从最优价开始逐档迭代卖盘 (price, size)，不复制订单簿。"""
+        return self.asks.iter_levels(depth)
+
+    def vwap(self, side: str, size: float) -> Optional[float]:
+        """
+        以市价吃掉 size 数量的成交均价。
+
+        :param side: 'buy' 吃卖盘，'sell' 吃买盘。
+        :param size: 数量（与OKX深度数据中的数量单位一致），必须大于0，否则抛出 ValueError。
+        :return: 均价；深度不足时返回 None。
+        """
+        if side == "buy":
+            return self.asks.vwap(size)
+        if side == "sell":
+            return self.bids.vwap(size)
+        raise ValueError(f"Invalid side: {side}")
+
+
+class OrderBookManager:
+    """
+    订阅深度频道并维护一组本地订单簿。
+
+    使用示例:
+        ws = WsPublicAsync()
+        await ws.start()
+        books = OrderBookManager(ws)
+        await books.subscribe(['BTC-USDT', 'ETH-USDT'], channel='books')
+        ...
+        book = books.get('BTC-USDT')
+        print(book.best_bid(), book.best_ask(), book.vwap('buy', 1.5))
+    """
+
+    def __init__(
+        self,
+        ws: WsPublicAsync,
+        on_update: Optional[Callable[[OrderBook], None]] = None,
+    ):
+        """
+        :param ws: 已启动的 WsPublicAsync 客户端。
+        :param on_update: （可选）订单簿每次成功更新后调用的回调，参数为 OrderBook。
+        """
+        self.ws = ws
+        self.on_update = on_update
+        self.books: Dict[Tuple[str, str], OrderBook] = {}
+        self._resyncing: set = set()
+        # 正在执行的重新订阅任务（保存引用，避免任务被回收）
+        self._resync_tasks: Set[asyncio.Task] = set()
+
+    def get(self, inst_id: str, channel: Optional[str] = None) -> Optional[OrderBook]:
+        """获取某个产品的订单簿，未指定频道时返回第一个匹配的订单簿。"""
+        if channel is not None:
+            return self.books.get((channel, inst_id))
+        for ch in BOOK_CHANNELS:
+            book = self.books.get((ch, inst_id))
+            if book is not None:
+                return book
+        return None
+
+    async def subscribe(self, inst_ids: List[str], channel: str = "books"):
+        if channel not in BOOK_CHANNELS:
+            raise ValueError(f"Unsupported order book channel: {channel}")
+        for inst_id in inst_ids:
+            self.books.setdefault((channel, inst_id), OrderBook(inst_id, channel))
+        params = [{"channel": channel, "instId": inst_id} for inst_id in inst_ids]
+        await self.ws.subscribe(params, self._on_message)
+
+    async def unsubscribe(self, inst_ids: List[str], channel: str = "books"):
+        params = [{"channel": channel, "instId": inst_id} for inst_id in inst_ids]
+        await self.ws.unsubscribe(params)
+        for inst_id in inst_ids:
+            self.books.pop((channel, inst_id), None)
+
+    async def _on_message(self, msg_data: dict):
+        arg = msg_data.get("arg", {})
+        key = (arg.get("channel"), arg.get("instId"))
+        book = self.books.get(key)
+        if book is None:
+            return
+
+        # books5 等频道没有 action 字段，每条消息都是全量快照
+        action = msg_data.get("action", "snapshot")
+        for data in msg_data.get("data", ()):
+            if action == "snapshot":
+                book.apply_snapshot(data)
+                self._resyncing.discard(key)
+            elif not book.valid:
+                continue  # 等待重新订阅后的快照
+            elif not book.apply_update(data):
+                self._resync(book)
+                return
+
+            if not book.verify(data.get("checksum")):
+                self._resync(book)
+                return
+
+        if self.on_update is not None:
+            try:
+                self.on_update(book)
+            except Exception as e:
+                logger.error(f"Error in order book callback for {key}: {e}")
+
+    def _resync(self, book: OrderBook):
+        """
+        在后台任务中重新订阅该产品以获取新的全量快照。resubscribe() 要等待取消订阅确认，
+        而确认由接收循环处理，回调在接收循环中执行时（queue_size=None）直接等待会卡住接收循环。
+        """
+        key = (book.channel, book.inst_id)
+        if key in self._resyncing:
+            return
+        self._resyncing.add(key)
+        logger.info(f"🔄 Resyncing order book {book.channel}:{book.inst_id}")
+        task = asyncio.create_task(
+            self.ws.resubscribe([{"channel": book.channel, "instId": book.inst_id}])
+        )
+        self._resync_tasks.add(task)
+        task.add_done_callback(self._resync_tasks.discard)
@@ -0,0 +1,432 @@
+# okx/ws/pool.py
+"""
+公共频道 WebSocket 连接池
+
+单个连接承载所有订阅时，一个慢回调或一条连接的带宽会限制所有行情，断线重连时所有频道同时中断。
+WsPool 把订阅分散到 N 条连接（分片）上：
+- 新订阅按 instId 的哈希分配分片，分片的频道权重之和超过上限时改为分配到负载最低的分片；
+- 后台任务定期统计各分片的消息速率和回调耗时占比，分片饱和时把其中的部分订阅迁移到空闲分片；
+- 每个分片独立连接、独立重连，互不影响；
+- stats() 返回每个分片的连接状态、订阅数、消息数、字节数、速率、繁忙度、重连次数和丢弃的消息数。
+
+使用示例:
+    pool = WsPool(shards=4)
+    await pool.start()
+    await pool.subscribe(
+        [{"channel": "books", "instId": inst_id} for inst_id in inst_ids], on_book
+    )
+    ...
+    print(pool.stats())
+    await pool.stop()
+"""
+
+import asyncio
+import logging
+import time
+import zlib
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional
+
+from okxx.ws.base import RouteKey, route_key
+from okxx.ws.conflate import ConflatedView
+from okxx.ws.public import WsPublicAsync
+
+logger = logging.getLogger(__name__)
+
+PUBLIC_URL = "wss://ws.okx.com:8443/ws/v5/public"
+
+# 频道相对带宽权重，未列出的频道权重为 1
+CHANNEL_WEIGHTS: Dict[str, int] = {
+    "books-l2-tbt": 40,
+    "books50-l2-tbt": 20,
+    "books": 10,
+    "bbo-tbt": 4,
+    "books5": 4,
+    "trades": 2,
+    "trades-all": 2,
+}
+
+
+def channel_weight(channel: str) -> int:
+    return CHANNEL_WEIGHTS.get(channel, 1)
+
+
+class _ShardClient(WsPublicAsync):
+    """记录消息数、字节数和回调耗时的公共频道客户端，作为连接池的一个分片。"""
+
+    def __init__(self, index: int, url: str, **kwargs):
+        super().__init__(url, **kwargs)
+        self.index = index
+        self.weight = 0
+        self.messages = 0
+        self.bytes = 0
+        self.busy = 0.0
+        self.reconnects = 0
+        # 当前统计窗口内各路由键的消息数，用于选择迁移的订阅
+        self.key_messages: Dict[RouteKey, int] = defaultdict(int)
+        # 最近一个统计窗口的消息速率（条/秒）和繁忙度（回调耗时占比）
+        self.rate = 0.0
+        self.busy_ratio = 0.0
+        self._window_messages = 0
+        self._window_busy = 0.0
+        # 正在执行的回调数和本段繁忙时间的起点：多个订阅的回调并发执行时，
+        # 只统计至少有一个回调在执行的时间（区间的并集），繁忙度不会超过1
+        self._active = 0
+        self._busy_since = 0.0
+
+    def _enter_busy(self):
+        if self._active == 0:
+            self._busy_since = time.perf_counter()
+        self._active += 1
+
+    def _exit_busy(self):
+        self._active -= 1
+        if self._active == 0:
+            self._add_busy(time.perf_counter())
+
+    def _add_busy(self, now: float):
+        elapsed = now - self._busy_since
+        self._busy_since = now
+        self.busy += elapsed
+        self._window_busy += elapsed
+
+    async def _on_raw_message(self, message):
+        self.messages += 1
+        self._window_messages += 1
+        self.bytes += len(message)
+        if self.queue_size is None:
+            # 回调在接收循环中执行，耗时已包含在内
+            self._enter_busy()
+            try:
+                await super()._on_raw_message(message)
+            finally:
+                self._exit_busy()
+            return
+        await super()._on_raw_message(message)
+
+    async def _route(self, key: RouteKey, view, callbacks: List[Callable], msg_data: dict):
+        self.key_messages[key] += 1
+        await super()._route(key, view, callbacks, msg_data)
+
+    async def _deliver(self, key: RouteKey, callbacks: List[Callable], msg_data: dict):
+        if self.queue_size is None:
+            await super()._deliver(key, callbacks, msg_data)
+            return
+        # 启用队列时，繁忙度按各订阅消费任务执行回调的耗时计算
+        self._enter_busy()
+        try:
+            await super()._deliver(key, callbacks, msg_data)
+        finally:
+            self._exit_busy()
+
+    async def _handle_reconnect(self):
+        self.reconnects += 1
+        await super()._handle_reconnect()
+
+    def roll_window(self, elapsed: float) -> Dict[RouteKey, int]:
+        """结束一个统计窗口，更新速率和繁忙度，返回窗口内各路由键的消息数。"""
+        if self._active:
+            # 跨越窗口边界的繁忙时间分别计入前后两个窗口
+            self._add_busy(time.perf_counter())
+        self.rate = self._window_messages / elapsed if elapsed > 0 else 0.0
+        # 窗口长度与繁忙时间使用不同的时钟测量，限制在 [0, 1] 内
+        ratio = self._window_busy / elapsed if elapsed > 0 else 0.0
+        self.busy_ratio = min(max(ratio, 0.0), 1.0)
+        self._window_messages = 0
+        self._window_busy = 0.0
+        counts = self.key_messages
+        self.key_messages = defaultdict(int)
+        return counts
+
+
+class WsPool:
+    """把公共频道订阅分散到多条 WebSocket 连接上的连接池，接口与 WsPublicAsync 一致。"""
+
+    def __init__(
+        self,
+        url: str = PUBLIC_URL,
+        shards: int = 4,
+        max_weight: Optional[int] = None,
+        rebalance_interval: Optional[float] = 10.0,
+        max_rate: Optional[float] = None,
+        max_busy: float = 0.7,
+        max_moves: int = 8,
+        ping_interval: Optional[int] = None,
+        ping_timeout: Optional[int] = None,
+        queue_size: Optional[int] = 1000,
+        overflow: Optional[Dict[str, str]] = None,
+    ):
+        """
+        :param url: 公共频道地址。
+        :param shards: 连接数量。
+        :param max_weight: （可选）单个分片的频道权重上限，超出时新订阅分配到负载最低的分片。
+        :param rebalance_interval: 统计窗口 / 再平衡检查的间隔（秒），None 表示不自动再平衡。
+        :param max_rate: （可选）单个分片每秒消息数上限，超过视为饱和。
+        :param max_busy: 单个分片回调耗时占比上限，超过视为饱和。
+        :param max_moves: 每次再平衡最多迁移的订阅数量。
+        :param queue_size: 每个分片中每个订阅的消息队列容量，参见 WsBaseAsync。
+        :param overflow: （可选）频道 -> 队列溢出策略，参见 WsBaseAsync。
+        """
+        if shards <= 0:
+            raise ValueError("shards must be positive.")
+        self.url = url
+        self.max_weight = max_weight
+        self.rebalance_interval = rebalance_interval
+        self.max_rate = max_rate
+        self.max_busy = max_busy
+        self.max_moves = max_moves
+        self.shards: List[_ShardClient] = [
+            _ShardClient(
+                i,
+                url,
+                ping_interval=ping_interval,
+                ping_timeout=ping_timeout,
+                queue_size=queue_size,
+                overflow=overflow,
+            )
+            for i in range(shards)
+        ]
+        # 订阅参数（按路由键）-> 所在分片 / 回调
+        self._placement: Dict[RouteKey, _ShardClient] = {}
+        self._params: Dict[RouteKey, Dict[str, str]] = {}
+        self._callbacks: Dict[RouteKey, List[Callable]] = defaultdict(list)
+        self.moves = 0
+        self._rebalance_task: Optional[asyncio.Task] = None
+        self._window_start = time.monotonic()
+
+    async def start(self):
+        """并行连接所有分片，并启动再平衡任务。"""
+        logger.info(f"🚀 Starting WebSocket pool with {len(self.shards)} shards...")
+        await asyncio.gather(*(shard.start() for shard in self.shards))
+        self._window_start = time.monotonic()
+        if self.rebalance_interval and self._rebalance_task is None:
+            self._rebalance_task = asyncio.create_task(self._rebalance_loop())
+
+    async def stop(self):
+        task = self._rebalance_task
+        self._rebalance_task = None
+        if task and not task.done():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        await asyncio.gather(*(shard.stop() for shard in self.shards))
+
+    # --- 订阅分配 ---
+    def _choose_shard(self, param: Dict[str, str]) -> _ShardClient:
+        key = route_key(param)
+        shard = self.shards[zlib.crc32(key[1].encode()) % len(self.shards)]
+        weight = channel_weight(key[0])
+        if self.max_weight is not None and shard.weight + weight > self.max_weight:
+            shard = min(self.shards, key=lambda s: s.weight)
+        return shard
+
+    def _place(self, param: Dict[str, str]) -> Optional[_ShardClient]:
+        """返回订阅参数所在的分片，新订阅先分配分片。"""
+        if not param.get("channel"):
+            logger.warning(f"Subscription parameter missing 'channel': {param}")
+            return None
+        key = route_key(param)
+        shard = self._placement.get(key)
+        if shard is None:
+            shard = self._choose_shard(param)
+            self._placement[key] = shard
+            self._params[key] = param
+            shard.weight += channel_weight(key[0])
+        return shard
+
+    def _group(self, params: List[Dict[str, str]]) -> Dict[int, List[Dict[str, str]]]:
+        groups: Dict[int, List[Dict[str, str]]] = defaultdict(list)
+        for param in params:
+            shard = self._placement.get(route_key(param))
+            if shard is not None:
+                groups[shard.index].append(param)
+        return groups
+
+    async def subscribe(
+        self,
+        params: List[Dict[str, str]],
+        callback: Callable,
+        overflow: Optional[str] = None,
+    ) -> List[asyncio.Future]:
+        """
+        订阅一个或多个频道，已订阅的参数保持在原分片上。
+        :return: 各分片返回的确认 Future，参见 WsBaseAsync.subscribe。
+        """
+        groups: Dict[int, List[Dict[str, str]]] = defaultdict(list)
+        for param in params:
+            shard = self._place(param)
+            if shard is None:
+                continue
+            key = route_key(param)
+            if callback not in self._callbacks[key]:
+                self._callbacks[key].append(callback)
+            groups[shard.index].append(param)
+        results = await asyncio.gather(
+            *(
+                self.shards[i].subscribe(group, callback, overflow)
+                for i, group in groups.items()
+            )
+        )
+        return [future for futures in results for future in futures]
+
+    async def subscribe_conflated(
+        self,
+        params: List[Dict[str, str]],
+        callback: Optional[Callable] = None,
+        interval: Optional[float] = None,
+    ) -> ConflatedView:
+        """合并订阅，所有分片共用同一个视图，参见 WsBaseAsync.subscribe_conflated。"""
+        view = ConflatedView(callback, interval)
+        groups: Dict[int, List[Dict[str, str]]] = defaultdict(list)
+        for param in params:
+            shard = self._place(param)
+            if shard is None:
+                continue
+            groups[shard.index].append(param)
+        await asyncio.gather(
+            *(
+                self.shards[i].subscribe_conflated(group, view=view)
+                for i, group in groups.items()
+            )
+        )
+        return view
+
+    async def unsubscribe(self, params: List[Dict[str, str]]) -> List[asyncio.Future]:
+        groups = self._group(params)
+        for param in params:
+            key = route_key(param)
+            shard = self._placement.pop(key, None)
+            if shard is not None:
+                shard.weight -= channel_weight(key[0])
+            self._params.pop(key, None)
+            self._callbacks.pop(key, None)
+        results = await asyncio.gather(
+            *(self.shards[i].unsubscribe(group) for i, group in groups.items())
+        )
+        return [future for futures in results for future in futures]
+
+    async def resubscribe(self, params: List[Dict[str, str]]) -> List[asyncio.Future]:
+        """在各参数所在的分片上重新订阅，不改变订阅记录，参见 WsBaseAsync.resubscribe()。"""
+        groups = self._group(params)
+        results = await asyncio.gather(
+            *(self.shards[i].resubscribe(group) for i, group in groups.items())
+        )
+        return [future for futures in results for future in futures]
+
+    # --- 再平衡 ---
+    def _saturated(self, shard: _ShardClient) -> bool:
+        if self.max_rate is not None and shard.rate > self.max_rate:
+            return True
+        return shard.busy_ratio > self.max_busy
+
+    async def _move(self, key: RouteKey, target: _ShardClient):
+        """
+        把一个订阅迁移到目标分片：先在原分片取消订阅，再在目标分片订阅，
+        这样订单簿等频道会从目标分片收到新的全量快照，不会收到两个连接交错的增量。
+        """
+        source = self._placement[key]
+        param = self._params[key]
+        callbacks = list(self._callbacks[key])
+        overflow = source._key_overflow.get(key)
+        view = source.views.get(key)
+        weight = channel_weight(key[0])
+        logger.info(
+            f"🔀 Moving {key[0]}:{key[1]} from shard {source.index} to shard {target.index}"
+        )
+        self._placement[key] = target
+        source.weight -= weight
+        target.weight += weight
+        await source.unsubscribe([param])
+        if view is not None:
+            await target.subscribe_conflated([param], view=view)
+        for callback in callbacks:
+            await target.subscribe([param], callback, overflow)
+        self.moves += 1
+
+    async def rebalance(self) -> int:
+        """
+        结束一个统计窗口，把饱和分片上消息最多的订阅（不超过 max_moves 个）迁移到最空闲的分片。
+        单个订阅的消息量超过源分片一半时不迁移（迁移只会让目标分片饱和）。
+        :return: 迁移的订阅数量。
+        """
+        now = time.monotonic()
+        elapsed = now - self._window_start
+        self._window_start = now
+        counts = {shard.index: shard.roll_window(elapsed) for shard in self.shards}
+        if len(self.shards) < 2:
+            return 0
+
+        moved = 0
+        saturated = [s for s in self.shards if self._saturated(s)]
+        for shard in sorted(saturated, key=lambda s: (s.busy_ratio, s.rate), reverse=True):
+            if moved >= self.max_moves:
+                break
+            shard_counts = counts[shard.index]
+            total = sum(shard_counts.values())
+            others = [
+                s for s in self.shards if s is not shard and s.factory.is_connected()
+            ]
+            if not others or not total:
+                continue
+            # 每次最多迁走源分片约一半的消息量
+            excess = total / 2
+            for key, n in sorted(shard_counts.items(), key=lambda kv: kv[1], reverse=True):
+                if moved >= self.max_moves or excess <= 0:
+                    break
+                if n > total / 2 or self._placement.get(key) is not shard:
+                    continue
+                target = min(others, key=lambda s: (s.rate, s.weight))
+                await self._move(key, target)
+                # 按迁移的消息量估算目标分片的新速率，避免连续迁移到同一个分片
+                if elapsed > 0:
+                    target.rate += n / elapsed
+                excess -= n
+                moved += 1
+        return moved
+
+    async def _rebalance_loop(self):
+        while True:
+            await asyncio.sleep(self.rebalance_interval)
+            try:
+                await self.rebalance()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.exception(f"Unexpected error while rebalancing WebSocket pool: {e}")
+
+    # --- 统计 ---
+    def shard_of(self, param: Dict[str, str]) -> Optional[int]:
+        """订阅参数所在的分片编号，未订阅时返回 None。"""
+        shard = self._placement.get(route_key(param))
+        return shard.index if shard is not None else None
+
+    @property
+    def subscription_errors(self) -> Dict[RouteKey, dict]:
+        """所有分片上最近一次被拒绝的订阅。"""
+        errors: Dict[RouteKey, dict] = {}
+        for shard in self.shards:
+            errors.update(shard.subscription_errors)
+        return errors
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """每个分片的统计数据。"""
+        subscriptions: Dict[int, int] = defaultdict(int)
+        for shard in self._placement.values():
+            subscriptions[shard.index] += 1
+        return [
+            {
+                "shard": shard.index,
+                "connected": shard.factory.is_connected(),
+                "subscriptions": subscriptions[shard.index],
+                "weight": shard.weight,
+                "messages": shard.messages,
+                "bytes": shard.bytes,
+                "rate": shard.rate,
+                "busy_ratio": shard.busy_ratio,
+                "reconnects": shard.reconnects,
+                "dropped": shard.dropped,
+            }
+            for shard in self.shards
+        ]
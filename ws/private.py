@@ -21,8 +21,10 @@ class WsPrivateAsync(WsBaseAsync):
         use_server_time: bool = False,
         ping_interval: Optional[int] = None,
         ping_timeout: Optional[int] = None,
+        queue_size: Optional[int] = 1000,
+        overflow: Optional[Dict[str, str]] = None,
     ):
-        super().__init__(url, ping_interval, ping_timeout)
+        super().__init__(url, ping_interval, ping_timeout, queue_size, overflow)
         self.api_key = api_key
         self.passphrase = passphrase
         self.secret_key = secret_key
@@ -53,6 +55,8 @@ class WsPrivateAsync(WsBaseAsync):
 
             self._login_future = asyncio.get_running_loop().create_future()
 
+            # 登录与(取消)订阅共用每条连接的请求频率限制
+            await self._acquire_op()
             await self.factory.websocket.send(login_payload)
 
             # 等待登录结果，设置10秒超时
@@ -91,6 +95,7 @@ class WsPrivateAsync(WsBaseAsync):
         """重连后，先登录再恢复订阅"""
         if await self.factory.reconnect():
             self.logged_in = False  # 重连后需要重新登录
+            self._reset_op_limiters()
             if await self.login():
                 await self._resubscribe_all()
             else:
@@ -101,11 +106,16 @@ class WsPrivateAsync(WsBaseAsync):
             logger.error("Failed to reconnect, will retry consumer loop.")
             await asyncio.sleep(5)
 
-    async def subscribe(self, params: List[Dict[str, str]], callback: Callable):
+    async def subscribe(
+        self,
+        params: List[Dict[str, str]],
+        callback: Callable,
+        overflow: Optional[str] = None,
+    ) -> List[asyncio.Future]:
         """订阅私有频道前确保已登录"""
         if not self.logged_in:
             if not await self.login():
                 logger.error("Cannot subscribe to private channels, login failed.")
-                return
+                return []
 
-        await super().subscribe(params, callback)
+        return await super().subscribe(params, callback, overflow)
@@ -1,6 +1,6 @@
 # okx/ws/public.py
 import logging
-from typing import Optional
+from typing import Dict, Optional
 from okxx.ws.base import WsBaseAsync
 
 logger = logging.getLogger(__name__)
@@ -17,6 +17,14 @@ class WsPublicAsync(WsBaseAsync):
         url: str = "wss://ws.okx.com:8443/ws/v5/public",
         ping_interval: Optional[int] = None,
         ping_timeout: Optional[int] = None,
+        queue_size: Optional[int] = 1000,
+        overflow: Optional[Dict[str, str]] = None,
     ):
-        super().__init__(url, ping_interval=ping_interval, ping_timeout=ping_timeout)
+        super().__init__(
+            url,
+            ping_interval=ping_interval,
+            ping_timeout=ping_timeout,
+            queue_size=queue_size,
+            overflow=overflow,
+        )
         logger.info("🌐 Public channel client initialized.")
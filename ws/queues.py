@@ -0,0 +1,140 @@
+# okx/ws/queues.py
+"""
+按订阅划分的有界消息队列
+
+接收循环只负责解析消息并放入对应订阅（路由键）的队列，回调由每个队列独立的任务执行，
+慢回调不会阻塞 socket 读取，也不会影响其他订阅。队列满时按溢出策略处理：
+- block：接收循环等待队列有空位（反压，不丢消息），适用于增量深度、成交和私有频道；
+- drop_oldest：丢弃最旧的一条；
+- conflate：丢弃所有未处理的消息，只保留最新一条，适用于 tickers、books5 等快照类频道。
+"""
+
+import asyncio
+import logging
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+OVERFLOW_BLOCK = "block"
+OVERFLOW_DROP_OLDEST = "drop_oldest"
+OVERFLOW_CONFLATE = "conflate"
+OVERFLOW_POLICIES = (OVERFLOW_BLOCK, OVERFLOW_DROP_OLDEST, OVERFLOW_CONFLATE)
+
+# 每条推送都是完整快照的频道默认合并，其余频道默认阻塞
+DEFAULT_OVERFLOW: Dict[str, str] = {
+    "tickers": OVERFLOW_CONFLATE,
+    "index-tickers": OVERFLOW_CONFLATE,
+    "mark-price": OVERFLOW_CONFLATE,
+    "price-limit": OVERFLOW_CONFLATE,
+    "books5": OVERFLOW_CONFLATE,
+    "bbo-tbt": OVERFLOW_CONFLATE,
+}
+
+
+def check_policy(policy: str) -> str:
+    if policy not in OVERFLOW_POLICIES:
+        raise ValueError(f"Invalid overflow policy: {policy}")
+    return policy
+
+
+class SubscriptionQueue:
+    """单个订阅的有界队列及其消费任务。"""
+
+    def __init__(
+        self,
+        name: str,
+        deliver: Callable[[Any], Awaitable[None]],
+        maxsize: int,
+        policy: str = OVERFLOW_BLOCK,
+    ):
+        """
+        :param name: 队列名称（用于日志和统计）。
+        :param deliver: 消费任务对每条消息调用的协程函数。
+        :param maxsize: 队列容量。
+        :param policy: 溢出策略。
+        """
+        if maxsize <= 0:
+            raise ValueError("maxsize must be positive.")
+        self.name = name
+        self.deliver = deliver
+        self.maxsize = maxsize
+        self.policy = check_policy(policy)
+
+        self.items: Deque[Any] = deque()
+        self.dropped = 0
+        self.delivered = 0
+        self.max_depth = 0
+        self._not_empty = asyncio.Event()
+        self._not_full = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._closed = False
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    async def put(self, item: Any):
+        """放入一条消息，队列满时按溢出策略处理。"""
+        if self._closed:
+            return
+        items = self.items
+        if len(items) >= self.maxsize:
+            if self.policy == OVERFLOW_CONFLATE:
+                self.dropped += len(items)
+                items.clear()
+            elif self.policy == OVERFLOW_DROP_OLDEST:
+                items.popleft()
+                self.dropped += 1
+            else:
+                while len(items) >= self.maxsize:
+                    self._not_full.clear()
+                    await self._not_full.wait()
+                    if self._closed:
+                        return
+        items.append(item)
+        if len(items) > self.max_depth:
+            self.max_depth = len(items)
+        self._not_empty.set()
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        items = self.items
+        while True:
+            if not items:
+                self._not_empty.clear()
+                await self._not_empty.wait()
+                continue
+            item = items.popleft()
+            self._not_full.set()
+            try:
+                await self.deliver(item)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.exception(f"Error delivering message for {self.name}: {e}")
+            self.delivered += 1
+
+    async def close(self):
+        """停止消费任务，丢弃未处理的消息。"""
+        self._closed = True
+        task = self._task
+        self._task = None
+        self.items.clear()
+        # 唤醒可能在 put() 中等待的接收循环
+        self._not_full.set()
+        if task and not task.done():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "policy": self.policy,
+            "depth": len(self.items),
+            "max_depth": self.max_depth,
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+        }
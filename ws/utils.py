@@ -9,6 +9,8 @@ from typing import Optional
 
 import httpx
 
+from okxx import codec
+
 logger = logging.getLogger(__name__)
 
 
@@ -60,4 +62,4 @@ async def generate_login_payload(api_key, passphrase, secret_key, use_server_tim
     }
     
     payload = {"op": "login", "args": [arg]}
-    return json.dumps(payload)
\ No newline at end of file
+    return codec.dumps(payload)
\ No newline at end of file